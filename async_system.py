@@ -0,0 +1,297 @@
+"""
+비동기 질문 처리 (AsyncTFTRAGSystem)
+
+TFTRAGSystem.query는 검색/생성이 모두 블로킹이라 요청 하나가 스레드 하나를
+Ollama 호출 내내 붙잡습니다. 여기서는
+- 임베딩/벡터 검색 (CPU 작업): 전용 executor에서 실행, 동시에 들어온 질문은 QueryBatcher로 묶음
+- 생성: ollama.AsyncClient로 이벤트 루프에서 스트리밍
+으로 나눠서 이벤트 루프 하나가 수백 개의 질문을 동시에 처리할 수 있게 합니다.
+요청별 타임아웃이 지나거나 태스크가 취소되면 Ollama 스트림을 닫아서 생성도 멈춥니다.
+
+사용 예시:
+    rag = AsyncTFTRAGSystem(TFTRAGSystem(), timeout=60)
+    response = await rag.query("3-2에서 리롤해야 하나요?")
+    async for event in rag.query_stream(question, game_state):
+        ...
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import time
+
+from data.metadata_schema import GameState
+
+
+class QueryBatcher:
+    """
+    동시에 들어온 질문 묶기 (micro-batching)
+
+    첫 질문이 들어오면 window_ms 동안 기다렸다가 (max_batch_size개가 차면 바로)
+    모인 질문을 retrieve_many 한 번으로 검색합니다.
+    검색은 전용 스레드 하나에서 순서대로 실행되므로, 검색 중에 들어온 질문은
+    다음 묶음으로 모입니다 (부하가 클수록 묶음이 커짐).
+    """
+
+    def __init__(self, retriever, executor: ThreadPoolExecutor, window_ms: float = 5.0, max_batch_size: int = 32):
+        """
+        Args:
+            retriever: TFTRetriever (retrieve_many 사용)
+            executor: 임베딩/벡터 검색을 실행할 executor
+            window_ms: 첫 질문 후 다른 질문을 기다리는 시간 (ms)
+            max_batch_size: 한 묶음의 최대 질문 수
+        """
+        self.retriever = retriever
+        self.executor = executor
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._pending: List[Tuple[str, Optional[GameState], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # 실행 중인 묶음 (태스크가 GC되지 않도록 참조 유지)
+        self._tasks = set()
+        self.batches = 0
+        self.queries = 0
+        self.max_seen_batch = 0
+
+    async def retrieve(self, question: str, game_state: Optional[GameState] = None) -> List[Dict]:
+        """질문 하나 검색 (다른 질문과 묶여서 실행됨)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((question, game_state, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        # 기다리는 동안 취소된 요청은 빼고 검색
+        batch = [item for item in batch if not item[2].done()]
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[str, Optional[GameState], asyncio.Future]]):
+        self.batches += 1
+        self.queries += len(batch)
+        self.max_seen_batch = max(self.max_seen_batch, len(batch))
+
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor,
+                self.retriever.retrieve_many,
+                [question for question, _, _ in batch],
+                [game_state for _, game_state, _ in batch]
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "avg_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_seen_batch,
+            "window_ms": self.window * 1000
+        }
+
+
+class AsyncTFTRAGSystem:
+    """
+    TFTRAGSystem의 비동기 질문 경로
+
+    수집/통계 등 나머지 기능은 감싼 TFTRAGSystem을 그대로 씁니다.
+    """
+
+    def __init__(
+        self,
+        system,
+        cpu_workers: int = 1,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 32,
+        timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            system: TFTRAGSystem 인스턴스 (초기화 완료 상태)
+            cpu_workers: 임베딩/벡터 검색 전용 스레드 수 (1이면 묶음이 순서대로 실행되어 묶음이 커짐)
+            batch_window_ms: 질문을 묶기 위해 기다리는 시간 (ms, 0이면 같은 루프 틱에 들어온 질문만)
+            max_batch_size: 한 번에 검색할 최대 질문 수
+            timeout: 요청별 기본 타임아웃 (초, None이면 없음)
+        """
+        self.system = system
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="rag-cpu")
+        self.batcher = QueryBatcher(system.retriever, self.executor, batch_window_ms, max_batch_size)
+        self.active_requests = 0
+        self.timed_out = 0
+
+    async def warm_up(self):
+        """임베딩 모델과 인덱스를 미리 로드 (첫 요청이 느리지 않도록)"""
+        started_at = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.system.retriever.retrieve_many, ["3-2에서 리롤해야 하나요?"])
+        print(f"워밍업 완료 ({time.perf_counter() - started_at:.2f}초)")
+
+    async def retrieve(self, question: str, game_state: Optional[GameState] = None) -> List[Dict]:
+        """검색 (동시에 들어온 질문과 묶여서 executor에서 실행)"""
+        return await self.batcher.retrieve(question, game_state)
+
+    async def _events(self, question: str, game_state: Optional[GameState]) -> AsyncIterator[Dict]:
+        """응답 이벤트 (retrieval -> token... -> done), 타임아웃 없음"""
+        loop = asyncio.get_running_loop()
+        system = self.system
+
+        # 1. 검색
+        results = await self.retrieve(question, game_state)
+
+        # 2. 컨텍스트 + 답변 캐시 확인 (질문 임베딩은 쿼리 캐시에 있음)
+        prepared = await loop.run_in_executor(
+            self.executor, system.prepare_answer, question, game_state, results
+        )
+        sources = system.generator._extract_sources(results) if system.generator else []
+        yield {"type": "retrieval", "sources": sources, "retrieved_chunks": results}
+
+        if prepared["response"] is not None:
+            response = prepared["response"]
+            yield {
+                "type": "done",
+                "answer": response["answer"],
+                "sources": response.get("sources", []),
+                "generation_stats": response.get("generation_stats"),
+                "cached": bool(response.get("cached"))
+            }
+            return
+
+        # 3. 생성 (이벤트 루프에서 스트리밍)
+        generation_stats: Dict = {}
+        answer_parts = []
+        tokens = system.generator.agenerate_stream(
+            question, prepared["context"], game_state, stats=generation_stats
+        )
+        try:
+            async for token in tokens:
+                answer_parts.append(token)
+                yield {"type": "token", "text": token}
+        finally:
+            # 소비하는 쪽이 멈추거나 취소되면 Ollama 스트림도 닫음
+            await tokens.aclose()
+
+        response = system.finish_answer(question, game_state, prepared, {
+            "answer": "".join(answer_parts),
+            "sources": sources,
+            "generation_stats": generation_stats
+        })
+        yield {
+            "type": "done",
+            "answer": response["answer"],
+            "sources": response["sources"],
+            "generation_stats": response["generation_stats"],
+            "cached": False
+        }
+
+    async def query_stream(
+        self,
+        question: str,
+        game_state: Optional[GameState] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict]:
+        """
+        질문 하나의 응답 이벤트 스트림
+
+        {"type": "retrieval", "sources", "retrieved_chunks"}
+        {"type": "token", "text"} ...
+        {"type": "done", "answer", "sources", "generation_stats", "cached"}
+
+        Args:
+            timeout: 전체 제한 시간 (초, None이면 self.timeout)
+
+        Raises:
+            asyncio.TimeoutError: 제한 시간 초과 (생성은 중단됨)
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout else None
+
+        # 이벤트는 별도 태스크 하나에서 만듦 (Ollama HTTP 스트림을 한 태스크 안에서 열고 닫도록)
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def produce():
+            events = self._events(question, game_state)
+            try:
+                async for event in events:
+                    await queue.put(event)
+                await queue.put(done)
+            except Exception as e:
+                await queue.put(e)
+            finally:
+                await events.aclose()
+
+        self.active_requests += 1
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    item = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    self.timed_out += 1
+                    raise
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # 타임아웃/취소/소비 중단이면 생성 태스크를 취소 (Ollama 스트림이 닫힘)
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+            self.active_requests -= 1
+
+    async def query(
+        self,
+        question: str,
+        game_state: Optional[GameState] = None,
+        timeout: Optional[float] = None
+    ) -> Dict:
+        """
+        TFTRAGSystem.query의 비동기 버전
+
+        Returns:
+            {"answer", "sources", "retrieved_chunks", "generation_stats", "cached"}
+
+        Raises:
+            asyncio.TimeoutError: 제한 시간 초과 (생성은 중단됨)
+        """
+        response = {}
+        async for event in self.query_stream(question, game_state, timeout):
+            if event["type"] == "retrieval":
+                response["retrieved_chunks"] = event["retrieved_chunks"]
+            elif event["type"] == "done":
+                response.update({key: value for key, value in event.items() if key != "type"})
+        return response
+
+    def stats(self) -> Dict:
+        return {
+            "batching": self.batcher.stats(),
+            "active_requests": self.active_requests,
+            "timed_out": self.timed_out
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,94 @@
+"""
+청크 길이 기준(글자 수 vs 토큰 수) 수집 벤치마크
+
+같은 자막을 두 모드로 분할해서 청크 수, 분할 시간, 임베딩 시간,
+ChromaDB 인덱스 크기를 비교합니다. 임베딩 모델이 필요합니다.
+토큰 모드의 청크 크기는 모델의 max_seq_length 안으로 줄어든 실제 값("크기" 열)입니다.
+
+실행:
+    python -m benchmarks.bench_chunking --hours 1
+    python -m benchmarks.bench_chunking --transcript data/processed/transcripts/VIDEO_ID.ko.json.gz
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_clean_text import make_transcript
+from data.chunker import TFTChunker
+from data.youtube_processor import YouTubeProcessor
+from rag.vector_store import TFTVectorStore
+import config
+
+
+def directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+def load_text(args) -> str:
+    if args.transcript:
+        processor = YouTubeProcessor(cache_dir=str(Path(args.transcript).parent))
+        video_id, language = Path(args.transcript).name.split('.')[:2]
+        transcript = processor.load_cached_transcript(video_id, language)
+        return processor.clean_text(processor.merge_transcript(transcript))
+    return YouTubeProcessor.clean_text(make_transcript(args.hours))
+
+
+def run_mode(text: str, length_unit: str, work_dir: Path) -> dict:
+    chunker = TFTChunker(
+        chunk_size=config.CHUNK_SIZE,
+        chunk_overlap=config.CHUNK_OVERLAP,
+        length_unit=length_unit,
+        tokenizer_name=config.EMBEDDING_MODEL
+    )
+
+    started_at = time.perf_counter()
+    chunks = chunker.create_chunks_with_metadata(text, {'video_source': 'bench', 'patch': config.CURRENT_PATCH})
+    chunk_seconds = time.perf_counter() - started_at
+
+    persist_dir = work_dir / length_unit
+    vector_store = TFTVectorStore(
+        collection_name=f"bench_{length_unit}",
+        persist_directory=str(persist_dir),
+        embedding_model=config.EMBEDDING_MODEL,
+        use_embedding_cache=False
+    )
+    stats = vector_store.add_chunks(chunks)
+
+    return {
+        'chunk_size': chunker.chunk_size,
+        'chunks': len(chunks),
+        'chunk_seconds': chunk_seconds,
+        'embed_seconds': stats['embed_seconds'],
+        'write_seconds': stats['write_seconds'],
+        'index_bytes': directory_size(persist_dir),
+        'token_cache': chunker.token_counter.stats() if chunker.token_counter else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="청크 길이 기준 벤치마크")
+    parser.add_argument("--hours", type=float, default=1.0, help="가짜 방송 길이 (시간)")
+    parser.add_argument("--transcript", type=str, help="캐시된 자막 파일 (*.json.gz)")
+    args = parser.parse_args()
+
+    text = load_text(args)
+    print(f"입력: {len(text):,} 글자, CHUNK_SIZE={config.CHUNK_SIZE}\n")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = {unit: run_mode(text, unit, Path(tmp_dir)) for unit in ("chars", "tokens")}
+
+    print(f"\n{'':<8}{'크기':>6}{'청크':>8}{'분할(s)':>10}{'임베딩(s)':>11}{'저장(s)':>10}{'인덱스(MB)':>12}")
+    for unit, result in results.items():
+        print(f"{unit:<8}{result['chunk_size']:>6}{result['chunks']:>8}{result['chunk_seconds']:>10.2f}"
+              f"{result['embed_seconds']:>11.2f}{result['write_seconds']:>10.2f}"
+              f"{result['index_bytes'] / 1e6:>12.2f}")
+
+    token_cache = results['tokens']['token_cache']
+    if token_cache:
+        print(f"\n토큰 수 캐시: 구간 {token_cache['entries']}개, 적중률 {token_cache['hit_rate'] * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
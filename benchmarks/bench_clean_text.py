@@ -0,0 +1,74 @@
+"""
+YouTubeProcessor.clean_text 마이크로 벤치마크
+
+기존 구현(패턴 9개를 매번 re.sub으로 반복 + 공백 정리)과
+미리 컴파일된 정제기(build_text_cleaner)를 비교합니다.
+
+실행:
+    python -m benchmarks.bench_clean_text --hours 3
+"""
+
+import argparse
+import random
+import re
+import timeit
+
+from data.youtube_processor import YouTubeProcessor
+
+
+def legacy_clean_text(text: str) -> str:
+    """기존 clean_text 구현 (비교용)"""
+    noise_patterns = [
+        r'음+', r'어+', r'아+', r'그+니까+', r'뭐+랄까+',
+        r'\(웃음\)', r'\(박수\)', r'ㅋ+', r'ㅎ+',
+    ]
+    cleaned = text
+    for pattern in noise_patterns:
+        cleaned = re.sub(pattern, '', cleaned)
+    cleaned = re.sub(r'\s+', ' ', cleaned)
+    return cleaned.strip()
+
+
+def make_transcript(hours: float, seed: int = 0, noise_ratio: float = 0.1) -> str:
+    """방송 자막과 비슷한 가짜 텍스트 생성 (3초 분량 세그먼트에 15어절)"""
+    rng = random.Random(seed)
+    words = [
+        '3-2에서', '리롤', '레벨업', '아이템은', '무한의', '대검', '야스오', '요네',
+        '연패', '골드', '먹어요', '그래서', '이거', '중요해요', '아이고', '좋아요',
+        '여기서', '체력이', '많이', '남았으니까', '증강체', '선택은', '4-1', '음식',
+    ]
+    noise = ['음', '어', '아아', '그니까', 'ㅋㅋㅋ', '(웃음)', 'ㅎㅎ', '뭐랄까']
+    segments = []
+    for _ in range(int(hours * 3600 / 3)):
+        segments.append(' '.join(
+            rng.choice(noise) if rng.random() < noise_ratio else rng.choice(words)
+            for _ in range(15)
+        ))
+    return '\n\n'.join(segments)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="clean_text 벤치마크")
+    parser.add_argument("--hours", type=float, default=3.0, help="가짜 방송 길이 (시간)")
+    parser.add_argument("--repeat", type=int, default=5, help="반복 횟수")
+    args = parser.parse_args()
+
+    text = make_transcript(args.hours)
+    print(f"입력: {len(text):,} 글자 ({args.hours}시간 분량)")
+
+    for name, func in [
+        ("기존 (9 + 1 패스)", legacy_clean_text),
+        ("컴파일된 정제기", YouTubeProcessor.clean_text),
+    ]:
+        seconds = min(timeit.repeat(lambda: func(text), number=1, repeat=args.repeat))
+        print(f"{name:<18} {seconds * 1000:8.1f} ms  ({len(text) / seconds / 1e6:.1f} M글자/s)")
+
+    # 기존 구현은 단어 안의 '아'/'어'/'음'까지 지움
+    sample = "아이템은 먹어요 음식"
+    print(f"\n예시: {sample!r}")
+    print(f"  기존:     {legacy_clean_text(sample)!r}")
+    print(f"  새 정제기: {YouTubeProcessor.clean_text(sample)!r}")
+
+
+if __name__ == "__main__":
+    main()
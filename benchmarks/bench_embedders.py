@@ -0,0 +1,115 @@
+"""
+임베딩 백엔드 벤치마크 (sentence-transformers vs 동적 int8 vs ONNX Runtime)
+
+같은 청크/질문을 백엔드별로 인코딩해서 처리량(문장/초), 질문 하나 지연 시간,
+기준 모델(sentence-transformers)과의 코사인 일치도를 비교합니다.
+onnx 백엔드는 미리 변환한 로컬 모델이 필요합니다:
+
+    python -c "from rag.embedding import export_onnx_model; import config; \
+export_onnx_model(config.EMBEDDING_MODEL, config.ONNX_MODEL_PATH.parent)"
+
+실행:
+    python -m benchmarks.bench_embedders --chunks 500
+    python -m benchmarks.bench_embedders --backends sentence-transformers onnx --onnx_path models/xlm-r-onnx/model.onnx
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_clean_text import make_transcript
+from data.chunker import TFTChunker
+from data.youtube_processor import YouTubeProcessor
+from rag.embedding import EMBEDDING_BACKENDS, check_parity, get_embedder
+import config
+
+
+QUESTIONS = [
+    "3-2에서 리롤해야 하나요?",
+    "골드 50 모았는데 레벨업 할까요?",
+    "체력 30인데 지금 올인해야 하나요?",
+    "2-1 오프닝 아이템 뭐 먹어야 해요?",
+    "야스오 요네 덱 언제 리롤해요?",
+]
+
+
+def make_chunks(count: int):
+    """자막 예시를 청크로 나눠서 count개 (모자라면 반복)"""
+    chunker = TFTChunker(chunk_size=config.CHUNK_SIZE, chunk_overlap=config.CHUNK_OVERLAP)
+    texts = chunker.split_text(YouTubeProcessor.clean_text(make_transcript(1)))
+    return (texts * (count // max(len(texts), 1) + 1))[:count]
+
+
+def run_backend(backend: str, args, texts, reference):
+    started_at = time.perf_counter()
+    embedder = get_embedder(
+        config.EMBEDDING_MODEL,
+        "cpu",
+        backend=backend,
+        model_path=args.onnx_path,
+        num_threads=args.threads
+    )
+    embedder.encode(QUESTIONS[:1])
+    load_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    embedder.encode(texts, batch_size=args.batch_size)
+    throughput = len(texts) / (time.perf_counter() - started_at)
+
+    timings = []
+    for i in range(args.queries):
+        query_started_at = time.perf_counter()
+        embedder.encode([QUESTIONS[i % len(QUESTIONS)]])
+        timings.append(time.perf_counter() - query_started_at)
+
+    parity = None
+    if reference is not None and embedder is not reference:
+        parity = check_parity(embedder, reference, texts[:args.parity_texts] + QUESTIONS, args.min_cosine)
+
+    return {
+        'load_seconds': load_seconds,
+        'throughput': throughput,
+        'p50_ms': float(np.percentile(timings, 50) * 1000),
+        'p95_ms': float(np.percentile(timings, 95) * 1000),
+        'parity': parity
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 백엔드 벤치마크")
+    parser.add_argument("--backends", nargs="+", default=EMBEDDING_BACKENDS, choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--onnx_path", default=str(config.ONNX_MODEL_PATH), help="onnx 백엔드 모델 파일")
+    parser.add_argument("--chunks", type=int, default=500, help="처리량 측정 청크 수")
+    parser.add_argument("--queries", type=int, default=50, help="지연 시간 측정 질문 수")
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None, help="CPU 스레드 수")
+    parser.add_argument("--parity_texts", type=int, default=200, help="일치도 비교 청크 수")
+    parser.add_argument("--min_cosine", type=float, default=0.99, help="일치도 통과 기준 (최소 코사인)")
+    args = parser.parse_args()
+
+    texts = make_chunks(args.chunks)
+    print(f"청크 {len(texts)}개, 배치 {args.batch_size}, 질문 {args.queries}개\n")
+
+    reference = None
+    if "sentence-transformers" in args.backends:
+        reference = get_embedder(config.EMBEDDING_MODEL, "cpu")
+
+    results = {}
+    for backend in args.backends:
+        results[backend] = run_backend(backend, args, texts, reference)
+
+    print(f"{'백엔드':<24}{'로드(s)':>9}{'문장/초':>10}{'p50(ms)':>9}{'p95(ms)':>9}"
+          f"{'평균 cos':>10}{'최소 cos':>10}{'이웃 일치':>10}")
+    for backend, result in results.items():
+        row = (f"{backend:<24}{result['load_seconds']:>9.2f}{result['throughput']:>10.1f}"
+               f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}")
+        parity = result['parity']
+        if parity:
+            row += (f"{parity['mean_cosine']:>10.4f}{parity['min_cosine']:>10.4f}"
+                    f"{parity['neighbour_agreement']:>10.3f}{'' if parity['passed'] else '  (기준 미달)'}")
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
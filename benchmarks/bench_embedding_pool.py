@@ -0,0 +1,81 @@
+"""
+임베딩 워커 풀 확장성 벤치마크
+
+같은 청크를 워커 수별로 인코딩해서 처리량(청크/초)을 비교하고,
+결과가 한 프로세스 인코딩과 같은 순서/값인지 확인합니다.
+워커 시작(모델 로드) 시간은 처리량에서 뺍니다. 임베딩 모델이 필요합니다.
+
+실행:
+    python -m benchmarks.bench_embedding_pool --chunks 2000
+    python -m benchmarks.bench_embedding_pool --workers 1 2 4 8 --backend onnx
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from benchmarks.bench_embedders import make_chunks
+from rag.embedding import EMBEDDING_BACKENDS, get_embedder
+from rag.embedding_pool import EmbeddingWorkerPool
+import config
+
+
+def default_worker_counts():
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="임베딩 워커 풀 확장성 벤치마크")
+    parser.add_argument("--chunks", type=int, default=2000, help="인코딩할 청크 수")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_worker_counts(), help="비교할 워커 수")
+    parser.add_argument("--backend", default=config.EMBEDDING_BACKEND, choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--onnx_path", default=str(config.ONNX_MODEL_PATH), help="onnx 백엔드 모델 파일")
+    parser.add_argument("--batch_size", type=int, default=32)
+    args = parser.parse_args()
+
+    texts = make_chunks(args.chunks)
+    cores = os.cpu_count() or 1
+    print(f"청크 {len(texts)}개, 코어 {cores}개, 백엔드 {args.backend}\n")
+
+    # 기준: 이 프로세스에서 라이브러리 기본 스레드로 인코딩
+    embedder = get_embedder(config.EMBEDDING_MODEL, "cpu", backend=args.backend, model_path=args.onnx_path)
+    embedder.encode(texts[:args.batch_size])
+    started_at = time.perf_counter()
+    expected = embedder.encode(texts, batch_size=args.batch_size)
+    baseline = len(texts) / (time.perf_counter() - started_at)
+
+    print(f"{'워커':>4}{'스레드/워커':>12}{'시작(s)':>9}{'청크/초':>10}{'기준 대비':>10}{'최대 오차':>11}")
+    print(f"{'-':>4}{'기본':>12}{'-':>9}{baseline:>10.1f}{1.0:>10.2f}{0.0:>11.1e}")
+
+    for workers in args.workers:
+        pool = EmbeddingWorkerPool(
+            config.EMBEDDING_MODEL,
+            workers=workers,
+            backend=args.backend,
+            model_path=args.onnx_path
+        )
+        try:
+            # 모든 워커가 모델을 로드하도록 워커 수만큼 조각을 보냄
+            started_at = time.perf_counter()
+            pool.encode(texts[:workers * args.batch_size], batch_size=args.batch_size)
+            startup_seconds = time.perf_counter() - started_at
+
+            started_at = time.perf_counter()
+            embeddings = pool.encode(texts, batch_size=args.batch_size)
+            throughput = len(texts) / (time.perf_counter() - started_at)
+        finally:
+            pool.shutdown()
+
+        error = float(np.abs(embeddings - expected).max())
+        print(f"{workers:>4}{pool.threads_per_worker:>12}{startup_seconds:>9.2f}{throughput:>10.1f}"
+              f"{throughput / baseline:>10.2f}{error:>11.1e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+NumPy 인덱스 양자화 벤치마크 (recall@k, 메모리, 지연 시간)
+
+float32 정확한 검색을 기준으로 int8/float16 양자화 사본 + 원본 재계산의
+recall@k를 rescore_factor별로 비교합니다. 모드마다 새 프로세스에서 인덱스를 열어
+메모리를 측정합니다. RSS는 프로세스 전용 메모리(anon)와 원본 mmap에서 읽은
+파일 페이지(file, 페이지 캐시라서 메모리가 부족하면 회수됨)로 나눠서 보여줍니다.
+임베딩은 실제 문장 임베딩처럼 군집이 있는 임의 벡터를 씁니다 (임베딩 모델 불필요).
+
+실행:
+    python -m benchmarks.bench_quantization --chunks 100000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_vector_backends import DIM, in_subprocess
+from rag.numpy_index import NumpyCollection
+
+
+def make_embeddings(count: int, clusters: int = 500, noise: float = 0.6, seed: int = 0) -> np.ndarray:
+    """군집 중심 + 잡음 (같은 주제 청크끼리 가까운 분포)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIM), dtype=np.float32)
+    labels = rng.integers(0, clusters, count)
+    return centers[labels] + noise * rng.standard_normal((count, DIM), dtype=np.float32)
+
+
+def rss_breakdown_mb() -> dict:
+    """/proc/self/status의 RssAnon/RssFile (MB, Linux 전용)"""
+    usage = {'anon': 0.0, 'file': 0.0}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('RssAnon:'):
+                    usage['anon'] = int(line.split()[1]) / 1024
+                elif line.startswith('RssFile:'):
+                    usage['file'] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return usage
+
+
+def build_index(persist_dir: str, count: int, queue):
+    embeddings = make_embeddings(count)
+    collection = NumpyCollection("bench_quant", persist_dir)
+    for start in range(0, count, 5000):
+        end = min(start + 5000, count)
+        collection.upsert(
+            ids=[f"chunk_{i:07d}" for i in range(start, end)],
+            embeddings=embeddings[start:end],
+            metadatas=[{'stage_ordinal': 21 + i % 35} for i in range(start, end)]
+        )
+    collection.persist()
+
+    # 양자화 사본은 여기서 미리 만들어 둠 (측정 프로세스는 원본 행렬을 통째로 읽지 않도록)
+    for quantization in ('float16', 'int8'):
+        NumpyCollection("bench_quant", persist_dir, quantization=quantization).persist()
+    queue.put({})
+
+
+def run_mode(persist_dir: str, quantization, rescore_factor: int, queries: np.ndarray, top_k: int, queue):
+    baseline = rss_breakdown_mb()
+    collection = NumpyCollection("bench_quant", persist_dir, quantization=quantization, rescore_factor=rescore_factor)
+
+    results, timings = [], []
+    for query in queries:
+        started_at = time.perf_counter()
+        hits = collection.query(query, n_results=top_k, include=[])
+        timings.append(time.perf_counter() - started_at)
+        results.append(hits['ids'][0])
+
+    stats = collection.stats()
+    usage = rss_breakdown_mb()
+    queue.put({
+        'results': results,
+        'p50_ms': float(np.percentile(timings, 50) * 1000),
+        'p95_ms': float(np.percentile(timings, 95) * 1000),
+        'resident_bytes': stats['quantized_bytes'] or stats['vector_bytes'],
+        'anon_mb': usage['anon'] - baseline['anon'],
+        'file_mb': usage['file'] - baseline['file']
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy 인덱스 양자화 벤치마크")
+    parser.add_argument("--chunks", type=int, default=100000, help="청크 수")
+    parser.add_argument("--queries", type=int, default=200, help="쿼리 수")
+    parser.add_argument("--top_k", type=int, default=10, help="recall@k의 k")
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 2, 4, 8], help="비교할 rescore_factor")
+    args = parser.parse_args()
+
+    queries = make_embeddings(args.queries, seed=1)
+    print(f"청크 {args.chunks:,}개, {DIM}차원, 쿼리 {args.queries}개, recall@{args.top_k}\n")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        in_subprocess(build_index, tmp_dir, args.chunks)
+        exact = in_subprocess(run_mode, tmp_dir, None, 1, queries, args.top_k)
+        rows.append(('float32', '-', exact))
+        for quantization in ('float16', 'int8'):
+            for factor in args.factors:
+                rows.append((quantization, factor, in_subprocess(run_mode, tmp_dir, quantization, factor, queries, args.top_k)))
+        disk_bytes = {path.name: path.stat().st_size for path in Path(tmp_dir).iterdir()}
+
+    print(f"{'1차 검색':<10}{'배수':>6}{f'recall@{args.top_k}':>11}{'p50(ms)':>9}{'p95(ms)':>9}"
+          f"{'상주 행렬(MB)':>15}{'anon(MB)':>10}{'file(MB)':>10}")
+    for quantization, factor, result in rows:
+        recall = np.mean([
+            len(set(approx) & set(truth)) / len(truth)
+            for approx, truth in zip(result['results'], exact['results'])
+        ])
+        print(f"{quantization:<10}{factor:>6}{recall:>11.4f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['resident_bytes'] / 1e6:>15.1f}{result['anon_mb']:>10.1f}{result['file_mb']:>10.1f}")
+
+    print("\n파일 크기 (MB)")
+    for name, size in sorted(disk_bytes.items()):
+        print(f"  {name:<32}{size / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
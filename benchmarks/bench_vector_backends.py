@@ -0,0 +1,193 @@
+"""
+Vector Store 백엔드 벤치마크 (ChromaDB vs NumPy)
+
+같은 임의 임베딩/메타데이터로 두 백엔드 인덱스를 만들고,
+새 프로세스에서 열어서 시작 시간, 쿼리 지연 시간, 메모리(RSS)를 비교합니다.
+ChromaDB(HNSW)의 결과가 정확한 검색(NumPy)과 얼마나 겹치는지(recall@k)도 출력합니다.
+임베딩 모델은 필요 없습니다.
+
+실행:
+    python -m benchmarks.bench_vector_backends --chunks 30000
+    python -m benchmarks.bench_vector_backends --chunks 30000 --dtype float16
+"""
+
+import argparse
+import multiprocessing
+import random
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from data.chunk_features import derive_features
+import config
+
+
+DIM = 768
+
+# 쿼리 하나에 쓰는 필터 (retriever의 필터 완화 단계와 비슷하게)
+FILTERS = {
+    'none': None,
+    'stage': {'game_stage': '3-2'},
+    'stage_range': {'$and': [{'stage_ordinal': {'$gte': 26}}, {'stage_ordinal': {'$lte': 33}}]},
+    'stage_strategy': {'$and': [{'game_stage': '3-2'}, {'strategy_type': '리롤'}]},
+}
+
+
+def rss_mb() -> float:
+    """현재 RSS (MB, /proc가 없으면 최대 RSS)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_corpus(count: int, seed: int = 0):
+    """임의 임베딩 + 실제와 비슷한 메타데이터"""
+    rng = np.random.default_rng(seed)
+    choice = random.Random(seed).choice
+    embeddings = rng.standard_normal((count, DIM), dtype=np.float32)
+    ids = [f"chunk_{i:06d}" for i in range(count)]
+    documents = [f"전략 청크 {i}" for i in range(count)]
+    metadatas = []
+    for _ in range(count):
+        metadata = {
+            'season': config.CURRENT_SEASON,
+            'patch': choice(['13.22', '13.23', '13.24']),
+            'game_stage': choice(config.GAME_STAGES),
+            'strategy_type': choice(config.STRATEGY_TYPES),
+            'difficulty': choice(['입문', '초보', '중급', '고급']),
+            'key_champions': '["야스오", "요네"]',
+        }
+        metadata.update(derive_features(metadata))
+        metadatas.append(metadata)
+    return ids, embeddings, documents, metadatas
+
+
+def open_store(backend: str, persist_dir: Path, dtype: str):
+    from rag.vector_store import TFTVectorStore
+
+    return TFTVectorStore(
+        collection_name="bench_backends",
+        persist_directory=str(persist_dir / backend),
+        use_embedding_cache=False,
+        use_lexical_index=False,
+        backend=backend,
+        index_dtype=dtype
+    )
+
+
+def build_index(backend: str, persist_dir: str, dtype: str, count: int, queue):
+    ids, embeddings, documents, metadatas = make_corpus(count)
+    started_at = time.perf_counter()
+    store = open_store(backend, Path(persist_dir), dtype)
+    for start in range(0, count, 1000):
+        chunks = [
+            {'id': ids[i], 'text': documents[i], 'metadata': metadatas[i]}
+            for i in range(start, min(start + 1000, count))
+        ]
+        store.write_embedded_chunks(chunks, embeddings[start:start + len(chunks)])
+    store.flush()
+    queue.put({'build_seconds': time.perf_counter() - started_at})
+
+
+def run_queries(backend: str, persist_dir: str, dtype: str, queries: np.ndarray, top_k: int, queue):
+    baseline_rss = rss_mb()
+    started_at = time.perf_counter()
+    store = open_store(backend, Path(persist_dir), dtype)
+    # 첫 쿼리까지 포함해야 HNSW/memmap 로딩 시간이 들어감
+    store.search_by_embeddings(queries[:1], [None], n_results=top_k)
+    open_seconds = time.perf_counter() - started_at
+
+    latencies = {}
+    results = {}
+    for name, filters in FILTERS.items():
+        timings = []
+        results[name] = []
+        for query in queries:
+            query_started_at = time.perf_counter()
+            hits = store.search_by_embeddings(query[None, :], [filters], n_results=top_k)[0]
+            timings.append(time.perf_counter() - query_started_at)
+            results[name].append([hit['id'] for hit in hits])
+        latencies[name] = timings
+
+    # retriever 필터 완화처럼 필터 4개를 한 번에
+    ladder_timings = []
+    for query in queries:
+        query_started_at = time.perf_counter()
+        store.search_by_embeddings(np.repeat(query[None, :], len(FILTERS), axis=0), list(FILTERS.values()), top_k)
+        ladder_timings.append(time.perf_counter() - query_started_at)
+    latencies['ladder(4)'] = ladder_timings
+
+    queue.put({
+        'open_seconds': open_seconds,
+        'latencies': latencies,
+        'results': results,
+        'rss_mb': rss_mb() - baseline_rss
+    })
+
+
+def in_subprocess(target, *args) -> dict:
+    """새 프로세스에서 실행 (백엔드별 메모리를 따로 측정)"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=target, args=(*args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector Store 백엔드 벤치마크")
+    parser.add_argument("--chunks", type=int, default=30000, help="청크 수")
+    parser.add_argument("--queries", type=int, default=200, help="쿼리 수")
+    parser.add_argument("--top_k", type=int, default=config.TOP_K, help="쿼리별 결과 수")
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"], help="NumPy 인덱스 dtype")
+    args = parser.parse_args()
+
+    queries = np.random.default_rng(1).standard_normal((args.queries, DIM), dtype=np.float32)
+    print(f"청크 {args.chunks:,}개, {DIM}차원, 쿼리 {args.queries}개, top_k={args.top_k}\n")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for backend in ("chroma", "numpy"):
+            build = in_subprocess(build_index, backend, tmp_dir, args.dtype, args.chunks)
+            run = in_subprocess(run_queries, backend, tmp_dir, args.dtype, queries, args.top_k)
+            results[backend] = {**build, **run, 'disk_bytes': directory_size(Path(tmp_dir) / backend)}
+
+    print(f"{'':<8}{'구축(s)':>9}{'열기(s)':>9}{'RSS(MB)':>9}{'디스크(MB)':>11}")
+    for backend, result in results.items():
+        print(f"{backend:<8}{result['build_seconds']:>9.2f}{result['open_seconds']:>9.2f}"
+              f"{result['rss_mb']:>9.1f}{result['disk_bytes'] / 1e6:>11.1f}")
+
+    print(f"\n쿼리 지연 시간 (ms, p50 / p95)")
+    for name in results['numpy']['latencies']:
+        row = f"  {name:<16}"
+        for backend, result in results.items():
+            timings = np.array(result['latencies'][name]) * 1000
+            row += f"{backend}: {np.percentile(timings, 50):6.2f} / {np.percentile(timings, 95):6.2f}   "
+        print(row)
+
+    print(f"\nChromaDB recall@{args.top_k} (NumPy 정확한 검색 기준)")
+    for name in FILTERS:
+        recalls = [
+            len(set(approx) & set(exact)) / len(exact)
+            for approx, exact in zip(results['chroma']['results'][name], results['numpy']['results'][name])
+            if exact
+        ]
+        print(f"  {name:<16}{np.mean(recalls) if recalls else float('nan'):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,19 +12,60 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / "data" / "processed"
 VECTOR_DB_DIR = BASE_DIR / "vector_db"
+TRANSCRIPT_CACHE_DIR = DATA_DIR / "transcripts"  # 원본 자막 캐시 (json.gz)
+EMBEDDING_CACHE_DIR = BASE_DIR / "embedding_cache"  # VECTOR_DB_DIR 옆
+
+# Transcript Cache
+USE_TRANSCRIPT_CACHE = True
+TRANSCRIPT_OFFLINE = False  # True면 캐시된 자막만 사용 (네트워크 요청 없음)
 
 # Chunking Configuration
-CHUNK_SIZE = 400  # tokens
+CHUNK_SIZE = 400  # tokens (CHUNK_LENGTH_UNIT 기준, 토큰 모드에서는 임베딩 모델 max_seq_length 안으로 줄어듦)
 CHUNK_OVERLAP = 75  # tokens
+CHUNK_LENGTH_UNIT = "tokens"  # "tokens": 임베딩 모델 tokenizer 기준, "chars": 글자 수
+
+# Ingestion
+INGEST_BATCH_SIZE = 256  # 한 번에 임베딩/저장할 청크 수 (메모리 사용량 상한)
 
 # Retrieval Configuration
 TOP_K = 5  # 검색할 chunk 개수
 RERANK_TOP_K = 3  # 재정렬 후 최종 선택 개수
+USE_LEXICAL_INDEX = True  # BM25 역색인 (VECTOR_DB_DIR에 저장)
+LEXICAL_TOP_K = 5  # BM25 검색 결과 개수 (0이면 벡터 검색만)
+RRF_K = 60  # Reciprocal Rank Fusion 상수
+STAGE_RANGE_ROUNDS = 2  # 정확한 단계가 없을 때 찾아볼 앞뒤 라운드 수
+# 재정렬 특징별 가중치 (rag/reranker.py의 FeatureReranker.FEATURES)
+RERANK_WEIGHTS = {
+    "patch": 1.0,  # 패치 번호 (13.24 -> 1324)
+    "stage_match": 1000.0,  # 현재 라운드와 같은 단계
+    "stage_distance": 0.0,  # 현재 라운드와의 거리 (음수면 가까운 라운드 우선)
+    "difficulty": 1.0,  # 난이도 점수 (입문 100 ~ 고급 20)
+    "relevance": 1.0  # 검색 점수 (RRF / 거리)
+}
+
+# Answer Cache (비슷한 질문 + 같은 게임 상태 구간이면 LLM 호출 생략)
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_THRESHOLD = 0.95  # 캐시 적중 최소 코사인 유사도
+ANSWER_CACHE_SIZE = 512  # 최대 캐시 답변 수
 
 # Vector Store
 COLLECTION_NAME = "tft_strategies"
 EMBEDDING_MODEL = "sentence-transformers/xlm-r-100langs-bert-base-nli-stsb-mean-tokens"  # 한국어 지원
 EMBEDDING_DEVICE = "cpu"  # "cuda" for GPU, "cpu" for CPU
+EMBEDDING_BACKEND = "sentence-transformers"  # "sentence-transformers", "torch-int8" (동적 int8), "onnx" (ONNX Runtime)
+ONNX_MODEL_PATH = BASE_DIR / "models" / "xlm-r-onnx" / "model.int8.onnx"  # onnx 백엔드 모델 (rag.embedding.export_onnx_model로 생성)
+EMBEDDING_THREADS = None  # CPU 임베딩 스레드 수 (None이면 라이브러리 기본값)
+EMBEDDING_WORKERS = 0  # 수집 임베딩 워커 프로세스 수 (2 이상이면 코어를 나눠 씀, 워커마다 모델 메모리 필요)
+VECTOR_BACKEND = "chroma"  # "chroma": ChromaDB, "numpy": 프로세스 안 NumPy 인덱스 (정확한 검색, 빠른 시작)
+VECTOR_INDEX_DTYPE = "float32"  # numpy 백엔드 임베딩 저장 dtype ("float32" 또는 "float16")
+VECTOR_QUANTIZATION = None  # numpy 백엔드 메모리용 양자화 사본 (None, "int8", "float16"), 원본은 디스크
+QUANTIZATION_RESCORE_FACTOR = 4  # 양자화 검색 후 원본 벡터로 다시 계산할 후보 배수
+
+# Embedding Cache
+USE_EMBEDDING_CACHE = True
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000  # 디스크 캐시 최대 벡터 수 (LRU 교체)
+QUERY_CACHE_SIZE = 1024  # 쿼리 임베딩 LRU 캐시 크기
+QUERY_CACHE_TTL = None  # 쿼리 임베딩 캐시 유효 시간 (초, None이면 만료 없음)
 
 # Game Stages
 GAME_STAGES = [
@@ -49,3 +90,11 @@ STRATEGY_TYPES = [
 # Current Season & Patch
 CURRENT_SEASON = "시즌13"
 CURRENT_PATCH = "13.24"
+LEXICON_PATH = BASE_DIR / "data" / "lexicon" / "season13.json"  # 챔피언/아이템/시너지/키워드 사전
+
+# HTTP 서비스 (python main.py --mode serve)
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8000
+SERVE_BATCH_WINDOW_MS = 5  # 동시에 들어온 질문을 묶어서 검색하기 위해 기다리는 시간
+SERVE_MAX_BATCH_SIZE = 32  # 한 번에 검색할 최대 질문 수
+SERVE_REQUEST_TIMEOUT = 120  # 요청별 제한 시간 (초, 지나면 생성 중단, None이면 없음)
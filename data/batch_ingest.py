@@ -0,0 +1,285 @@
+"""
+여러 유튜브 영상을 한번에 처리하는 배치 수집기
+
+매니페스트 형식 (JSON 리스트 또는 JSONL, 한 줄에 영상 하나):
+    {"video_url": "https://youtube.com/watch?v=...", "patch": "13.24", "composition_name": "6도전자", ...}
+    {"video_url": "...", "metadata": {...}}   # 메타데이터를 따로 묶어도 됨
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict
+import json
+import random
+import time
+
+from data.youtube_processor import YouTubeProcessor
+from data.chunker import TFTChunker
+from rag.vector_store import TFTVectorStore
+import config
+
+
+def _video_source(video_url: str) -> str:
+    """기본 출처 이름 (영상 ID, 알 수 없는 URL이면 'unknown')"""
+    try:
+        return YouTubeProcessor.extract_video_id(video_url)
+    except ValueError:
+        return 'unknown'
+
+
+def default_metadata(video_url: str) -> Dict:
+    """메타데이터가 없을 때 쓰는 기본값"""
+    return {
+        'season': config.CURRENT_SEASON,
+        'patch': config.CURRENT_PATCH,
+        'video_source': _video_source(video_url),
+        'composition_name': '미정',
+        'difficulty': '초보'
+    }
+
+
+def load_manifest(path: str) -> List[Dict]:
+    """
+    매니페스트 파일 로드
+
+    Returns:
+        [{"video_url": "...", "metadata": {...}}, ...]
+    """
+    text = Path(path).read_text(encoding='utf-8').strip()
+    if not text:
+        return []
+
+    if text.startswith('['):
+        raw_entries = json.loads(text)
+    else:
+        raw_entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    entries = []
+    for raw in raw_entries:
+        raw = dict(raw)
+        video_url = raw.pop('video_url', None) or raw.pop('url', None)
+        if not video_url:
+            raise ValueError(f"매니페스트 항목에 video_url이 없습니다: {raw}")
+
+        metadata = default_metadata(video_url)
+        metadata.update(raw.pop('metadata', {}))
+        metadata.update(raw)
+        entries.append({'video_url': video_url, 'metadata': metadata})
+
+    return entries
+
+
+def fetch_transcript_with_retry(
+    youtube_processor: YouTubeProcessor,
+    video_url: str,
+    max_retries: int = 3,
+    backoff_seconds: float = 1.0
+) -> List[Dict]:
+    """
+    자막 가져오기 (실패 시 지수 백오프로 재시도)
+
+    Args:
+        youtube_processor: YouTubeProcessor 인스턴스
+        video_url: 유튜브 URL
+        max_retries: 최대 재시도 횟수
+        backoff_seconds: 첫 재시도 대기 시간 (재시도마다 2배)
+    """
+    video_id = youtube_processor.extract_video_id(video_url)
+
+    for attempt in range(max_retries + 1):
+        try:
+            return youtube_processor.get_transcript(video_id)
+        except Exception as e:
+            # 오프라인 모드의 캐시 미스는 재시도해도 결과가 같음
+            if attempt == max_retries or youtube_processor.offline:
+                raise
+            delay = backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.1)
+            print(f"[{video_id}] 자막 수집 실패 ({attempt + 1}/{max_retries}), "
+                  f"{delay:.1f}초 후 재시도: {e}")
+            time.sleep(delay)
+
+
+class BatchIngestor:
+    """
+    배치 수집기
+    - 자막 수집: 스레드 풀 (재시도 + 지수 백오프)
+    - 정제/분할: 영상별
+    - 임베딩/저장: 모든 영상의 바뀐 청크만 모아서 한번에
+    """
+
+    def __init__(
+        self,
+        youtube_processor: YouTubeProcessor,
+        chunker: TFTChunker,
+        vector_store: TFTVectorStore,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0
+    ):
+        """
+        Args:
+            youtube_processor: YouTubeProcessor 인스턴스
+            chunker: TFTChunker 인스턴스
+            vector_store: TFTVectorStore 인스턴스
+            max_workers: 자막 수집 동시 실행 수
+            max_retries: 영상별 최대 재시도 횟수
+            backoff_seconds: 첫 재시도 대기 시간 (재시도마다 2배)
+        """
+        self.youtube_processor = youtube_processor
+        self.chunker = chunker
+        self.vector_store = vector_store
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    def _fetch_with_retry(self, video_url: str) -> List[Dict]:
+        """자막 가져오기 (실패 시 지수 백오프로 재시도)"""
+        return fetch_transcript_with_retry(
+            self.youtube_processor,
+            video_url,
+            self.max_retries,
+            self.backoff_seconds
+        )
+
+    def fetch_transcripts(self, entries: List[Dict]) -> Dict[int, List[Dict]]:
+        """
+        모든 영상의 자막을 스레드 풀로 수집
+
+        Returns:
+            {매니페스트 위치: 자막 리스트} (실패한 영상은 제외)
+        """
+        transcripts = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._fetch_with_retry, entry['video_url']): i
+                for i, entry in enumerate(entries)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    transcripts[i] = future.result()
+                except Exception as e:
+                    print(f"영상 처리 실패: {entries[i]['video_url']} ({e})")
+        return transcripts
+
+    @staticmethod
+    def _stage_report(items: int, seconds: float, unit: str) -> Dict:
+        return {
+            'items': items,
+            'seconds': seconds,
+            'per_second': items / seconds if seconds > 0 else None,
+            'unit': unit
+        }
+
+    def run(self, entries: List[Dict]) -> Dict:
+        """
+        배치 수집 실행
+
+        Args:
+            entries: load_manifest 결과
+
+        Returns:
+            {"videos": ..., "failed": ..., "chunks": ..., "stages": {단계: 처리량}}
+        """
+        stages = {}
+
+        # 1. 자막 수집 (병렬)
+        print(f"\n=== 배치 수집 시작: {len(entries)}개 영상 ===")
+        started_at = time.perf_counter()
+        transcripts = self.fetch_transcripts(entries)
+        stages['fetch'] = self._stage_report(
+            len(transcripts), time.perf_counter() - started_at, 'videos'
+        )
+
+        # 2. 세그먼트별 정제 (타임스탬프 계산용 위치 유지)
+        started_at = time.perf_counter()
+        buffers = {}
+        for i, transcript in transcripts.items():
+            video_id = self.youtube_processor.extract_video_id(entries[i]['video_url'])
+            buffers[i] = self.youtube_processor.build_transcript_buffer(transcript, video_id)
+        stages['clean'] = self._stage_report(
+            sum(len(buffer) for buffer in buffers.values()), time.perf_counter() - started_at, 'chars'
+        )
+
+        # 3. 분할 및 메타데이터 부착
+        started_at = time.perf_counter()
+        chunks_by_video: Dict[str, List[Dict]] = {}
+        for i in sorted(buffers):
+            chunks_by_video.setdefault(buffers[i].video_id, []).extend(
+                self.chunker.create_chunks_with_metadata(buffers[i], entries[i]['metadata'])
+            )
+        chunk_count = sum(len(chunks) for chunks in chunks_by_video.values())
+        stages['chunk'] = self._stage_report(
+            chunk_count, time.perf_counter() - started_at, 'chunks'
+        )
+
+        # 4. 임베딩 + 저장 (바뀐 청크만, 모든 영상을 한번에)
+        sync_stats = self.vector_store.sync_chunks(chunks_by_video)
+        stages['embed'] = self._stage_report(
+            sync_stats['added'], sync_stats['embed_seconds'], 'chunks'
+        )
+        stages['write'] = self._stage_report(
+            sync_stats['added'] + sync_stats['updated'] + sync_stats['deleted'],
+            sync_stats['write_seconds'],
+            'chunks'
+        )
+
+        report = {
+            'videos': len(transcripts),
+            'failed': len(entries) - len(transcripts),
+            'chunks': chunk_count,
+            'sync': sync_stats,
+            'stages': stages
+        }
+        self.print_report(report)
+        return report
+
+    @staticmethod
+    def print_report(report: Dict):
+        """단계별 처리량 출력"""
+        print("\n=== 배치 수집 결과 ===")
+        print(f"성공: {report['videos']}개 영상, 실패: {report['failed']}개, "
+              f"청크: {report['chunks']}개")
+        for name, stage in report['stages'].items():
+            rate = f"{stage['per_second']:.1f} {stage['unit']}/s" if stage['per_second'] else "-"
+            print(f"  {name:<6} {stage['items']:>8} {stage['unit']:<7} "
+                  f"{stage['seconds']:>7.2f}초  {rate}")
+        print("=====================\n")
+
+
+# 사용 예시 (로컬 자막 파일로 테스트)
+if __name__ == "__main__":
+    import tempfile
+    from data.youtube_processor import LocalTranscriptApi
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+
+        # 로컬 자막 파일 준비
+        for video_id in ["AAAAAAAAAAA", "BBBBBBBBBBB"]:
+            transcript = [
+                {"text": "2-1에서는 연패 전략을 가져가세요.", "start": 0.0, "duration": 3.0},
+                {"text": "3-2가 되면 레벨을 올리고 리롤을 고려하세요.", "start": 3.0, "duration": 4.0},
+            ]
+            (tmp_path / f"{video_id}.json").write_text(
+                json.dumps(transcript, ensure_ascii=False), encoding='utf-8'
+            )
+
+        manifest_path = tmp_path / "manifest.jsonl"
+        manifest_path.write_text(
+            "\n".join([
+                json.dumps({"video_url": "https://www.youtube.com/watch?v=AAAAAAAAAAA", "patch": "13.24"}),
+                json.dumps({"video_url": "https://www.youtube.com/watch?v=BBBBBBBBBBB", "patch": "13.23"}),
+            ]),
+            encoding='utf-8'
+        )
+
+        ingestor = BatchIngestor(
+            youtube_processor=YouTubeProcessor(api=LocalTranscriptApi(str(tmp_path))),
+            chunker=TFTChunker(chunk_size=config.CHUNK_SIZE, chunk_overlap=config.CHUNK_OVERLAP),
+            vector_store=TFTVectorStore(
+                collection_name="batch_ingest_demo",
+                persist_directory=str(tmp_path / "vector_db")
+            )
+        )
+        ingestor.run(load_manifest(str(manifest_path)))
@@ -0,0 +1,108 @@
+"""
+청크 메타데이터에서 계산하는 숫자 필드
+
+ChromaDB는 숫자 필드에 $gte/$lte 범위 필터를 걸 수 있으므로
+"3-2" 같은 문자열 대신 정수로도 저장해 둡니다.
+
+    game_stage "3-2" -> stage_ordinal 32, stage_number 3, phase "중반"
+    patch "13.24"    -> patch_num 1324
+    difficulty "초보" -> difficulty_rank 1
+"""
+
+from typing import Dict, List, Optional, Tuple
+import re
+
+import config
+
+
+_STAGE_PATTERN = re.compile(r'^\s*(\d)-(\d)\s*$')
+
+# 단계 번호 -> 게임 구간 (초반/크립 2-1, 중반 3-2, 후반 4-1 기준)
+PHASES = [
+    (2, '초반'),
+    (3, '중반'),
+    (99, '후반'),
+]
+
+# 난이도 -> 정수 (쉬운 순서)
+DIFFICULTY_RANKS = {'입문': 0, '초보': 1, '중급': 2, '고급': 3}
+
+# 메타데이터에서 다시 계산되는 필드 (마이그레이션 대상)
+DERIVED_FIELDS = ('stage_ordinal', 'stage_number', 'phase', 'patch_num', 'difficulty_rank')
+
+
+def stage_ordinal(stage: Optional[str]) -> Optional[int]:
+    """"3-2" -> 32 (stage * 10 + round), 형식이 다르면 None"""
+    match = _STAGE_PATTERN.match(stage or '')
+    if not match:
+        return None
+    return int(match.group(1)) * 10 + int(match.group(2))
+
+
+def patch_number(patch: Optional[str]) -> Optional[int]:
+    """"13.24" -> 1324 (major * 100 + minor), 형식이 다르면 None"""
+    try:
+        major, minor = str(patch).split('.')[:2]
+        return int(major) * 100 + int(minor)
+    except ValueError:
+        return None
+
+
+def difficulty_rank(difficulty: Optional[str]) -> Optional[int]:
+    """"입문"/"초보"/"중급"/"고급" -> 0~3, 모르는 값이면 None"""
+    return DIFFICULTY_RANKS.get(difficulty)
+
+
+def stage_phase(stage_number: int) -> str:
+    """단계 번호 -> 초반/중반/후반"""
+    for max_stage, phase in PHASES:
+        if stage_number <= max_stage:
+            return phase
+    return PHASES[-1][1]
+
+
+def stage_range(stage: str, rounds: int = 2) -> Optional[Tuple[int, int]]:
+    """
+    현재 라운드 앞뒤 rounds개 라운드의 stage_ordinal 범위
+
+    config.GAME_STAGES 순서 기준이라 단계가 바뀌는 구간도 이어집니다
+    (예: 3-1 ±2 -> 2-6 ~ 3-3 -> (26, 33)).
+    """
+    ordinal = stage_ordinal(stage)
+    if ordinal is None:
+        return None
+
+    stages: List[str] = config.GAME_STAGES
+    if stage not in stages:
+        return (ordinal - rounds, ordinal + rounds)
+
+    i = stages.index(stage)
+    low = stages[max(i - rounds, 0)]
+    high = stages[min(i + rounds, len(stages) - 1)]
+    return (stage_ordinal(low), stage_ordinal(high))
+
+
+def derive_features(metadata: Dict) -> Dict:
+    """
+    메타데이터에서 숫자 필드 계산 (계산할 수 없는 필드는 빠짐)
+
+    Returns:
+        {"stage_ordinal", "stage_number", "phase", "patch_num", "difficulty_rank"}
+    """
+    features = {}
+
+    ordinal = stage_ordinal(metadata.get('game_stage'))
+    if ordinal is not None:
+        features['stage_ordinal'] = ordinal
+        features['stage_number'] = ordinal // 10
+        features['phase'] = stage_phase(ordinal // 10)
+
+    patch_num = patch_number(metadata.get('patch'))
+    if patch_num is not None:
+        features['patch_num'] = patch_num
+
+    rank = difficulty_rank(metadata.get('difficulty'))
+    if rank is not None:
+        features['difficulty_rank'] = rank
+
+    return features
@@ -1,7 +1,78 @@
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List, Dict
-import re
+from collections import OrderedDict
+from typing import List, Dict, Optional, Union
+import hashlib
 from data.metadata_schema import StrategyMetadata
+from data.keyword_annotator import KeywordAnnotator, load_annotator
+from data.transcript_buffer import TranscriptBuffer
+from data.chunk_features import derive_features
+from rag.embedding import get_max_seq_length, get_tokenizer
+import config
+
+
+class TokenCounter:
+    """
+    임베딩 모델 tokenizer로 텍스트 길이(토큰 수) 측정
+
+    splitter는 같은 구간(단어, 구분자, 문장)의 길이를 여러 번 묻기 때문에
+    결과를 LRU로 캐시하고, prime()으로 여러 구간을 한 번에 배치 토큰화합니다.
+    """
+
+    def __init__(self, tokenizer, max_entries: int = 100_000):
+        """
+        Args:
+            tokenizer: HuggingFace fast tokenizer
+            max_entries: 캐시할 최대 구간 수
+        """
+        self.tokenizer = tokenizer
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+
+    def _store(self, text: str, count: int):
+        self._cache[text] = count
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def count(self, text: str) -> int:
+        """토큰 수 (특수 토큰 제외)"""
+        count = self._cache.get(text)
+        if count is not None:
+            self.hits += 1
+            self._cache.move_to_end(text)
+            return count
+
+        self.misses += 1
+        count = len(self.tokenizer(text, add_special_tokens=False)['input_ids'])
+        self._store(text, count)
+        return count
+
+    def prime(self, texts: List[str]) -> List[int]:
+        """
+        여러 구간을 한 번에 토큰화해서 캐시에 넣기
+
+        Returns:
+            texts 순서대로의 토큰 수
+        """
+        missing = list(dict.fromkeys(text for text in texts if text not in self._cache))
+        if missing:
+            self.misses += len(missing)
+            encoded = self.tokenizer(missing, add_special_tokens=False)['input_ids']
+            for text, ids in zip(missing, encoded):
+                self._store(text, len(ids))
+        self.hits += len(texts) - len(missing)
+        return [self._cache[text] for text in texts]
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
 
 
 class TFTChunker:
@@ -23,120 +94,218 @@ class TFTChunker:
         r'이거', r'이렇게',
     ]
     
-    def __init__(self, chunk_size: int = 400, chunk_overlap: int = 75):
+    # 분할 구분자 (앞에 있을수록 큰 단위)
+    SEPARATORS = [
+        "\n\n\n",  # 큰 문단
+        "\n\n",    # 문단
+        "\n",      # 줄
+        ". ",      # 문장
+        "! ",
+        "? ",
+        " ",       # 단어
+        ""
+    ]
+    
+    def __init__(
+        self,
+        chunk_size: int = 400,
+        chunk_overlap: int = 75,
+        annotator: Optional[KeywordAnnotator] = None,
+        length_unit: str = "chars",
+        tokenizer_name: Optional[str] = None
+    ):
         """
         Args:
-            chunk_size: 청크 크기 (토큰 수)
-            chunk_overlap: 청크 오버랩 (토큰 수)
-        """
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=[
-                "\n\n\n",  # 큰 문단
-                "\n\n",    # 문단
-                "\n",      # 줄
-                ". ",      # 문장
-                "! ",
-                "? ",
-                " ",       # 단어
-                ""
+            chunk_size: 청크 크기 (length_unit 기준)
+            chunk_overlap: 청크 오버랩 (length_unit 기준)
+            annotator: 키워드/개체 태거 (기본값: config.LEXICON_PATH 사전)
+            length_unit: "chars" (글자 수) 또는 "tokens" (임베딩 모델 tokenizer 기준)
+            tokenizer_name: length_unit="tokens"일 때 사용할 모델 이름 (기본값: config.EMBEDDING_MODEL)
+        """
+        if length_unit not in ("chars", "tokens"):
+            raise ValueError(f"지원하지 않는 length_unit: {length_unit}")
+        
+        self.annotator = annotator or load_annotator()
+        self.length_unit = length_unit
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer_name = tokenizer_name
+        self.token_counter: Optional[TokenCounter] = None
+        # tokenizer는 처음 분할할 때 로드 (질문만 처리하는 실행에서는 로드하지 않음)
+        self._splitter: Optional[RecursiveCharacterTextSplitter] = None
+    
+    def _load_token_counter(self):
+        """tokenizer 로드 후 chunk_size를 임베딩 모델 입력 길이 안으로 제한 (실패하면 글자 수 기준)"""
+        try:
+            model_name = self.tokenizer_name or config.EMBEDDING_MODEL
+            tokenizer = get_tokenizer(model_name)
+            max_seq_length = get_max_seq_length(model_name)
+        except (ImportError, OSError) as e:
+            print(f"[!] tokenizer 로드 실패, 글자 수 기준으로 분할합니다: {e}")
+            self.length_unit = "chars"
+            return
+        
+        self.token_counter = TokenCounter(tokenizer)
+        # 임베딩 모델이 잘라내지 않도록 모델 입력 길이(max_seq_length, 특수 토큰 포함) 안으로 제한
+        max_tokens = max_seq_length - tokenizer.num_special_tokens_to_add()
+        if self.chunk_size > max_tokens:
+            print(f"[!] chunk_size {self.chunk_size}가 모델 최대 길이보다 커서 {max_tokens}로 줄입니다.")
+            self.chunk_size = max_tokens
+            self.chunk_overlap = min(self.chunk_overlap, self.chunk_size // 4)
+    
+    @property
+    def splitter(self) -> RecursiveCharacterTextSplitter:
+        """텍스트 splitter (첫 사용 시 생성, 토큰 모드면 tokenizer도 이때 로드)"""
+        if self._splitter is None:
+            if self.length_unit == "tokens" and self.token_counter is None:
+                self._load_token_counter()
+            self._splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.chunk_overlap,
+                length_function=self.token_counter.count if self.token_counter else len,
+                # 토큰 모드에서는 구분자를 떼어서 나눠야 prime_token_counts와 같은 구간이 나옴
+                keep_separator=self.token_counter is None,
+                separators=self.SEPARATORS
+            )
+        return self._splitter
+    
+    def prime_token_counts(self, text: str):
+        """
+        splitter가 길이를 물어볼 구간들을 미리 배치 토큰화
+
+        RecursiveCharacterTextSplitter와 같은 순서로 구분자를 골라 나누고,
+        chunk_size보다 긴 구간만 다음 구분자로 다시 나눕니다.
+        """
+        if self.token_counter is None:
+            return
+        
+        self.token_counter.prime([sep for sep in self.SEPARATORS if sep])
+        pending = [(text, self.SEPARATORS)]
+        while pending:
+            groups = []
+            for piece, separators in pending:
+                for i, separator in enumerate(separators):
+                    if separator == "":
+                        break
+                    if separator in piece:
+                        groups.append((
+                            [split for split in piece.split(separator) if split],
+                            separators[i + 1:]
+                        ))
+                        break
+            
+            splits = [split for group, _ in groups for split in group]
+            counts = dict(zip(splits, self.token_counter.prime(splits)))
+            pending = [
+                (split, rest)
+                for group, rest in groups
+                for split in group
+                if counts[split] >= self.chunk_size
             ]
-        )
     
+    def split_text(self, text: str) -> List[str]:
+        """텍스트 분할 (토큰 모드면 토큰 수를 먼저 배치로 계산)"""
+        splitter = self.splitter
+        self.prime_token_counts(text)
+        return splitter.split_text(text)
+    
+    def annotate(self, text: str) -> Dict:
+        """
+        텍스트 한 번 훑어서 챔피언/시너지/아이템/전략 유형/게임 단계 감지
+
+        Returns:
+            {"key_champions", "synergies", "core_items", "strategy_type", "game_stage"}
+        """
+        return self.annotator.annotate(text)
+
     def detect_strategy_type(self, text: str) -> str:
         """텍스트에서 전략 유형 자동 감지"""
-        if '리롤' in text or '돌림' in text:
-            return '리롤'
-        elif '레벨' in text:
-            return '레벨링'
-        elif '연승' in text:
-            return '연승'
-        elif '연패' in text:
-            return '연패'
-        elif '전환' in text or '바꾸' in text:
-            return '전환'
-        elif '고정' in text or '유지' in text:
-            return '고정'
-        elif '아이템' in text:
-            return '아이템 판단'
-        else:
-            return '기물 선택'
+        return self.annotate(text)['strategy_type']
     
     def detect_game_stage(self, text: str) -> str:
-        """텍스트에서 게임 단계 자동 감지"""
-        # 2-1 형식의 라운드 찾기
-        round_pattern = r'\b([2-5])-([1-7])\b'
-        matches = re.findall(round_pattern, text)
-        
-        if matches:
-            # 가장 먼저 나온 라운드 반환
-            return f"{matches[0][0]}-{matches[0][1]}"
-        
-        # 라운드 표현이 없으면 키워드로 판단
-        if '초반' in text or '크립' in text:
-            return '2-1'
-        elif '중반' in text:
-            return '3-2'
-        elif '후반' in text:
-            return '4-1'
-        
-        return '2-1'  # 기본값
+        """텍스트에서 게임 단계 자동 감지 (라운드 표기 우선, 없으면 초반/중반/후반 키워드)"""
+        return self.annotate(text)['game_stage']
     
     def extract_champions(self, text: str) -> List[str]:
-        """텍스트에서 챔피언 이름 추출 (간단한 버전)"""
-        # 실제로는 롤체 챔피언 목록을 가지고 매칭해야 함
-        common_champions = [
-            '야스오', '요네', '제드', '아리', '세트', '케넨',
-            '볼리베어', '오공', '리산드라', '아지르', '킨드레드',
-            '진', '베인', '아펠리오스', '트위치', '카이사',
-            '나미', '소라카', '잔나', '럭스', '모르가나'
-        ]
-
-        found = []
-        for champ in common_champions:
-            if champ in text:
-                if champ not in found:  # 중복 방지
-                    found.append(champ)
-
-        return found
+        """텍스트에서 챔피언 이름 추출 (등장 순서, 줄임말은 정식 이름으로)"""
+        return self.annotate(text)['key_champions']
+    
+    @staticmethod
+    def make_chunk_id(video_key: str, text: str) -> str:
+        """
+        청크 ID 생성 (영상 키 + 내용 해시)
+        
+        같은 내용이면 항상 같은 ID가 나오므로 재처리해도 중복되지 않습니다.
+        영상 키는 영상 ID(없을 때만 video_source)라서 출처 라벨이 같은
+        다른 영상끼리 ID가 겹치지 않습니다.
+        """
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+        return f"{video_key}_{digest}"
     
     def create_chunks_with_metadata(
         self,
-        text: str,
+        text: Union[str, TranscriptBuffer],
         base_metadata: Dict
     ) -> List[Dict]:
         """
         텍스트를 청크로 분할하고 각 청크에 메타데이터 부착
         
         Args:
-            text: 정제된 텍스트
+            text: 정제된 텍스트 또는 TranscriptBuffer
+                (버퍼면 청크마다 span과 타임스탬프도 채움)
             base_metadata: 기본 메타데이터 (시즌, 패치, 출처 등)
             
         Returns:
             청크와 메타데이터 리스트
+            [{"id", "text", "metadata", "span": (start_offset, end_offset) 또는 None}, ...]
         """
+        buffer = text if isinstance(text, TranscriptBuffer) else None
+        if buffer is not None:
+            text = buffer.text
+        
         # 1. 텍스트 분할
-        chunks = self.splitter.split_text(text)
+        chunks = self.split_text(text)
+        spans = buffer.locate(chunks) if buffer is not None else [None] * len(chunks)
+        
+        # 청크 ID 키: 영상 ID를 알면 영상 ID, 모르면 출처 라벨
+        video_id = (buffer.video_id if buffer is not None else None) or base_metadata.get('video_id')
+        video_key = video_id or base_metadata.get('video_source', 'unknown')
         
         result = []
-        for i, chunk in enumerate(chunks):
+        seen_ids = set()
+        for chunk, span in zip(chunks, spans):
+            chunk_id = self.make_chunk_id(video_key, chunk)
+            if chunk_id in seen_ids:  # 같은 영상 안의 중복 청크
+                continue
+            seen_ids.add(chunk_id)
+            
             # 2. 각 청크에 대해 메타데이터 생성
             chunk_metadata = base_metadata.copy()
             
             # 자동 감지 (메타데이터에 없는 경우에만)
-            if 'strategy_type' not in chunk_metadata or not chunk_metadata['strategy_type']:
-                chunk_metadata['strategy_type'] = self.detect_strategy_type(chunk)
-            if 'game_stage' not in chunk_metadata or not chunk_metadata['game_stage']:
-                chunk_metadata['game_stage'] = self.detect_game_stage(chunk)
-            if 'key_champions' not in chunk_metadata or not chunk_metadata['key_champions']:
-                chunk_metadata['key_champions'] = self.extract_champions(chunk)
+            for key, value in self.annotate(chunk).items():
+                if key not in chunk_metadata or not chunk_metadata[key]:
+                    chunk_metadata[key] = value
+            
+            # 범위 필터용 숫자 필드 (stage_ordinal 등)
+            chunk_metadata.update(derive_features(chunk_metadata))
+            
+            # 영상 타임스탬프 (출처 링크용)
+            if span is not None:
+                seconds = buffer.span_seconds(*span)
+                if seconds is not None:
+                    chunk_metadata['timestamp'] = buffer.timestamp(*span)
+                    chunk_metadata['start_seconds'] = int(seconds[0])
+            
+            # 영상 ID (출처 링크 + 재수집 시 저장된 청크를 찾는 키)
+            if video_id:
+                chunk_metadata['video_id'] = video_id
             
             result.append({
-                'id': f"{base_metadata.get('video_source', 'unknown')}_{i}",
+                'id': chunk_id,
                 'text': chunk,
-                'metadata': chunk_metadata
+                'metadata': chunk_metadata,
+                'span': span
             })
         
         return result
@@ -159,6 +328,8 @@ class TFTChunker:
         all_chunks = []
         
         for video, metadata in zip(videos, base_metadata_list):
+            if video.get('video_id') and not metadata.get('video_id'):
+                metadata = {**metadata, 'video_id': video['video_id']}
             chunks = self.create_chunks_with_metadata(
                 video['text'],
                 metadata
@@ -200,4 +371,6 @@ if __name__ == "__main__":
         print(f"전략 유형: {chunk['metadata']['strategy_type']}")
         print(f"게임 단계: {chunk['metadata']['game_stage']}")
         print(f"챔피언: {chunk['metadata']['key_champions']}")
+        print(f"시너지: {chunk['metadata']['synergies']}")
+        print(f"아이템: {chunk['metadata']['core_items']}")
         print()
@@ -0,0 +1,250 @@
+"""
+사전(lexicon) 기반 키워드/개체 태거
+
+시즌별 사전 파일(data/lexicon/*.json)의 챔피언, 아이템, 시너지, 전략 키워드,
+게임 단계 표현을 하나의 Aho-Corasick 오토마톤으로 묶어서
+청크를 한 번만 훑고 key_champions / synergies / core_items /
+strategy_type / game_stage 를 한꺼번에 채웁니다.
+"""
+
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+
+import config
+
+
+# 한 글자 챔피언 등 짧은 이름 바로 뒤에 붙어도 되는 조사의 첫 글자 ("진이", "렐을", "바이는")
+JOSA_FIRST_CHARS = set('이가은는을를도와과의로으만랑에한까부보처')
+
+# 매칭 종류
+CHAMPION = 'champion'
+ITEM = 'item'
+SYNERGY = 'synergy'
+STRATEGY = 'strategy'
+STAGE_KEYWORD = 'stage_keyword'
+ROUND = 'round'
+
+# 겹치면 가장 긴 것 하나만 남기는 개체 종류 ("바이올렛" 안의 "바이" 제외)
+ENTITY_KINDS = (CHAMPION, ITEM, SYNERGY)
+
+
+def _is_hangul(char: str) -> bool:
+    return '가' <= char <= '힣'
+
+
+class AhoCorasick:
+    """
+    여러 패턴을 한 번에 찾는 Aho-Corasick 오토마톤
+
+    패턴마다 payload를 붙여 두면 find_all이 (시작, 끝, payload)를 돌려줍니다.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, object]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, payload: object):
+        """패턴 추가 (build 전에만 가능)"""
+        if self._built:
+            raise RuntimeError("build() 이후에는 패턴을 추가할 수 없습니다.")
+        if not pattern:
+            return
+
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((len(pattern), payload))
+
+    def build(self) -> "AhoCorasick":
+        """실패 링크 계산 (BFS)"""
+        # 루트 바로 아래 노드의 실패 링크는 루트
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+        return self
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """겹치는 것까지 모든 매칭 (시작, 끝, payload)"""
+        if not self._built:
+            self.build()
+
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, payload in output[node]:
+                yield i + 1 - length, i + 1, payload
+
+
+class KeywordAnnotator:
+    """
+    청크 자동 태깅
+
+    사전 파일 형식은 data/lexicon/season13.json 참고:
+        champions / items / synergies: 정식 이름 목록
+        champion_aliases / item_aliases: {줄임말: 정식 이름}
+        strict_boundary: 다른 단어 안에서는 매칭하지 않을 짧은 이름 ("진짜"의 "진")
+        strategy_types: 우선순위 순서의 [{"type", "keywords"}]
+        stage_keywords: 우선순위 순서의 [{"stage", "keywords"}]
+    """
+
+    def __init__(self, lexicon: Dict, rounds: Optional[List[str]] = None):
+        """
+        Args:
+            lexicon: 사전 dict
+            rounds: 라운드 표기 목록 (기본값: config.GAME_STAGES)
+        """
+        self.season = lexicon.get('season')
+        self.default_strategy_type = lexicon.get('default_strategy_type', '기물 선택')
+        self.default_game_stage = lexicon.get('default_game_stage', '2-1')
+        self.strict_boundary = {name.lower() for name in lexicon.get('strict_boundary', [])}
+
+        automaton = AhoCorasick()
+
+        for kind, names_key, aliases_key in [
+            (CHAMPION, 'champions', 'champion_aliases'),
+            (ITEM, 'items', 'item_aliases'),
+            (SYNERGY, 'synergies', None),
+        ]:
+            for name in lexicon.get(names_key, []):
+                automaton.add(name.lower(), (kind, name))
+            for alias, name in lexicon.get(aliases_key, {}).items() if aliases_key else []:
+                automaton.add(alias.lower(), (kind, name))
+
+        # 전략 유형/단계 키워드는 사전 순서가 곧 우선순위
+        for priority, rule in enumerate(lexicon.get('strategy_types', [])):
+            for keyword in rule['keywords']:
+                automaton.add(keyword.lower(), (STRATEGY, (priority, rule['type'])))
+        for priority, rule in enumerate(lexicon.get('stage_keywords', [])):
+            for keyword in rule['keywords']:
+                automaton.add(keyword.lower(), (STAGE_KEYWORD, (priority, rule['stage'])))
+
+        for round_name in rounds or config.GAME_STAGES:
+            automaton.add(round_name, (ROUND, round_name))
+
+        self.automaton = automaton.build()
+
+    @classmethod
+    def from_file(cls, path) -> "KeywordAnnotator":
+        """사전 파일에서 생성"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _is_boundary_ok(self, text: str, start: int, end: int, kind: str, pattern: str) -> bool:
+        """짧은 이름/라운드 표기가 다른 단어나 숫자의 일부가 아닌지 확인"""
+        before = text[start - 1] if start > 0 else ''
+        after = text[end] if end < len(text) else ''
+
+        if kind == ROUND:
+            # "12-14", "3-21" 등 제외 ("3-2에서"는 허용)
+            return not before.isdigit() and not after.isdigit()
+
+        if kind in ENTITY_KINDS and pattern in self.strict_boundary:
+            if before and (_is_hangul(before) or before.isalnum()):
+                return False
+            if after and (_is_hangul(after) or after.isalnum()):
+                return after in JOSA_FIRST_CHARS
+        return True
+
+    def find_matches(self, text: str) -> List[Tuple[int, int, str, object]]:
+        """
+        한 번 훑어서 모든 매칭 찾기
+
+        Returns:
+            [(시작, 끝, 종류, 값), ...] (시작 위치 순, 개체는 겹치면 가장 긴 것만)
+        """
+        lowered = text.lower()
+        entities = []
+        others = []
+        for start, end, (kind, value) in self.automaton.find_all(lowered):
+            if not self._is_boundary_ok(lowered, start, end, kind, lowered[start:end]):
+                continue
+            (entities if kind in ENTITY_KINDS else others).append((start, end, kind, value))
+
+        # 개체는 leftmost-longest로 겹침 제거
+        entities.sort(key=lambda match: (match[0], -(match[1] - match[0])))
+        kept = []
+        covered_until = 0
+        for match in entities:
+            if match[0] >= covered_until:
+                kept.append(match)
+                covered_until = match[1]
+
+        return sorted(kept + others, key=lambda match: match[0])
+
+    def annotate(self, text: str) -> Dict:
+        """
+        청크 메타데이터 자동 태깅
+
+        Returns:
+            {"key_champions", "synergies", "core_items", "strategy_type", "game_stage"}
+        """
+        found = {CHAMPION: [], ITEM: [], SYNERGY: []}
+        strategy = None
+        stage_keyword = None
+        first_round = None
+
+        for _, _, kind, value in self.find_matches(text):
+            if kind in found:
+                if value not in found[kind]:
+                    found[kind].append(value)
+            elif kind == STRATEGY:
+                if strategy is None or value[0] < strategy[0]:
+                    strategy = value
+            elif kind == STAGE_KEYWORD:
+                if stage_keyword is None or value[0] < stage_keyword[0]:
+                    stage_keyword = value
+            elif kind == ROUND and first_round is None:
+                first_round = value
+
+        if first_round is not None:
+            game_stage = first_round
+        elif stage_keyword is not None:
+            game_stage = stage_keyword[1]
+        else:
+            game_stage = self.default_game_stage
+
+        return {
+            'key_champions': found[CHAMPION],
+            'synergies': found[SYNERGY],
+            'core_items': found[ITEM],
+            'strategy_type': strategy[1] if strategy else self.default_strategy_type,
+            'game_stage': game_stage
+        }
+
+
+@lru_cache(maxsize=None)
+def _load_annotator(path: str) -> KeywordAnnotator:
+    return KeywordAnnotator.from_file(path)
+
+
+def load_annotator(path=None) -> KeywordAnnotator:
+    """
+    사전 파일별로 한 번만 오토마톤 생성 (프로세스 내 캐시)
+
+    Args:
+        path: 사전 파일 경로 (기본값: config.LEXICON_PATH)
+    """
+    return _load_annotator(str(Path(path or config.LEXICON_PATH).resolve()))
@@ -0,0 +1,335 @@
+"""
+단계별로 겹쳐서 실행되는 수집 파이프라인
+
+    자막 수집(N 스레드) → 병합/정제 → 분할/태깅 → 임베딩 배치 → ChromaDB 저장
+
+단계 사이는 크기가 제한된 큐로 연결되어 있어서 뒤 단계가 밀리면
+앞 단계가 자동으로 기다립니다 (backpressure). 네트워크 대기 중에도
+인코더가 계속 일할 수 있도록 임베딩과 자막 수집이 동시에 진행됩니다.
+"""
+
+from typing import List, Dict, Optional
+import queue
+import threading
+import time
+
+from data.youtube_processor import YouTubeProcessor
+from data.chunker import TFTChunker
+from data.batch_ingest import fetch_transcript_with_retry
+from rag.vector_store import TFTVectorStore
+import config
+
+
+# 단계 종료 신호
+_DONE = object()
+
+
+class StageStats:
+    """단계별 처리량/가동률 집계"""
+
+    def __init__(self, name: str, workers: int = 1):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items: int, seconds: float):
+        with self._lock:
+            self.items += items
+            self.busy_seconds += seconds
+
+    def report(self, wall_seconds: float) -> Dict:
+        """
+        Returns:
+            {"items", "busy_seconds", "utilization", "per_second"}
+            utilization = 실제 작업 시간 / (전체 시간 x 워커 수)
+        """
+        capacity = wall_seconds * self.workers
+        return {
+            'items': self.items,
+            'workers': self.workers,
+            'busy_seconds': self.busy_seconds,
+            'utilization': self.busy_seconds / capacity if capacity > 0 else 0.0,
+            'per_second': self.items / wall_seconds if wall_seconds > 0 else 0.0
+        }
+
+
+class IngestionPipeline:
+    """
+    파이프라인 수집기
+    - fetch: 자막 수집 (스레드 여러 개, 재시도 포함)
+    - clean: 자막 세그먼트별 정제 (TranscriptBuffer)
+    - chunk: 청크 분할, 메타데이터 태깅, 저장된 청크와 비교 (바뀐 청크만 다음 단계로)
+    - embed: 청크를 embed_batch_size개씩 모아서 임베딩
+    - write: ChromaDB에 저장, 영상의 새 청크가 모두 저장되면 그 영상의 메타데이터 갱신/삭제 반영
+    """
+
+    def __init__(
+        self,
+        youtube_processor: YouTubeProcessor,
+        chunker: TFTChunker,
+        vector_store: TFTVectorStore,
+        fetch_workers: int = 4,
+        queue_size: int = 8,
+        embed_batch_size: Optional[int] = None,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0
+    ):
+        """
+        Args:
+            youtube_processor: YouTubeProcessor 인스턴스
+            chunker: TFTChunker 인스턴스
+            vector_store: TFTVectorStore 인스턴스
+            fetch_workers: 자막 수집 스레드 수
+            queue_size: 단계 사이 큐의 최대 크기
+            embed_batch_size: 임베딩 배치 크기 (기본값: config.INGEST_BATCH_SIZE)
+            max_retries: 영상별 최대 재시도 횟수
+            backoff_seconds: 첫 재시도 대기 시간 (재시도마다 2배)
+        """
+        self.youtube_processor = youtube_processor
+        self.chunker = chunker
+        self.vector_store = vector_store
+        self.fetch_workers = fetch_workers
+        self.queue_size = queue_size
+        self.embed_batch_size = embed_batch_size or config.INGEST_BATCH_SIZE
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    def run(self, entries: List[Dict]) -> Dict:
+        """
+        파이프라인 실행
+
+        Args:
+            entries: load_manifest 결과 [{"video_url": ..., "metadata": {...}}, ...]
+
+        Returns:
+            {"videos", "failed", "failures", "chunks", "sync", "stages": {단계: 처리량/가동률}}
+            failures: [{"video_url", "stage", "error"}] (실패한 영상마다 한 번, 어느 단계에서든)
+        """
+        entry_queue = queue.Queue()
+        clean_queue = queue.Queue(maxsize=self.queue_size)
+        chunk_queue = queue.Queue(maxsize=self.queue_size)
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+
+        stats = {
+            'fetch': StageStats('fetch', self.fetch_workers),
+            'clean': StageStats('clean'),
+            'chunk': StageStats('chunk'),
+            'embed': StageStats('embed'),
+            'write': StageStats('write')
+        }
+        counters = {'chunks': 0, 'added': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        counters_lock = threading.Lock()
+        # id(매니페스트 항목) -> {"video_url", "stage", "error"} (영상마다 첫 실패만)
+        failed = {}
+
+        def record_failure(entry, stage, error):
+            with counters_lock:
+                if id(entry) in failed:
+                    return
+                failed[id(entry)] = {
+                    'video_url': entry['video_url'],
+                    'stage': stage,
+                    'error': str(error)
+                }
+            print(f"영상 처리 실패: {entry['video_url']} ({stage}: {error})")
+
+        for entry in entries:
+            entry_queue.put(entry)
+        for _ in range(self.fetch_workers):
+            entry_queue.put(_DONE)
+
+        active_fetchers = [self.fetch_workers]
+
+        def fetch_worker():
+            while True:
+                entry = entry_queue.get()
+                if entry is _DONE:
+                    break
+                started_at = time.perf_counter()
+                try:
+                    transcript = fetch_transcript_with_retry(
+                        self.youtube_processor,
+                        entry['video_url'],
+                        self.max_retries,
+                        self.backoff_seconds
+                    )
+                except Exception as e:
+                    record_failure(entry, 'fetch', e)
+                    continue
+                stats['fetch'].record(1, time.perf_counter() - started_at)
+                clean_queue.put((entry, transcript))
+
+            # 마지막 수집 스레드가 다음 단계에 종료 신호 전달
+            with counters_lock:
+                active_fetchers[0] -= 1
+                last = active_fetchers[0] == 0
+            if last:
+                clean_queue.put(_DONE)
+
+        def clean_worker():
+            while True:
+                item = clean_queue.get()
+                if item is _DONE:
+                    chunk_queue.put(_DONE)
+                    break
+                entry, transcript = item
+                started_at = time.perf_counter()
+                try:
+                    buffer = self.youtube_processor.build_transcript_buffer(
+                        transcript,
+                        self.youtube_processor.extract_video_id(entry['video_url'])
+                    )
+                except Exception as e:
+                    record_failure(entry, 'clean', e)
+                    continue
+                finally:
+                    stats['clean'].record(1, time.perf_counter() - started_at)
+                chunk_queue.put((entry, buffer))
+
+        def apply_changes(changes):
+            """영상 하나의 메타데이터 갱신/삭제 반영 (새 청크가 모두 저장된 뒤에만)"""
+            try:
+                self.vector_store.apply_metadata_changes(
+                    changes['update_ids'], changes['update_metadatas'], changes['delete_ids']
+                )
+            except Exception as e:
+                record_failure(changes['entry'], 'write', e)
+                return
+            with counters_lock:
+                counters['updated'] += len(changes['update_ids'])
+                counters['deleted'] += len(changes['delete_ids'])
+
+        def chunk_worker():
+            while True:
+                item = chunk_queue.get()
+                if item is _DONE:
+                    embed_queue.put(_DONE)
+                    break
+                entry, buffer = item
+                started_at = time.perf_counter()
+                try:
+                    chunks = self.chunker.create_chunks_with_metadata(buffer, entry['metadata'])
+                    # 저장된 청크와 비교: 새 청크만 임베딩
+                    diff = self.vector_store.diff_video_chunks(buffer.video_id, chunks)
+                except Exception as e:
+                    record_failure(entry, 'chunk', e)
+                    continue
+                finally:
+                    stats['chunk'].record(1, time.perf_counter() - started_at)
+
+                with counters_lock:
+                    counters['chunks'] += len(chunks)
+                    counters['unchanged'] += diff['unchanged']
+
+                # 갱신/삭제는 새 청크가 모두 저장된 뒤에 반영
+                # (임베딩/저장이 실패하면 예전 청크가 그대로 남음)
+                changes = {
+                    'entry': entry,
+                    'update_ids': diff['update_ids'],
+                    'update_metadatas': diff['update_metadatas'],
+                    'delete_ids': diff['delete_ids'],
+                    'remaining': len(diff['add'])
+                }
+                if diff['add']:
+                    embed_queue.put([(chunk, changes) for chunk in diff['add']])
+                else:
+                    apply_changes(changes)
+
+        def embed_worker():
+            buffer = []
+
+            def embed_batch(batch):
+                started_at = time.perf_counter()
+                try:
+                    embeddings = self.vector_store.embed_documents([chunk['text'] for chunk, _ in batch])
+                except Exception as e:
+                    for _, changes in batch:
+                        record_failure(changes['entry'], 'embed', e)
+                    return
+                stats['embed'].record(len(batch), time.perf_counter() - started_at)
+                write_queue.put((batch, embeddings))
+
+            while True:
+                item = embed_queue.get()
+                if item is _DONE:
+                    if buffer:
+                        embed_batch(buffer)
+                    write_queue.put(_DONE)
+                    break
+                buffer.extend(item)
+                while len(buffer) >= self.embed_batch_size:
+                    embed_batch(buffer[:self.embed_batch_size])
+                    buffer = buffer[self.embed_batch_size:]
+
+        def write_worker():
+            while True:
+                item = write_queue.get()
+                if item is _DONE:
+                    break
+                batch, embeddings = item
+                started_at = time.perf_counter()
+                try:
+                    self.vector_store.write_embedded_chunks([chunk for chunk, _ in batch], embeddings)
+                except Exception as e:
+                    for _, changes in batch:
+                        record_failure(changes['entry'], 'write', e)
+                    continue
+                stats['write'].record(len(batch), time.perf_counter() - started_at)
+                with counters_lock:
+                    counters['added'] += len(batch)
+
+                # 새 청크가 모두 저장된 영상만 갱신/삭제 반영
+                # (실패한 배치가 있으면 remaining이 0이 되지 않음)
+                for _, changes in batch:
+                    changes['remaining'] -= 1
+                    if changes['remaining'] == 0:
+                        apply_changes(changes)
+
+        print(f"\n=== 파이프라인 수집 시작: {len(entries)}개 영상 ===")
+        started_at = time.perf_counter()
+
+        threads = [threading.Thread(target=fetch_worker, name=f"fetch-{i}") for i in range(self.fetch_workers)]
+        threads += [
+            threading.Thread(target=clean_worker, name="clean"),
+            threading.Thread(target=chunk_worker, name="chunk"),
+            threading.Thread(target=embed_worker, name="embed"),
+            threading.Thread(target=write_worker, name="write"),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.vector_store.flush()
+
+        wall_seconds = time.perf_counter() - started_at
+        report = {
+            'videos': len(entries) - len(failed),
+            'failed': len(failed),
+            'failures': list(failed.values()),
+            'chunks': counters['chunks'],
+            'sync': {key: counters[key] for key in ('added', 'updated', 'deleted', 'unchanged')},
+            'wall_seconds': wall_seconds,
+            'stages': {name: stage.report(wall_seconds) for name, stage in stats.items()}
+        }
+        self.print_report(report)
+        return report
+
+    @staticmethod
+    def print_report(report: Dict):
+        """단계별 처리량과 가동률 출력"""
+        print("\n=== 파이프라인 수집 결과 ===")
+        print(f"성공: {report['videos']}개 영상, 실패: {report['failed']}개, "
+              f"청크: {report['chunks']}개 (전체 {report['wall_seconds']:.2f}초)")
+        for failure in report['failures']:
+            print(f"  실패 [{failure['stage']}] {failure['video_url']}: {failure['error']}")
+        sync = report['sync']
+        print(f"동기화: 추가 {sync['added']}개, 갱신 {sync['updated']}개, "
+              f"삭제 {sync['deleted']}개, 유지 {sync['unchanged']}개")
+        for name, stage in report['stages'].items():
+            print(f"  {name:<6} x{stage['workers']:<2} {stage['items']:>8}개  "
+                  f"{stage['per_second']:>8.1f}/s  가동률 {stage['utilization'] * 100:5.1f}%")
+        print("===========================\n")
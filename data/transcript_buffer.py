@@ -0,0 +1,115 @@
+from array import array
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def format_timestamp(seconds: float) -> str:
+    """초 -> "m:ss" (1시간이 넘어도 분으로 표기, 예: "75:03")"""
+    seconds = max(int(seconds), 0)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+class TranscriptBuffer:
+    """
+    정제된 자막 전체 텍스트 + 세그먼트 위치/시간 배열
+
+    청크는 텍스트 복사본 대신 (start_offset, end_offset) 구간으로 다루고,
+    구간이 걸친 세그먼트를 이진 탐색해서 "m:ss-m:ss" 타임스탬프를 만듭니다.
+
+    - text: 세그먼트별로 정제한 텍스트를 공백 하나로 이어붙인 버퍼
+    - offsets[i]: i번째 세그먼트가 text에서 시작하는 위치
+    - starts[i] / ends[i]: i번째 세그먼트의 시작/끝 시간 (초)
+    """
+
+    def __init__(
+        self,
+        text: str,
+        offsets: array,
+        starts: array,
+        ends: array,
+        video_id: Optional[str] = None
+    ):
+        self.text = text
+        self.offsets = offsets
+        self.starts = starts
+        self.ends = ends
+        self.video_id = video_id
+
+    @classmethod
+    def from_transcript(
+        cls,
+        transcript: List[Dict],
+        clean: Callable[[str], str],
+        video_id: Optional[str] = None
+    ) -> "TranscriptBuffer":
+        """
+        자막 리스트로 버퍼 생성 (세그먼트마다 정제, 정제 후 빈 세그먼트는 제외)
+
+        Args:
+            transcript: [{"text": "...", "start": 0.0, "duration": 2.5}, ...]
+            clean: 텍스트 정제 함수 (YouTubeProcessor.clean_text)
+            video_id: 유튜브 영상 ID (출처 링크용)
+        """
+        parts = []
+        offsets = array('q')
+        starts = array('d')
+        ends = array('d')
+        position = 0
+
+        for item in transcript:
+            cleaned = clean(item['text'])
+            if not cleaned:
+                continue
+            if parts:
+                position += 1  # 세그먼트 사이 공백
+            offsets.append(position)
+            starts.append(item['start'])
+            ends.append(item['start'] + item.get('duration', 0.0))
+            parts.append(cleaned)
+            position += len(cleaned)
+
+        return cls(' '.join(parts), offsets, starts, ends, video_id)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def view(self, start_offset: int, end_offset: int) -> str:
+        """구간 텍스트"""
+        return self.text[start_offset:end_offset]
+
+    def span_seconds(self, start_offset: int, end_offset: int) -> Optional[Tuple[float, float]]:
+        """구간이 걸친 세그먼트들의 (시작 시간, 끝 시간), 세그먼트가 없으면 None"""
+        if not self.offsets or end_offset <= start_offset:
+            return None
+
+        first = max(bisect_right(self.offsets, start_offset) - 1, 0)
+        last = max(bisect_right(self.offsets, end_offset - 1) - 1, first)
+        return self.starts[first], self.ends[last]
+
+    def timestamp(self, start_offset: int, end_offset: int) -> str:
+        """구간 -> "m:ss-m:ss" (알 수 없으면 빈 문자열)"""
+        seconds = self.span_seconds(start_offset, end_offset)
+        if seconds is None:
+            return ""
+        return f"{format_timestamp(seconds[0])}-{format_timestamp(seconds[1])}"
+
+    def locate(self, chunks: List[str]) -> List[Optional[Tuple[int, int]]]:
+        """
+        splitter가 만든 청크 문자열들의 버퍼 내 위치 찾기
+
+        청크는 순서대로 나오고 오버랩만큼 앞 청크와 겹치므로
+        직전 청크 시작 위치 다음부터 찾습니다.
+
+        Returns:
+            청크별 (start_offset, end_offset), 못 찾으면 None
+        """
+        spans = []
+        search_from = 0
+        for chunk in chunks:
+            start = self.text.find(chunk, search_from)
+            if start < 0:
+                spans.append(None)
+                continue
+            spans.append((start, start + len(chunk)))
+            search_from = start + 1
+        return spans
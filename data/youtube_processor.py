@@ -1,13 +1,134 @@
 from youtube_transcript_api import YouTubeTranscriptApi
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Callable
+from pathlib import Path
+import gzip
+import json
 import re
 
+from data.transcript_buffer import TranscriptBuffer
+import config
+
+
+# 잡담 패턴 규칙: (정규식, 단독 단어일 때만 제거할지)
+# 음/어/아 같은 감탄사는 단어 안에서는 지우지 않음 ("아이템", "먹어요", "음식" 보호)
+# 단어 안에서도 지우는 규칙은 첫 글자를 고정해 두면 (ㅋ+ 대신 ㅋㅋ*) 정규식 엔진이 빠르게 건너뜀
+NOISE_RULES = [
+    (r'음+', True),  # 음음음
+    (r'어+', True),  # 어어어
+    (r'아+', True),  # 아아아
+    (r'그+니까+', True),
+    (r'뭐+랄까+', True),
+    (r'\(웃음\)', False),
+    (r'\(박수\)', False),
+    (r'ㅋㅋ*', False),
+    (r'ㅎㅎ*', False),
+]
+
+
+def build_text_cleaner(rules: List[Tuple[str, bool]]) -> Callable[[str], str]:
+    """
+    잡담 제거 + 공백 정리 함수 생성 (정규식은 여기서 한 번만 컴파일)
+
+    - 단어 안에서도 지우는 규칙: 하나의 alternation 정규식으로 한 번에 제거
+    - 단독 단어 규칙: 공백 기준으로 나눈 단어가 규칙과 통째로 일치할 때만 제거
+      (뒤에 붙은 문장부호까지 포함), 공백 정리와 같은 패스에서 처리
+
+    Args:
+        rules: [(정규식, 단독 단어일 때만 제거할지), ...]
+    """
+    word_rules = [pattern for pattern, standalone in rules if standalone]
+    inline_rules = [pattern for pattern, standalone in rules if not standalone]
+
+    inline_pattern = re.compile('|'.join(inline_rules)) if inline_rules else None
+    word_match = (
+        re.compile('(?:' + '|'.join(word_rules) + r')[.,!?~…]*').fullmatch
+        if word_rules else None
+    )
+
+    def clean(text: str) -> str:
+        if inline_pattern is not None:
+            text = inline_pattern.sub('', text)
+        if word_match is None:
+            return ' '.join(text.split())
+        return ' '.join([word for word in text.split() if not word_match(word)])
+
+    return clean
+
+
+_clean_noise = build_text_cleaner(NOISE_RULES)
+
+
+class _LocalTranscriptItem:
+    """LocalTranscriptApi용 자막 한 줄"""
+
+    def __init__(self, text: str, start: float, duration: float):
+        self.text = text
+        self.start = start
+        self.duration = duration
+
+
+class _LocalTranscript:
+    """LocalTranscriptApi용 자막 (YouTubeTranscriptApi의 Transcript와 같은 모양)"""
+
+    def __init__(self, language_code: str, items: List[Dict]):
+        self.language_code = language_code
+        self.language = language_code
+        self._items = items
+
+    def fetch(self) -> List[_LocalTranscriptItem]:
+        return [
+            _LocalTranscriptItem(item['text'], item['start'], item['duration'])
+            for item in self._items
+        ]
+
+
+class LocalTranscriptApi:
+    """
+    로컬 JSON 파일로 YouTubeTranscriptApi를 대신하는 클래스 (테스트/오프라인용)
+
+    transcript_dir/{video_id}.json 형식:
+        [{"text": "...", "start": 0.0, "duration": 2.5}, ...]
+    또는 언어별로:
+        {"ko": [...], "en": [...]}
+    """
+
+    def __init__(self, transcript_dir: str):
+        self.transcript_dir = Path(transcript_dir)
+
+    def list(self, video_id: str) -> List[_LocalTranscript]:
+        path = self.transcript_dir / f"{video_id}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"로컬 자막 파일이 없습니다: {path}")
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        if isinstance(data, list):
+            data = {'ko': data}
+        return [_LocalTranscript(code, items) for code, items in data.items()]
+
 
 class YouTubeProcessor:
     """유튜브 영상에서 자막 추출 및 정제"""
 
-    def __init__(self):
-        self.api = YouTubeTranscriptApi()
+    def __init__(
+        self,
+        api=None,
+        cache_dir: Optional[str] = None,
+        use_cache: bool = True,
+        offline: bool = False
+    ):
+        """
+        Args:
+            api: 자막 API (기본값: YouTubeTranscriptApi, 테스트 시 LocalTranscriptApi)
+            cache_dir: 자막 캐시 경로 (기본값: config.TRANSCRIPT_CACHE_DIR)
+            use_cache: 자막 캐시 사용 여부
+            offline: True면 네트워크 없이 캐시에서만 자막을 읽음
+        """
+        self.api = api or YouTubeTranscriptApi()
+        self.use_cache = use_cache or offline
+        self.offline = offline
+        self.cache_dir = Path(cache_dir or config.TRANSCRIPT_CACHE_DIR)
 
     @staticmethod
     def extract_video_id(url: str) -> str:
@@ -25,9 +146,62 @@ class YouTubeProcessor:
 
         raise ValueError(f"유효하지 않은 유튜브 URL: {url}")
 
+    def _cache_path(self, video_id: str, language: str) -> Path:
+        return self.cache_dir / f"{video_id}.{language}.json.gz"
+
+    def load_cached_transcript(self, video_id: str, language: str = 'ko') -> Optional[List[Dict]]:
+        """캐시된 원본 자막 읽기 (없으면 None)"""
+        path = self._cache_path(video_id, language)
+        if not path.exists():
+            return None
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+
+        # 컬럼 형식으로 저장된 자막을 다시 세그먼트 리스트로 변환
+        return [
+            {"text": text, "start": start, "duration": duration}
+            for text, start, duration in zip(data['text'], data['start'], data['duration'])
+        ]
+
+    def save_cached_transcript(self, video_id: str, language: str, transcript: List[Dict]):
+        """원본 자막을 압축된 컬럼 형식(json.gz)으로 저장"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data = {
+            'video_id': video_id,
+            'language': language,
+            'text': [item['text'] for item in transcript],
+            'start': [item['start'] for item in transcript],
+            'duration': [item['duration'] for item in transcript]
+        }
+
+        path = self._cache_path(video_id, language)
+        tmp_path = path.with_suffix('.tmp')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        tmp_path.replace(path)
+
+    def cached_languages(self, video_id: str) -> List[str]:
+        """캐시에 있는 자막 언어 목록"""
+        prefix = f"{video_id}."
+        return sorted(
+            path.name[len(prefix):-len('.json.gz')]
+            for path in self.cache_dir.glob(f"{video_id}.*.json.gz")
+        )
+
+    @staticmethod
+    def _language_preference(codes: List[str], language: str) -> List[str]:
+        """언어 우선순위 (요청 언어 -> 영어 -> 나머지 순서대로)"""
+        preferred = [code for code in (language, 'en') if code in codes]
+        return list(dict.fromkeys(preferred + list(codes)))
+
     def get_transcript(self, video_id: str, language: str = 'ko') -> List[Dict]:
         """
-        유튜브 자막 가져오기 (새 API 버전 1.2.x)
+        자막 가져오기 (캐시 우선, 없으면 유튜브에서 받아서 캐시에 저장)
+
+        요청 언어 자막이 없으면 영어, 그다음 아무 언어 자막을 씁니다.
+        캐시는 실제로 받은 언어로 저장하므로 ({video_id}.en.json.gz 등),
+        나중에 요청 언어 자막이 생기면 온라인 모드에서 새로 받습니다.
 
         Args:
             video_id: 유튜브 영상 ID
@@ -36,35 +210,69 @@ class YouTubeProcessor:
         Returns:
             자막 리스트 [{"text": "...", "start": 0.0, "duration": 2.5}, ...]
         """
+        cached_languages = []
+        if self.use_cache:
+            cached = self.load_cached_transcript(video_id, language)
+            if cached is not None:
+                print(f"캐시된 자막 사용: {video_id} ({language})")
+                return cached
+            cached_languages = self.cached_languages(video_id)
+
+        if self.offline:
+            for code in self._language_preference(cached_languages, language):
+                print(f"캐시된 자막 사용: {video_id} ({code}, {language} 자막 없음)")
+                return self.load_cached_transcript(video_id, code)
+            raise Exception(f"오프라인 모드: 캐시된 자막이 없습니다 ({video_id}, {language})")
+
+        transcript, code = self._fetch_transcript(video_id, language, cached_languages)
+
+        if self.use_cache and code not in cached_languages:
+            self.save_cached_transcript(video_id, code, transcript)
+
+        return transcript
+
+    def _fetch_transcript(
+        self,
+        video_id: str,
+        language: str = 'ko',
+        cached_languages: Optional[List[str]] = None
+    ) -> Tuple[List[Dict], str]:
+        """
+        유튜브 자막 가져오기 (새 API 버전 1.2.x)
+
+        Args:
+            video_id: 유튜브 영상 ID
+            language: 자막 언어 (기본값: 'ko')
+            cached_languages: 캐시에 있는 언어 (대체 언어가 캐시에 있으면 다시 받지 않음)
+
+        Returns:
+            (자막 리스트 [{"text": "...", "start": 0.0, "duration": 2.5}, ...], 실제 언어 코드)
+        """
+        cached_languages = cached_languages or []
         try:
             # 사용 가능한 자막 목록 확인
-            transcript_list = self.api.list(video_id)
+            transcripts = {transcript.language_code: transcript for transcript in self.api.list(video_id)}
 
-            # 한국어 자막 우선 시도
-            for transcript in transcript_list:
-                if transcript.language_code == language:
-                    print(f"{transcript.language} 자막 추출 중...")
-                    result = transcript.fetch()
-                    print(f"{transcript.language} 자막 추출 성공")
-                    return [{"text": item.text, "start": item.start, "duration": item.duration} for item in result]
+            # 한국어 우선, 없으면 영어, 그다음 아무 자막이나
+            for code in self._language_preference(list(transcripts), language):
+                if code != language and code in cached_languages:
+                    print(f"캐시된 자막 사용: {video_id} ({code}, {language} 자막 없음)")
+                    return self.load_cached_transcript(video_id, code), code
 
-            # 한국어가 없으면 영어 시도
-            for transcript in transcript_list:
-                if transcript.language_code == 'en':
-                    print(f"{transcript.language} 자막 추출 중...")
-                    result = transcript.fetch()
-                    print(f"{transcript.language} 자막 추출 성공 (번역 권장)")
-                    return [{"text": item.text, "start": item.start, "duration": item.duration} for item in result]
-
-            # 아무 자막이나 가져오기
-            for transcript in transcript_list:
+                transcript = transcripts[code]
                 try:
                     print(f"{transcript.language} 자막 추출 중...")
                     result = transcript.fetch()
-                    print(f"{transcript.language} 자막 추출 성공")
-                    return [{"text": item.text, "start": item.start, "duration": item.duration} for item in result]
                 except Exception:
+                    if code == language:
+                        raise
                     continue
+                note = " (번역 권장)" if code == 'en' and language != 'en' else ""
+                print(f"{transcript.language} 자막 추출 성공{note}")
+                return [
+                    {"text": item.text, "start": item.start, "duration": item.duration}
+                    for item in result
+                ], code
 
             raise Exception("사용 가능한 자막이 없습니다.")
 
@@ -74,32 +282,11 @@ class YouTubeProcessor:
     @staticmethod
     def clean_text(text: str) -> str:
         """
-        텍스트 정제
-        - 잡담 표현 제거
-        - 불필요한 시간 표현 제거
-        - 구어체 정리
-        """
-        # 잡담 패턴
-        noise_patterns = [
-            r'음+',  # 음음음
-            r'어+',  # 어어어
-            r'아+',  # 아아아
-            r'그+니까+',
-            r'뭐+랄까+',
-            r'\(웃음\)',
-            r'\(박수\)',
-            r'ㅋ+',
-            r'ㅎ+',
-        ]
-
-        cleaned = text
-        for pattern in noise_patterns:
-            cleaned = re.sub(pattern, '', cleaned)
-
-        # 중복 공백 제거
-        cleaned = re.sub(r'\s+', ' ', cleaned)
-
-        return cleaned.strip()
+        텍스트 정제 (미리 컴파일된 정규식 한 번으로 처리)
+        - 잡담 표현 제거 (NOISE_RULES)
+        - 중복 공백 제거
+        """
+        return _clean_noise(text)
 
     @staticmethod
     def merge_transcript(transcript: List[Dict], time_threshold: float = 10.0) -> str:
@@ -134,15 +321,28 @@ class YouTubeProcessor:
 
         return '\n\n'.join(merged_text)
 
-    def process_video(self, video_url: str) -> str:
+    def build_transcript_buffer(
+        self,
+        transcript: List[Dict],
+        video_id: Optional[str] = None
+    ) -> TranscriptBuffer:
         """
-        유튜브 영상 전체 처리 파이프라인
+        자막을 세그먼트별로 정제해서 TranscriptBuffer로 만들기
+
+        merge_transcript + clean_text와 같은 텍스트가 나오지만
+        세그먼트 위치/시간이 남아서 청크 타임스탬프를 계산할 수 있습니다.
+        """
+        return TranscriptBuffer.from_transcript(transcript, self.clean_text, video_id)
+
+    def process_video_buffer(self, video_url: str) -> TranscriptBuffer:
+        """
+        유튜브 영상 전체 처리 파이프라인 (타임스탬프 포함)
 
         Args:
             video_url: 유튜브 URL
 
         Returns:
-            정제된 텍스트
+            정제된 TranscriptBuffer
         """
         # 1. Video ID 추출
         video_id = self.extract_video_id(video_url)
@@ -152,14 +352,23 @@ class YouTubeProcessor:
         transcript = self.get_transcript(video_id)
         print(f"자막 {len(transcript)}개 추출 완료")
 
-        # 3. 자막 병합
-        merged_text = self.merge_transcript(transcript)
+        # 3. 세그먼트별 정제 후 병합
+        buffer = self.build_transcript_buffer(transcript, video_id)
+        print(f"정제 완료: {len(buffer)} 글자")
 
-        # 4. 텍스트 정제
-        cleaned_text = self.clean_text(merged_text)
-        print(f"정제 완료: {len(cleaned_text)} 글자")
+        return buffer
 
-        return cleaned_text
+    def process_video(self, video_url: str) -> str:
+        """
+        유튜브 영상 전체 처리 파이프라인
+
+        Args:
+            video_url: 유튜브 URL
+
+        Returns:
+            정제된 텍스트
+        """
+        return self.process_video_buffer(video_url).text
 
 
 # 사용 예시
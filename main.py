@@ -10,17 +10,30 @@
 
 3. 대화형 모드:
    python main.py --mode interactive
+
+4. 여러 영상 배치 처리:
+   python main.py --mode batch --manifest videos.jsonl --workers 4
+   python main.py --mode batch --manifest videos.jsonl --pipeline --embed_workers 4  # 임베딩을 코어에 나눠서
+
+5. 기존 컬렉션에 새 메타데이터 필드 채우기 (stage_ordinal 등):
+   python main.py --mode migrate
+
+6. HTTP 서비스 (질문 + 게임 상태 JSON, 답변 스트리밍):
+   python main.py --mode serve --port 8000
 """
 
 import argparse
 from pathlib import Path
 import json
 
-from data.youtube_processor import YouTubeProcessor
+from data.youtube_processor import YouTubeProcessor, LocalTranscriptApi
 from data.chunker import TFTChunker
+from data.batch_ingest import BatchIngestor, load_manifest, default_metadata
+from data.pipeline import IngestionPipeline
 from rag.vector_store import TFTVectorStore
 from rag.retriever import TFTRetriever
 from rag.generator import TFTGenerator
+from rag.answer_cache import SemanticAnswerCache
 from data.metadata_schema import GameState
 import config
 
@@ -33,22 +46,52 @@ class TFTRAGSystem:
         print("=== 롤체 RAG 시스템 초기화 ===")
         
         # 모듈 초기화
-        self.youtube_processor = YouTubeProcessor()
+        self.youtube_processor = YouTubeProcessor(
+            cache_dir=str(config.TRANSCRIPT_CACHE_DIR),
+            use_cache=config.USE_TRANSCRIPT_CACHE,
+            offline=config.TRANSCRIPT_OFFLINE
+        )
         self.chunker = TFTChunker(
             chunk_size=config.CHUNK_SIZE,
-            chunk_overlap=config.CHUNK_OVERLAP
+            chunk_overlap=config.CHUNK_OVERLAP,
+            length_unit=config.CHUNK_LENGTH_UNIT,
+            tokenizer_name=config.EMBEDDING_MODEL
         )
         self.vector_store = TFTVectorStore(
             collection_name=config.COLLECTION_NAME,
             persist_directory=str(config.VECTOR_DB_DIR),
-            embedding_model=config.EMBEDDING_MODEL
+            embedding_model=config.EMBEDDING_MODEL,
+            use_embedding_cache=config.USE_EMBEDDING_CACHE,
+            embedding_cache_dir=str(config.EMBEDDING_CACHE_DIR),
+            query_cache_size=config.QUERY_CACHE_SIZE,
+            query_cache_ttl=config.QUERY_CACHE_TTL,
+            use_lexical_index=config.USE_LEXICAL_INDEX,
+            backend=config.VECTOR_BACKEND,
+            index_dtype=config.VECTOR_INDEX_DTYPE,
+            quantization=config.VECTOR_QUANTIZATION,
+            rescore_factor=config.QUANTIZATION_RESCORE_FACTOR,
+            embedding_backend=config.EMBEDDING_BACKEND,
+            embedding_model_path=str(config.ONNX_MODEL_PATH),
+            embedding_threads=config.EMBEDDING_THREADS,
+            embedding_workers=config.EMBEDDING_WORKERS
         )
         self.retriever = TFTRetriever(
             vector_store=self.vector_store,
             top_k=config.TOP_K,
-            rerank_top_k=config.RERANK_TOP_K
+            rerank_top_k=config.RERANK_TOP_K,
+            lexical_top_k=config.LEXICAL_TOP_K,
+            rrf_k=config.RRF_K,
+            stage_range_rounds=config.STAGE_RANGE_ROUNDS,
+            rerank_weights=config.RERANK_WEIGHTS
         )
         
+        self.answer_cache = None
+        if config.ANSWER_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache(
+                similarity_threshold=config.ANSWER_CACHE_THRESHOLD,
+                max_entries=config.ANSWER_CACHE_SIZE
+            )
+        
         # Generator는 API 키가 있을 때만 초기화
         try:
             self.generator = TFTGenerator()
@@ -77,28 +120,67 @@ class TFTRAGSystem:
         print(f"\n=== 영상 처리 시작 ===")
         print(f"URL: {video_url}")
         
-        # 1. 자막 추출 및 정제
+        # 1. 자막 추출 및 정제 (세그먼트 시간 유지)
         try:
-            text = self.youtube_processor.process_video(video_url)
+            buffer = self.youtube_processor.process_video_buffer(video_url)
         except Exception as e:
             print(f"영상 처리 실패: {e}")
             return 0
         
-        # 2. Chunking
-        chunks = self.chunker.create_chunks_with_metadata(text, metadata)
+        # 2. Chunking (청크마다 타임스탬프 부착)
+        chunks = self.chunker.create_chunks_with_metadata(buffer, metadata)
         print(f"생성된 청크: {len(chunks)}개")
         
-        # 3. Vector Store에 추가
-        self.vector_store.add_chunks(chunks)
+        # 3. Vector Store에 반영 (바뀐 청크만 임베딩, 사라진 청크는 삭제)
+        self.vector_store.sync_video_chunks(buffer.video_id, chunks)
         
         print("=== 영상 처리 완료 ===\n")
         return len(chunks)
     
+    def process_batch(
+        self,
+        entries: list,
+        max_workers: int = 4,
+        pipelined: bool = False
+    ) -> dict:
+        """
+        여러 영상을 한번에 처리 (자막 병렬 수집 + 청크 일괄 임베딩)
+        
+        Args:
+            entries: load_manifest 결과 [{"video_url": ..., "metadata": {...}}, ...]
+            max_workers: 자막 수집 동시 실행 수
+            pipelined: True면 수집/정제/분할/임베딩/저장 단계를 겹쳐서 실행
+            
+        Returns:
+            단계별 처리량 리포트
+        """
+        try:
+            if pipelined:
+                pipeline = IngestionPipeline(
+                    youtube_processor=self.youtube_processor,
+                    chunker=self.chunker,
+                    vector_store=self.vector_store,
+                    fetch_workers=max_workers
+                )
+                return pipeline.run(entries)
+            
+            ingestor = BatchIngestor(
+                youtube_processor=self.youtube_processor,
+                chunker=self.chunker,
+                vector_store=self.vector_store,
+                max_workers=max_workers
+            )
+            return ingestor.run(entries)
+        finally:
+            # 임베딩 워커 풀을 썼다면 모델 메모리 반환
+            self.vector_store.shutdown_embedding_pool()
+    
     def query(
         self,
         question: str,
         game_state: GameState = None,
-        show_sources: bool = True
+        show_sources: bool = True,
+        on_token=None
     ) -> dict:
         """
         질문에 답변
@@ -107,12 +189,15 @@ class TFTRAGSystem:
             question: 사용자 질문
             game_state: 게임 상태 (선택)
             show_sources: 출처 정보 표시 여부
+            on_token: 지정하면 답변을 스트리밍하면서 토큰마다 호출할 콜백
             
         Returns:
             {
                 "answer": "답변",
                 "sources": [...],
-                "retrieved_chunks": [...]
+                "retrieved_chunks": [...],
+                "generation_stats": {...},  # 첫 토큰 지연, tokens/sec
+                "cached": True  # 답변 캐시 적중 시에만
             }
         """
         print(f"\n=== 질문 처리 ===")
@@ -124,33 +209,101 @@ class TFTRAGSystem:
             game_state=game_state
         )
         
+        # 2. 컨텍스트 + 답변 캐시 확인
+        prepared = self.prepare_answer(question, game_state, results)
+        if prepared["response"] is not None:
+            if on_token and prepared["response"].get("cached"):
+                on_token(prepared["response"]["answer"])
+            return prepared["response"]
+        
+        # 3. 답변 생성
+        response_data = self.generator.generate_with_sources(
+            question=question,
+            context=prepared["context"],
+            search_results=results,
+            game_state=game_state,
+            on_token=on_token
+        )
+        return self.finish_answer(question, game_state, prepared, response_data)
+    
+    def prepare_answer(self, question: str, game_state: GameState, results: list) -> dict:
+        """
+        검색 결과로 답변 생성 준비 (검색과 생성 사이 단계, HTTP 서버와 공유)
+        
+        Returns:
+            {
+                "response": 생성 없이 바로 돌려줄 응답 (결과 없음/캐시 적중/생성기 없음) 또는 None,
+                "context": 프롬프트 컨텍스트,
+                "results": 검색 결과,
+                "chunk_ids": [...], "question_embedding": 답변 캐시 키
+            }
+        """
+        prepared = {
+            "response": None,
+            "context": None,
+            "results": results,
+            "chunk_ids": [result['id'] for result in results],
+            "question_embedding": None
+        }
+        
         if not results:
-            return {
+            prepared["response"] = {
                 "answer": "죄송합니다. 관련된 전략을 찾을 수 없습니다. 다른 방식으로 질문해주시겠어요?",
                 "sources": [],
                 "retrieved_chunks": []
             }
+            return prepared
         
-        # 2. 컨텍스트 포맷팅
+        # 컨텍스트 포맷팅
         context = self.retriever.format_context(results)
+        prepared["context"] = context
         
-        # 3. 답변 생성
-        if self.generator:
-            response_data = self.generator.generate_with_sources(
-                question=question,
-                context=context,
-                search_results=results,
-                game_state=game_state
-            )
-        else:
+        if not self.generator:
             # API 키 없으면 검색 결과만 반환
-            response_data = {
+            prepared["response"] = {
                 "answer": "⚠ Claude API 키가 설정되지 않아 검색 결과만 제공합니다.\n\n" + context,
-                "sources": []
+                "sources": [],
+                "retrieved_chunks": results
             }
+            return prepared
+        
+        # 답변 캐시 확인 (비슷한 질문 + 같은 검색 결과)
+        if self.answer_cache is not None:
+            question_embedding = self.vector_store.embed_query(question)
+            prepared["question_embedding"] = question_embedding
+            cached = self.answer_cache.lookup(
+                question_embedding,
+                game_state,
+                prepared["chunk_ids"],
+                self.vector_store.revision
+            )
+            if cached is not None:
+                print("=== 답변 캐시 적중 ===")
+                cached["cached"] = True
+                cached["generation_stats"] = None
+                cached["retrieved_chunks"] = results
+                prepared["response"] = cached
         
-        response_data["retrieved_chunks"] = results
+        return prepared
+    
+    def finish_answer(self, question: str, game_state: GameState, prepared: dict, response_data: dict) -> dict:
+        """생성된 답변을 캐시에 저장하고 검색 결과를 붙여서 반환"""
+        # 정상 생성된 답변만 캐시 (첫 토큰이 없거나 중간에 오류가 나면 오류 문구가 섞인 응답)
+        stats = response_data.get("generation_stats") or {}
+        if (
+            self.answer_cache is not None
+            and stats.get("time_to_first_token") is not None
+            and not stats.get("error")
+        ):
+            self.answer_cache.store(
+                prepared["question_embedding"],
+                game_state,
+                prepared["chunk_ids"],
+                self.vector_store.revision,
+                response_data
+            )
         
+        response_data["retrieved_chunks"] = prepared["results"]
         return response_data
     
     def interactive_mode(self):
@@ -198,17 +351,35 @@ class TFTRAGSystem:
                 if game_state:
                     game_state.question = question
                 
-                # 답변 생성
+                # 답변 생성 (토큰이 나오는 대로 출력)
+                streamed = []
+                
+                def print_token(token: str):
+                    if not streamed:
+                        print("\n" + "-"*50)
+                        print("답변:")
+                        print("-"*50)
+                    streamed.append(token)
+                    print(token, end="", flush=True)
+                
                 response = self.query(
                     question=question,
                     game_state=game_state,
-                    show_sources=True
+                    show_sources=True,
+                    on_token=print_token
                 )
                 
-                print("\n" + "-"*50)
-                print("답변:")
-                print("-"*50)
-                print(response["answer"])
+                if streamed:
+                    print()
+                    if response.get("cached"):
+                        print("(캐시된 답변)")
+                    else:
+                        print(f"({TFTGenerator.format_generation_stats(response.get('generation_stats'))})")
+                else:
+                    print("\n" + "-"*50)
+                    print("답변:")
+                    print("-"*50)
+                    print(response["answer"])
                 
                 if response.get("sources"):
                     print("\n" + "-"*50)
@@ -216,6 +387,8 @@ class TFTRAGSystem:
                     print("-"*50)
                     for i, source in enumerate(response["sources"], 1):
                         print(f"{i}. {source['video_source']} ({source['timestamp']})")
+                        if source.get('url'):
+                            print(f"   {source['url']}")
                         print(f"   단계: {source['game_stage']}, 전략: {source['strategy_type']}")
                 
             except KeyboardInterrupt:
@@ -231,6 +404,23 @@ class TFTRAGSystem:
         print(f"컬렉션: {stats['collection_name']}")
         print(f"저장된 전략 청크: {stats['total_chunks']}개")
         print(f"저장 경로: {stats['persist_directory']}")
+        print(f"저장 백엔드: {stats['backend']}")
+        print(f"임베딩 백엔드: {stats['embedding_backend']}")
+        if 'numpy_index' in stats:
+            index_stats = stats['numpy_index']
+            print(f"NumPy 인덱스: {index_stats['dtype']} {index_stats['dim']}차원, "
+                  f"행렬 {index_stats['vector_bytes'] / 1024 / 1024:.1f}MB")
+            if index_stats['quantization']:
+                print(f"양자화 사본: {index_stats['quantization']} "
+                      f"{index_stats['quantized_bytes'] / 1024 / 1024:.1f}MB (메모리)")
+        if 'embedding_cache' in stats:
+            cache_stats = stats['embedding_cache']
+            print(f"임베딩 캐시: {cache_stats['entries']}개 "
+                  f"(적중 {cache_stats['hits']} / 미스 {cache_stats['misses']})")
+        if 'lexical_index' in stats:
+            index_stats = stats['lexical_index']
+            print(f"BM25 역색인: 문서 {index_stats['documents']}개, "
+                  f"토큰 {index_stats['vocabulary']}개, posting {index_stats['postings']}개")
         print("==================\n")
 
 
@@ -238,7 +428,7 @@ def main():
     parser = argparse.ArgumentParser(description="롤체 RAG 시스템")
     parser.add_argument(
         "--mode",
-        choices=["process", "query", "interactive", "stats"],
+        choices=["process", "batch", "query", "interactive", "stats", "migrate", "serve"],
         required=True,
         help="실행 모드"
     )
@@ -254,12 +444,58 @@ def main():
         "--question",
         help="질문 (query 모드)"
     )
+    parser.add_argument(
+        "--manifest",
+        help="영상 목록 JSON/JSONL 파일 (batch 모드)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="자막 수집 동시 실행 수 (batch 모드)"
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="단계별 파이프라인으로 처리 (batch 모드, 대량 수집용)"
+    )
+    parser.add_argument(
+        "--embed_workers",
+        type=int,
+        help="임베딩 워커 프로세스 수 (batch 모드, 기본값: config.EMBEDDING_WORKERS)"
+    )
+    parser.add_argument(
+        "--host",
+        default=config.SERVE_HOST,
+        help="바인드 주소 (serve 모드)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=config.SERVE_PORT,
+        help="포트 (serve 모드)"
+    )
+    parser.add_argument(
+        "--transcript_dir",
+        help="유튜브 대신 로컬 자막 JSON 파일을 읽을 경로 (테스트용)"
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="캐시된 자막만 사용 (네트워크 요청 없음)"
+    )
     
     args = parser.parse_args()
     
     # 시스템 초기화
     system = TFTRAGSystem()
     
+    if args.transcript_dir:
+        system.youtube_processor.api = LocalTranscriptApi(args.transcript_dir)
+    if args.offline:
+        system.youtube_processor.offline = True
+        system.youtube_processor.use_cache = True
+    
     if args.mode == "process":
         # 영상 처리 모드
         if not args.video_url:
@@ -274,34 +510,48 @@ def main():
             except FileNotFoundError:
                 print(f"경고: 메타데이터 파일 '{args.metadata_file}'을 찾을 수 없습니다.")
                 print("기본 메타데이터를 사용합니다.")
-                metadata = {
-                    'season': config.CURRENT_SEASON,
-                    'patch': config.CURRENT_PATCH,
-                    'video_source': args.video_url.split('=')[-1] if '=' in args.video_url else 'unknown',
-                    'composition_name': '미정',
-                    'difficulty': '초보'
-                }
+                metadata = default_metadata(args.video_url)
         else:
             # 기본 메타데이터
-            metadata = {
-                'season': config.CURRENT_SEASON,
-                'patch': config.CURRENT_PATCH,
-                'video_source': args.video_url.split('=')[-1] if '=' in args.video_url else 'unknown',
-                'composition_name': '미정',
-                'difficulty': '초보'
-            }
+            metadata = default_metadata(args.video_url)
         
         system.process_video(args.video_url, metadata)
     
+    elif args.mode == "batch":
+        # 배치 처리 모드
+        if not args.manifest:
+            print("오류: --manifest가 필요합니다.")
+            return
+        
+        entries = load_manifest(args.manifest)
+        if args.embed_workers is not None:
+            system.vector_store.embedding_workers = args.embed_workers
+        system.process_batch(entries, max_workers=args.workers, pipelined=args.pipeline)
+    
     elif args.mode == "query":
         # 질문 모드
         if not args.question:
             print("오류: --question이 필요합니다.")
             return
         
-        response = system.query(args.question)
-        print("\n답변:")
-        print(response["answer"])
+        streamed = []
+        
+        def print_token(token: str):
+            if not streamed:
+                print("\n답변:")
+            streamed.append(token)
+            print(token, end="", flush=True)
+        
+        response = system.query(args.question, on_token=print_token)
+        if streamed:
+            print()
+            if response.get("cached"):
+                print("(캐시된 답변)")
+            else:
+                print(f"({TFTGenerator.format_generation_stats(response.get('generation_stats'))})")
+        else:
+            print("\n답변:")
+            print(response["answer"])
     
     elif args.mode == "interactive":
         # 대화형 모드
@@ -310,6 +560,23 @@ def main():
     elif args.mode == "stats":
         # 통계 모드
         system.get_stats()
+    
+    elif args.mode == "migrate":
+        # 마이그레이션 모드 (임베딩 없이 메타데이터만 갱신)
+        system.vector_store.backfill_features()
+    
+    elif args.mode == "serve":
+        # HTTP 서비스 모드 (모델을 한 번만 로드하고 요청을 계속 처리)
+        from server import serve
+        
+        serve(
+            system,
+            host=args.host,
+            port=args.port,
+            batch_window_ms=config.SERVE_BATCH_WINDOW_MS,
+            max_batch_size=config.SERVE_MAX_BATCH_SIZE,
+            request_timeout=config.SERVE_REQUEST_TIMEOUT
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import itertools
+import threading
+
+import numpy as np
+
+from data.metadata_schema import GameState
+
+
+class SemanticAnswerCache:
+    """
+    의미 기반 답변 캐시
+
+    - 키: 질문 임베딩 + 게임 상태 구간 (라운드, 레벨 구간, 골드 구간, 연승/연패)
+    - 같은 구간의 캐시 항목 중 코사인 유사도가 임계값 이상이고
+      검색된 청크 ID가 같으면 저장된 답변을 그대로 반환
+    - Vector Store의 revision이 바뀌면 (청크 추가/삭제) 전체 무효화
+    """
+
+    # 레벨 구간 경계: ~4 / 5-6 / 7-8 / 9~
+    LEVEL_BAND_EDGES = (4, 6, 8)
+    # 골드 구간: 이자 기준 10골드 단위, 50 이상은 한 구간
+    GOLD_BAND_SIZE = 10
+    MAX_GOLD_BAND = 5
+    # 연승/연패로 보는 최소 횟수
+    STREAK_THRESHOLD = 2
+
+    def __init__(self, similarity_threshold: float = 0.95, max_entries: int = 512):
+        """
+        Args:
+            similarity_threshold: 캐시 적중으로 볼 최소 코사인 유사도
+            max_entries: 최대 캐시 항목 수 (LRU 교체)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        # 항목 ID -> {"bucket", "embedding", "chunk_ids", "response"}
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._ids = itertools.count()
+        self._revision: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def game_state_bucket(cls, game_state: Optional[GameState]) -> Optional[Tuple]:
+        """게임 상태를 캐시 키용 구간으로 정규화"""
+        if game_state is None:
+            return None
+
+        level_band = sum(game_state.level > edge for edge in cls.LEVEL_BAND_EDGES)
+        gold_band = min(game_state.gold // cls.GOLD_BAND_SIZE, cls.MAX_GOLD_BAND)
+
+        if game_state.win_streak >= cls.STREAK_THRESHOLD:
+            streak = "연승"
+        elif game_state.lose_streak >= cls.STREAK_THRESHOLD:
+            streak = "연패"
+        else:
+            streak = "없음"
+
+        return (game_state.round, level_band, gold_band, streak)
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else embedding
+
+    def _check_revision(self, revision: int):
+        """Vector Store가 바뀌었으면 캐시 비우기 (lock 안에서 호출)"""
+        if self._revision != revision:
+            self._entries.clear()
+            self._revision = revision
+
+    def lookup(
+        self,
+        embedding: np.ndarray,
+        game_state: Optional[GameState],
+        chunk_ids: List[str],
+        revision: int
+    ) -> Optional[Dict]:
+        """
+        캐시된 답변 찾기
+
+        Args:
+            embedding: 질문 임베딩
+            game_state: 현재 게임 상태 (선택)
+            chunk_ids: 이번 질문으로 검색된 청크 ID (순서 포함)
+            revision: Vector Store revision
+
+        Returns:
+            저장된 응답 dict (없으면 None)
+        """
+        bucket = self.game_state_bucket(game_state)
+        query = self._normalize(embedding)
+        chunk_ids = tuple(chunk_ids)
+
+        with self._lock:
+            self._check_revision(revision)
+
+            best_id, best_score = None, self.similarity_threshold
+            for entry_id, entry in self._entries.items():
+                if entry["bucket"] != bucket or entry["chunk_ids"] != chunk_ids:
+                    continue
+                score = float(np.dot(entry["embedding"], query))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+
+            if best_id is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return dict(self._entries[best_id]["response"])
+
+    def store(
+        self,
+        embedding: np.ndarray,
+        game_state: Optional[GameState],
+        chunk_ids: List[str],
+        revision: int,
+        response: Dict
+    ):
+        """답변 저장"""
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._check_revision(revision)
+            self._entries[next(self._ids)] = {
+                "bucket": self.game_state_bucket(game_state),
+                "embedding": self._normalize(embedding),
+                "chunk_ids": tuple(chunk_ids),
+                "response": dict(response)
+            }
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """캐시 비우기"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'similarity_threshold': self.similarity_threshold,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
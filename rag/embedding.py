@@ -0,0 +1,446 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import json
+import threading
+
+import numpy as np
+
+
+# 임베딩 백엔드
+#   sentence-transformers: 기준 모델 (PyTorch)
+#   torch-int8: Linear 층을 동적 int8 양자화한 PyTorch 모델 (CPU)
+#   onnx: 로컬 ONNX 파일 + ONNX Runtime (네트워크 없이 로드, export_onnx_model로 생성)
+EMBEDDING_BACKENDS = ['sentence-transformers', 'torch-int8', 'onnx']
+
+# 프로세스 전역 임베딩 모델 레지스트리: (모델 이름, device) -> 모델 인스턴스
+_MODEL_REGISTRY: Dict[Tuple[str, str], object] = {}
+# (백엔드, 모델 이름, 모델 경로, device) -> 임베더
+_EMBEDDER_REGISTRY: Dict[Tuple[str, str, str, str], "BaseEmbedder"] = {}
+# 모델 이름 -> fast tokenizer (청크 길이를 토큰 수로 잴 때 사용)
+_TOKENIZER_REGISTRY: Dict[str, object] = {}
+# 모델 이름 -> 임베딩 시 입력 최대 토큰 수 (max_seq_length)
+_MAX_SEQ_LENGTH_REGISTRY: Dict[str, int] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_embedding_model(model_name: str, device: str = "cpu"):
+    """
+    임베딩 모델을 가져오기 (처음 호출될 때 한 번만 로드)
+
+    같은 모델/device를 쓰는 모든 Vector Store와 Retriever가
+    하나의 인스턴스를 공유합니다.
+
+    Args:
+        model_name: SentenceTransformer 모델 이름
+        device: "cpu" 또는 "cuda"
+
+    Returns:
+        SentenceTransformer 인스턴스
+    """
+    key = (model_name, device)
+    model = _MODEL_REGISTRY.get(key)
+    if model is not None:
+        return model
+
+    with _REGISTRY_LOCK:
+        # 다른 스레드가 먼저 로드했을 수 있으므로 다시 확인
+        model = _MODEL_REGISTRY.get(key)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+
+            print(f"임베딩 모델 로드 중: {model_name}")
+            model = SentenceTransformer(model_name, device=device)
+            _MODEL_REGISTRY[key] = model
+            print(f"임베딩 모델 로드 완료 (device: {device})")
+
+    return model
+
+
+def is_embedding_model_loaded(model_name: str, device: str = "cpu") -> bool:
+    """모델이 이미 로드되어 있는지 확인"""
+    return (model_name, device) in _MODEL_REGISTRY
+
+
+def clear_embedding_models():
+    """로드된 모델을 모두 해제 (메모리 회수용)"""
+    with _REGISTRY_LOCK:
+        _MODEL_REGISTRY.clear()
+        _EMBEDDER_REGISTRY.clear()
+        _TOKENIZER_REGISTRY.clear()
+        _MAX_SEQ_LENGTH_REGISTRY.clear()
+
+
+def get_tokenizer(model_name: str):
+    """
+    임베딩 모델의 fast tokenizer 가져오기 (처음 호출될 때 한 번만 로드)
+
+    모델이 이미 로드되어 있으면 모델의 tokenizer를 그대로 쓰고,
+    아니면 모델 가중치 없이 tokenizer만 로드합니다.
+
+    Args:
+        model_name: SentenceTransformer 모델 이름
+    """
+    tokenizer = _TOKENIZER_REGISTRY.get(model_name)
+    if tokenizer is not None:
+        return tokenizer
+
+    with _REGISTRY_LOCK:
+        tokenizer = _TOKENIZER_REGISTRY.get(model_name)
+        if tokenizer is None:
+            loaded = [model for (name, _), model in _MODEL_REGISTRY.items() if name == model_name]
+            if loaded:
+                tokenizer = loaded[0].tokenizer
+            else:
+                from transformers import AutoTokenizer
+
+                tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+            _TOKENIZER_REGISTRY[model_name] = tokenizer
+
+    return tokenizer
+
+
+def get_max_seq_length(model_name: str) -> int:
+    """
+    임베딩 모델이 실제로 보는 최대 토큰 수 (특수 토큰 포함)
+
+    SentenceTransformer.encode는 tokenizer의 model_max_length가 아니라
+    max_seq_length에서 입력을 자릅니다. 모델이 로드되어 있으면 그 값을,
+    아니면 모델의 sentence_bert_config.json을 읽고 (가중치는 받지 않음),
+    둘 다 없으면 tokenizer의 model_max_length를 씁니다.
+
+    Args:
+        model_name: SentenceTransformer 모델 이름 또는 로컬 경로
+    """
+    max_length = _MAX_SEQ_LENGTH_REGISTRY.get(model_name)
+    if max_length is not None:
+        return max_length
+
+    loaded = [model for (name, _), model in _MODEL_REGISTRY.items() if name == model_name]
+    if loaded:
+        max_length = loaded[0].max_seq_length
+    else:
+        max_length = _read_sentence_bert_max_length(model_name)
+    if max_length is None:
+        max_length = get_tokenizer(model_name).model_max_length
+
+    _MAX_SEQ_LENGTH_REGISTRY[model_name] = max_length
+    return max_length
+
+
+def _read_sentence_bert_max_length(model_name: str) -> Optional[int]:
+    """sentence_bert_config.json의 max_seq_length (로컬 폴더 또는 Hugging Face Hub)"""
+    config_path = Path(model_name) / "sentence_bert_config.json"
+    if not config_path.exists():
+        try:
+            from huggingface_hub import hf_hub_download
+
+            config_path = Path(hf_hub_download(model_name, "sentence_bert_config.json"))
+        except Exception as e:
+            print(f"[!] {model_name}의 max_seq_length를 읽을 수 없습니다: {e}")
+            return None
+    return json.loads(config_path.read_text(encoding="utf-8")).get("max_seq_length")
+
+
+class BaseEmbedder:
+    """
+    임베딩 백엔드 공통 인터페이스
+
+    encode(texts) -> (텍스트 수, 차원) float32 배열
+    """
+
+    backend = ""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        raise NotImplementedError
+
+
+class SentenceTransformerEmbedder(BaseEmbedder):
+    """기준 모델 (SentenceTransformer.encode, 레지스트리의 모델 공유)"""
+
+    backend = "sentence-transformers"
+
+    def __init__(self, model_name: str, device: str = "cpu"):
+        super().__init__(model_name)
+        self.model = get_embedding_model(model_name, device)
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False) -> np.ndarray:
+        embeddings = self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=show_progress_bar,
+            convert_to_numpy=True
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class QuantizedTorchEmbedder(SentenceTransformerEmbedder):
+    """
+    Linear 층을 동적 int8 양자화한 SentenceTransformer (CPU 전용)
+
+    가중치는 int8로, 활성값은 실행 중에 양자화합니다.
+    기준 모델과 따로 로드합니다 (레지스트리의 모델을 바꾸지 않도록).
+    """
+
+    backend = "torch-int8"
+
+    def __init__(self, model_name: str, num_threads: Optional[int] = None):
+        BaseEmbedder.__init__(self, model_name)
+
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        print(f"임베딩 모델 로드 중 (동적 int8 양자화): {model_name}")
+        model = SentenceTransformer(model_name, device="cpu")
+        self.model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+
+
+class OnnxEmbedder(BaseEmbedder):
+    """
+    ONNX Runtime 임베더 (로컬 파일만 사용)
+
+    model_path: .onnx 파일 (같은 폴더에 tokenizer.json, sentence_bert_config.json)
+    모델 출력이 토큰 임베딩이면 attention mask로 평균 풀링합니다 (xlm-r ... mean-tokens와 같음).
+    배치는 길이순으로 묶어서 패딩을 줄입니다.
+    """
+
+    backend = "onnx"
+
+    def __init__(self, model_path: str, model_name: Optional[str] = None, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        path = Path(model_path)
+        if path.is_dir():
+            path = path / "model.onnx"
+        if not path.exists():
+            raise FileNotFoundError(f"ONNX 모델 파일이 없습니다: {path} (export_onnx_model로 생성)")
+        super().__init__(model_name or path.parent.name)
+        self.model_path = path
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        print(f"ONNX 임베딩 모델 로드 중: {path}")
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        model_dir = path.parent
+        max_length = 512
+        config_path = model_dir / "sentence_bert_config.json"
+        if config_path.exists():
+            max_length = json.loads(config_path.read_text(encoding="utf-8")).get("max_seq_length", max_length)
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.pad_id = next(
+            (self.tokenizer.token_to_id(token) for token in ("<pad>", "[PAD]")
+             if self.tokenizer.token_to_id(token) is not None),
+            0
+        )
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(list(texts))
+        lengths = np.array([len(encoding.ids) for encoding in encodings])
+        order = np.argsort(-lengths, kind="stable")
+
+        batches = range(0, len(texts), batch_size)
+        if show_progress_bar:
+            from tqdm import tqdm
+            batches = tqdm(batches, desc="Batches")
+
+        output = None
+        for start in batches:
+            indices = order[start:start + batch_size]
+            width = int(lengths[indices[0]])
+            input_ids = np.full((len(indices), width), self.pad_id, dtype=np.int64)
+            attention_mask = np.zeros((len(indices), width), dtype=np.int64)
+            for row, i in enumerate(indices):
+                ids = encodings[i].ids
+                input_ids[row, :len(ids)] = ids
+                attention_mask[row, :len(ids)] = 1
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+            hidden = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+
+            if hidden.ndim == 3:
+                # 평균 풀링 (패딩 토큰 제외)
+                mask = attention_mask[:, :, None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            else:
+                pooled = hidden
+
+            if output is None:
+                output = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            output[indices] = pooled
+
+        return output
+
+
+def embedder_cache_name(backend: str, model_name: str, model_path: Optional[str] = None) -> str:
+    """디스크 캐시 이름 (기준 모델은 모델 이름 그대로라서 기존 캐시를 계속 씀)"""
+    if backend == "sentence-transformers":
+        return model_name
+    if backend == "onnx" and model_path:
+        return f"{model_name}#onnx-{Path(model_path).name}"
+    return f"{model_name}#{backend}"
+
+
+def get_embedder(
+    model_name: str,
+    device: str = "cpu",
+    backend: str = "sentence-transformers",
+    model_path: Optional[str] = None,
+    num_threads: Optional[int] = None
+) -> BaseEmbedder:
+    """
+    임베딩 백엔드 가져오기 (처음 호출될 때 한 번만 로드)
+
+    Args:
+        model_name: SentenceTransformer 모델 이름
+        device: "cpu" 또는 "cuda" (sentence-transformers 백엔드만)
+        backend: EMBEDDING_BACKENDS 중 하나
+        model_path: onnx 백엔드의 로컬 .onnx 파일 (또는 폴더)
+        num_threads: CPU 스레드 수 (None이면 라이브러리 기본값)
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"지원하지 않는 임베딩 백엔드: {backend} (가능: {EMBEDDING_BACKENDS})")
+
+    key = (backend, model_name, str(model_path or ""), device)
+    embedder = _EMBEDDER_REGISTRY.get(key)
+    if embedder is not None:
+        return embedder
+
+    if backend == "sentence-transformers":
+        embedder = SentenceTransformerEmbedder(model_name, device)
+    else:
+        with _REGISTRY_LOCK:
+            embedder = _EMBEDDER_REGISTRY.get(key)
+            if embedder is not None:
+                return embedder
+            if backend == "torch-int8":
+                embedder = QuantizedTorchEmbedder(model_name, num_threads)
+            else:
+                if not model_path:
+                    raise ValueError("onnx 백엔드는 model_path가 필요합니다.")
+                embedder = OnnxEmbedder(model_path, model_name, num_threads)
+
+    _EMBEDDER_REGISTRY[key] = embedder
+    return embedder
+
+
+def check_parity(
+    embedder: BaseEmbedder,
+    reference: BaseEmbedder,
+    texts: List[str],
+    min_cosine: float = 0.99
+) -> Dict:
+    """
+    기준 모델과 임베딩 일치도 비교
+
+    - 텍스트별 코사인 유사도 (평균/최소/하위 5%)
+    - 최근접 이웃 일치율: 텍스트끼리 가장 가까운 텍스트가 두 모델에서 같은 비율
+
+    Returns:
+        {"mean_cosine", "min_cosine", "p05_cosine", "neighbour_agreement", "passed"}
+    """
+    candidate = embedder.encode(texts)
+    expected = reference.encode(texts)
+
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    candidate, expected = normalize(candidate), normalize(expected)
+    cosines = (candidate * expected).sum(axis=1)
+
+    neighbour_agreement = 1.0
+    if len(texts) > 1:
+        neighbours = []
+        for vectors in (candidate, expected):
+            similarity = vectors @ vectors.T
+            np.fill_diagonal(similarity, -np.inf)
+            neighbours.append(similarity.argmax(axis=1))
+        neighbour_agreement = float((neighbours[0] == neighbours[1]).mean())
+
+    return {
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "p05_cosine": float(np.percentile(cosines, 5)),
+        "neighbour_agreement": neighbour_agreement,
+        "passed": bool(cosines.min() >= min_cosine)
+    }
+
+
+def export_onnx_model(
+    model_name: str,
+    output_dir: str,
+    quantize: bool = True,
+    opset: int = 14
+) -> Path:
+    """
+    SentenceTransformer 모델을 ONNX로 변환 (한 번만 실행, torch/transformers 필요)
+
+    output_dir에 model.onnx (토큰 임베딩 출력), tokenizer.json, sentence_bert_config.json을 저장하고
+    quantize=True면 ONNX Runtime 동적 int8 양자화 모델(model.int8.onnx)도 만듭니다.
+
+    Returns:
+        OnnxEmbedder에 넘길 모델 파일 경로
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    sample = model.tokenizer(["3-2에서 리롤할까요?"], return_tensors="pt")
+
+    model_path = output_dir / "model.onnx"
+    torch.onnx.export(
+        transformer,
+        (sample["input_ids"], sample["attention_mask"]),
+        str(model_path),
+        input_names=["input_ids", "attention_mask"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"}
+        },
+        opset_version=opset
+    )
+    model.tokenizer.save_pretrained(str(output_dir))
+    (output_dir / "sentence_bert_config.json").write_text(
+        json.dumps({"max_seq_length": model.max_seq_length}), encoding="utf-8"
+    )
+    print(f"ONNX 모델 저장: {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = output_dir / "model.int8.onnx"
+        quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+        print(f"int8 ONNX 모델 저장: {quantized_path}")
+        return quantized_path
+
+    return model_path
@@ -0,0 +1,496 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 텍스트 정규화 (유니코드 NFC + 공백 정리)"""
+    text = unicodedata.normalize("NFC", text)
+    return " ".join(text.split())
+
+
+class EmbeddingDiskCache:
+    """
+    디스크 기반 임베딩 캐시 (content-addressed)
+
+    - 키: (모델 이름, 정규화된 텍스트) 해시
+    - 벡터: memory-mapped float32 배열 (vectors.f32), 슬롯마다 키 해시 (keys.bin)
+    - 인덱스: 키 -> 슬롯 번호, 스냅샷(index.json) + 추가 전용 로그(index.log)
+      저장할 때는 바뀐 슬롯만 로그에 덧붙이고, 로그가 항목 수보다 길어지면 스냅샷으로 합침
+    - max_entries를 넘으면 가장 오래 사용되지 않은 항목을 교체
+
+    여러 프로세스가 같은 캐시를 써도 됩니다. 쓰기는 파일 잠금 안에서 다른 프로세스가
+    덧붙인 로그를 먼저 반영한 뒤 슬롯을 고르고, 읽기는 슬롯의 키 해시를 확인해서
+    다른 프로세스가 교체한 슬롯을 미스로 처리합니다.
+    (fcntl이 없는 환경(Windows)에서는 잠금이 없으므로 한 번에 한 프로세스만 써야 합니다.)
+    """
+
+    INDEX_FILE = "index.json"
+    LOG_FILE = "index.log"
+    VECTORS_FILE = "vectors.f32"
+    KEYS_FILE = "keys.bin"
+    LOCK_FILE = "lock"
+    KEY_BYTES = 20  # sha1
+    INITIAL_CAPACITY = 1024
+
+    def __init__(
+        self,
+        cache_dir: str,
+        model_name: str,
+        max_entries: int = 200_000
+    ):
+        """
+        Args:
+            cache_dir: 캐시 루트 경로 (모델별 하위 폴더 생성)
+            model_name: 임베딩 모델 이름 (키에 포함)
+            max_entries: 최대 저장 벡터 수
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) / re.sub(r'[^0-9A-Za-z_.-]+', '_', model_name)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._slots: "OrderedDict[str, int]" = OrderedDict()
+        self._slot_keys: Dict[int, str] = {}
+        # 조회만 된 항목 (다음 flush 때 LRU 순서를 로그에 기록)
+        self._touched: "OrderedDict[str, int]" = OrderedDict()
+        self._dim: Optional[int] = None
+        self._capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._snapshot_id = None
+        self._log_offset = 0
+        self._log_lines = 0
+        self._lock = threading.Lock()
+
+        with self._file_lock():
+            self._load()
+
+    @property
+    def _index_path(self) -> Path:
+        return self.cache_dir / self.INDEX_FILE
+
+    @property
+    def _log_path(self) -> Path:
+        return self.cache_dir / self.LOG_FILE
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.cache_dir / self.VECTORS_FILE
+
+    @property
+    def _keys_path(self) -> Path:
+        return self.cache_dir / self.KEYS_FILE
+
+    def make_key(self, text: str) -> str:
+        """(모델 이름, 정규화된 텍스트)로 캐시 키 생성"""
+        payload = f"{self.model_name}\x00{normalize_text(text)}"
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    @contextmanager
+    def _file_lock(self):
+        """프로세스 간 쓰기 잠금 (fcntl이 없으면 잠금 없음)"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.cache_dir / self.LOCK_FILE, 'a+b') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _file_id(path: Path):
+        """파일이 바뀌었는지 비교하는 값 (os.replace로 교체되면 달라짐)"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load(self):
+        """스냅샷과 로그를 처음부터 읽고 벡터 파일 열기 (파일 잠금 안에서 호출)"""
+        self._slots = OrderedDict()
+        self._slot_keys = {}
+        self._touched = OrderedDict()
+        self._dim = None
+        self._capacity = 0
+        self._vectors = None
+        self._keys = None
+        self._log_offset = 0
+        self._log_lines = 0
+        self._snapshot_id = self._file_id(self._index_path)
+
+        if not self._vectors_path.exists():
+            return
+
+        try:
+            if self._index_path.exists():
+                with open(self._index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                self._dim = index['dim']
+                self._capacity = index['capacity']
+                for key, slot in index['slots']:
+                    self._assign(key, slot)
+            self._replay_log()
+            if self._dim is not None:
+                self._open_arrays()
+        except Exception as e:
+            print(f"임베딩 캐시를 읽을 수 없어 초기화합니다: {e}")
+            self._reset()
+
+    def _assign(self, key: str, slot: int):
+        """key를 slot에 연결 (slot에 있던 다른 키는 제거, LRU 맨 뒤로)"""
+        old_key = self._slot_keys.get(slot)
+        if old_key is not None and old_key != key:
+            self._slots.pop(old_key, None)
+        old_slot = self._slots.get(key)
+        if old_slot is not None and old_slot != slot:
+            self._slot_keys.pop(old_slot, None)
+        self._slots[key] = slot
+        self._slots.move_to_end(key)
+        self._slot_keys[slot] = key
+
+    def _replay_log(self):
+        """로그에서 아직 읽지 않은 부분 반영 (다른 프로세스가 덧붙인 항목)"""
+        if not self._log_path.exists():
+            return
+        with open(self._log_path, 'r+b') as f:
+            f.seek(self._log_offset)
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                # 기록 도중 중단된 마지막 줄 (잠금 안이므로 쓰는 중인 프로세스는 없음)
+                f.truncate(self._log_offset + end)
+
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict):
+                self._dim = record['dim']
+                self._capacity = max(self._capacity, record['capacity'])
+            else:
+                key, slot = record
+                self._assign(key, slot)
+            self._log_lines += 1
+        self._log_offset += end
+
+    def _append_log(self, records: List):
+        """로그에 항목 덧붙이기 (파일 잠금 안에서 호출, 직전에 _sync로 끝까지 읽은 상태)"""
+        if not records:
+            return
+        data = "".join(json.dumps(record, separators=(',', ':')) + "\n" for record in records).encode('utf-8')
+        with open(self._log_path, 'ab') as f:
+            f.write(data)
+        self._log_offset += len(data)
+        self._log_lines += len(records)
+
+    def _sync(self):
+        """다른 프로세스가 쓴 내용 반영 (파일 잠금 안에서 호출)"""
+        log_size = self._log_path.stat().st_size if self._log_path.exists() else 0
+        if self._file_id(self._index_path) != self._snapshot_id or log_size < self._log_offset:
+            # 다른 프로세스가 스냅샷으로 합쳤거나 캐시를 초기화함
+            touched = self._touched
+            self._load()
+            self._touched = OrderedDict(
+                (key, self._slots[key]) for key in touched if key in self._slots
+            )
+            return
+
+        capacity = self._capacity
+        self._replay_log()
+        if self._dim is not None and (self._vectors is None or self._capacity != capacity):
+            self._open_arrays()
+
+    @staticmethod
+    def _grow_file(path: Path, size: int):
+        """파일을 size 바이트 이상으로 늘리기 (기존 데이터 유지)"""
+        with open(path, 'ab') as f:
+            if f.tell() < size:
+                f.truncate(size)
+
+    def _open_arrays(self):
+        """벡터/키 해시 파일을 현재 용량으로 매핑"""
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._keys.flush()
+        self._vectors = None
+        self._keys = None
+
+        keys_existed = self._keys_path.exists()
+        self._grow_file(self._vectors_path, self._capacity * self._dim * np.dtype(np.float32).itemsize)
+        self._grow_file(self._keys_path, self._capacity * self.KEY_BYTES)
+        self._vectors = np.memmap(
+            self._vectors_path,
+            dtype=np.float32,
+            mode='r+',
+            shape=(self._capacity, self._dim)
+        )
+        self._keys = np.memmap(
+            self._keys_path,
+            dtype=np.uint8,
+            mode='r+',
+            shape=(self._capacity, self.KEY_BYTES)
+        )
+        if not keys_existed:
+            # 키 해시 파일이 없던 캐시 (이전 형식)
+            for slot, key in self._slot_keys.items():
+                self._keys[slot] = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+
+    def _reset(self):
+        """캐시 비우기"""
+        self._slots = OrderedDict()
+        self._slot_keys = {}
+        self._touched = OrderedDict()
+        self._dim = None
+        self._capacity = 0
+        self._vectors = None
+        self._keys = None
+        for path in (self._index_path, self._log_path, self._vectors_path, self._keys_path):
+            if path.exists():
+                path.unlink()
+        self._snapshot_id = None
+        self._log_offset = 0
+        self._log_lines = 0
+
+    def _ensure_capacity(self, dim: int, needed: int):
+        """needed개 슬롯을 담을 수 있도록 벡터 파일 확장"""
+        if self._vectors is not None and needed <= self._capacity:
+            return
+
+        new_capacity = max(needed, self._capacity * 2, self.INITIAL_CAPACITY)
+        new_capacity = min(new_capacity, self.max_entries)
+
+        self._dim = dim
+        self._capacity = new_capacity
+        self._open_arrays()
+        self._append_log([{'dim': dim, 'capacity': new_capacity}])
+
+    def _slot_matches(self, slot: int, key: str) -> bool:
+        """슬롯에 기록된 키 해시가 key와 같은지"""
+        return self._keys[slot].tobytes() == bytes.fromhex(key)
+
+    def get_many(self, keys: List[str]) -> Dict[int, np.ndarray]:
+        """
+        캐시 조회
+
+        Returns:
+            {입력 위치: 벡터} (찾은 항목만)
+        """
+        found = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                slot = self._slots.get(key)
+                if slot is not None:
+                    vector = np.array(self._vectors[slot])
+                    # 벡터를 읽은 뒤 확인 (다른 프로세스가 이 슬롯을 교체했으면 미스,
+                    # 인덱스는 다음 쓰기 때 로그를 읽으면서 맞춰짐)
+                    if not self._slot_matches(slot, key):
+                        slot = None
+                if slot is None:
+                    self.misses += 1
+                    continue
+                self._slots.move_to_end(key)
+                self._touched[key] = slot
+                found[i] = vector
+                self.hits += 1
+        return found
+
+    def put_many(self, keys: List[str], vectors: np.ndarray, flush: bool = True):
+        """
+        벡터 저장 (용량 초과 시 LRU 항목 교체)
+
+        슬롯 배정은 항상 바로 로그에 기록됩니다 (다른 프로세스가 같은 슬롯을 쓰지 않도록).
+
+        Args:
+            flush: True면 바로 디스크에 반영 (대량 저장 중에는 False 후 flush() 호출)
+        """
+        if len(keys) == 0:
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock, self._file_lock():
+            self._sync()
+            if self._dim is not None and self._dim != vectors.shape[1]:
+                # 모델 차원이 바뀌면 기존 캐시는 쓸 수 없음
+                self._reset()
+
+            new_keys = len(set(keys) - self._slots.keys())
+            self._ensure_capacity(vectors.shape[1], min(len(self._slots) + new_keys, self.max_entries))
+
+            records = []
+            for key, vector in zip(keys, vectors):
+                slot = self._slots.get(key)
+                if slot is not None and self._slot_matches(slot, key):
+                    # 같은 키면 같은 벡터 (순서만 갱신)
+                    self._slots.move_to_end(key)
+                    self._touched[key] = slot
+                    continue
+                if slot is None:
+                    if len(self._slots) < self._capacity:
+                        slot = len(self._slots)
+                    else:
+                        slot = next(iter(self._slots.values()))
+                        self.evictions += 1
+                # (키 해시가 깨진 슬롯이면 그 자리에 다시 씀)
+
+                # 키 해시를 지운 뒤 벡터를 쓰고 마지막에 키 해시 기록
+                # (잠금 없이 읽는 쪽이 쓰는 중인 벡터를 받지 않도록)
+                self._keys[slot] = 0
+                self._vectors[slot] = vector
+                self._keys[slot] = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+                self._assign(key, slot)
+                records.append([key, slot])
+            self._append_log(records)
+
+            if flush:
+                self._flush()
+
+    def flush(self):
+        """인덱스와 벡터를 디스크에 반영"""
+        with self._lock, self._file_lock():
+            self._sync()
+            self._flush()
+
+    def _flush(self):
+        """벡터를 디스크에 쓰고 LRU 순서를 로그에 기록 (로그가 길면 스냅샷으로 합침)"""
+        if self._vectors is None:
+            return
+        self._vectors.flush()
+        self._keys.flush()
+
+        touched = [
+            [key, slot] for key, slot in self._touched.items()
+            if self._slots.get(key) == slot
+        ]
+        self._touched.clear()
+        self._append_log(touched)
+
+        if self._log_lines > max(len(self._slots), self.INITIAL_CAPACITY):
+            self._compact()
+
+    def _compact(self):
+        """로그를 스냅샷(index.json)으로 합치고 로그 비우기"""
+        index = {
+            'model_name': self.model_name,
+            'dim': self._dim,
+            'capacity': self._capacity,
+            'slots': list(self._slots.items())
+        }
+        suffix = f".{os.getpid()}.tmp"
+        tmp_path = self._index_path.with_name(self.INDEX_FILE + suffix)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path)
+
+        tmp_path = self._log_path.with_name(self.LOG_FILE + suffix)
+        tmp_path.write_bytes(b"")
+        os.replace(tmp_path, self._log_path)
+
+        self._snapshot_id = self._file_id(self._index_path)
+        self._log_offset = 0
+        self._log_lines = 0
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._slots),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+            'log_entries': self._log_lines,
+            'cache_dir': str(self.cache_dir)
+        }
+
+
+class QueryEmbeddingCache:
+    """
+    쿼리 임베딩용 메모리 LRU 캐시
+
+    - 키: 정규화된 쿼리 문자열
+    - max_size를 넘으면 가장 오래 사용되지 않은 쿼리부터 제거
+    - ttl(초)을 지정하면 오래된 항목은 미스로 처리
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size: 최대 캐시 항목 수
+            ttl: 항목 유효 시간 (초, None이면 만료 없음)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """캐시된 쿼리 임베딩 반환 (없거나 만료되면 None)"""
+        key = normalize_text(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, query: str, vector: np.ndarray):
+        """쿼리 임베딩 저장"""
+        if self.max_size <= 0:
+            return
+        key = normalize_text(query)
+        with self._lock:
+            self._entries[key] = (vector, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """캐시 비우기"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """캐시 통계"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
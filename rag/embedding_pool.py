@@ -0,0 +1,128 @@
+"""
+대량 수집용 멀티 프로세스 임베딩 풀
+
+큰 텍스트 배치를 조각(shard)으로 나눠서 워커 프로세스들이 나눠 인코딩합니다.
+워커마다 모델을 따로 로드하고 torch/ONNX 스레드 수를 고정해서
+(워커 수 x 워커당 스레드 수 <= 코어 수) 스레드끼리 코어를 두고 다투지 않게 합니다.
+결과는 입력 순서대로 돌아옵니다.
+
+질문 임베딩처럼 작은 배치는 프로세스 간 전송 비용이 더 크므로 기존 임베더를 씁니다.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import multiprocessing
+import os
+
+import numpy as np
+
+from rag.embedding import BaseEmbedder, get_embedder
+
+
+# 워커 프로세스 안의 임베더 (initializer에서 로드)
+_WORKER_EMBEDDER: Optional[BaseEmbedder] = None
+
+
+def _pin_threads(num_threads: int):
+    """워커의 수학 라이브러리 스레드 수 고정"""
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(num_threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # 이미 병렬 작업이 시작된 뒤에는 바꿀 수 없음
+        pass
+
+
+def _init_worker(model_name: str, backend: str, model_path: Optional[str], num_threads: int):
+    global _WORKER_EMBEDDER
+    _pin_threads(num_threads)
+    _WORKER_EMBEDDER = get_embedder(
+        model_name,
+        "cpu",
+        backend=backend,
+        model_path=model_path,
+        num_threads=num_threads
+    )
+
+
+def _encode_shard(texts: List[str], batch_size: int) -> np.ndarray:
+    return _WORKER_EMBEDDER.encode(texts, batch_size=batch_size)
+
+
+class EmbeddingWorkerPool(BaseEmbedder):
+    """
+    워커 프로세스 풀 임베더 (BaseEmbedder와 같은 encode 인터페이스)
+
+    워커는 처음 encode할 때 시작하고 (spawn), shutdown()까지 모델을 유지합니다.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        backend: str = "sentence-transformers",
+        model_path: Optional[str] = None,
+        threads_per_worker: Optional[int] = None,
+        shards_per_worker: int = 2
+    ):
+        """
+        Args:
+            model_name: SentenceTransformer 모델 이름
+            workers: 워커 프로세스 수
+            backend: 워커에서 쓸 임베딩 백엔드 (EMBEDDING_BACKENDS 중 하나)
+            model_path: onnx 백엔드의 로컬 .onnx 파일
+            threads_per_worker: 워커당 스레드 수 (기본값: 코어 수 / 워커 수)
+            shards_per_worker: 배치 하나를 워커당 몇 조각으로 나눌지 (늦게 끝나는 워커 보완)
+        """
+        super().__init__(model_name)
+        if workers < 1:
+            raise ValueError(f"workers는 1 이상이어야 합니다: {workers}")
+
+        self.backend = backend
+        self.workers = workers
+        self.model_path = model_path
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self.shards_per_worker = max(1, shards_per_worker)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            print(f"임베딩 워커 {self.workers}개 시작 (워커당 스레드 {self.threads_per_worker}개)")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # fork하면 부모의 torch/토크나이저 스레드 상태가 복사되어 멈출 수 있음
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.backend, self.model_path, self.threads_per_worker)
+            )
+        return self._executor
+
+    def shard(self, count: int, batch_size: int) -> List[slice]:
+        """연속된 조각으로 나누기 (조각 하나가 batch_size보다 작아지지 않게)"""
+        shards = min(self.workers * self.shards_per_worker, max(1, -(-count // batch_size)))
+        bounds = np.linspace(0, count, shards + 1).astype(int).tolist()
+        return [slice(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        executor = self._get_executor()
+        shards = self.shard(len(texts), batch_size)
+        # map은 제출 순서대로 결과를 돌려주므로 이어 붙이면 입력 순서와 같음
+        results = executor.map(_encode_shard, [texts[shard] for shard in shards], [batch_size] * len(shards))
+        return np.concatenate(list(results)).astype(np.float32, copy=False)
+
+    def shutdown(self):
+        """워커 종료 (모델 메모리 반환)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -1,7 +1,8 @@
 import ollama
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, AsyncIterator, Callable
 from data.metadata_schema import GameState
 import config
+import time
 
 
 class TFTGenerator:
@@ -36,6 +37,10 @@ class TFTGenerator:
             model_name: Ollama 모델 이름 (기본값: llama3.2)
         """
         self.model_name = model_name
+        # 마지막 호출의 생성 통계 (첫 토큰 지연, tokens/sec)
+        self.last_generation_stats: Optional[Dict] = None
+        # 비동기 클라이언트 (agenerate_stream을 처음 호출할 때 생성)
+        self._async_client: Optional[ollama.AsyncClient] = None
         # Ollama 연결 테스트
         try:
             ollama.list()
@@ -92,16 +97,87 @@ class TFTGenerator:
 
         return "\n".join(prompt_parts)
 
-    def generate(
+    def _build_messages(self, prompt: str) -> List[Dict]:
+        """Ollama chat 메시지 구성"""
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+
+    @staticmethod
+    def _error_message(error: Exception) -> str:
+        """Ollama 호출 실패 시 사용자에게 보여줄 메시지"""
+        error_msg = str(error)
+        print(f"Ollama 호출 실패: {error_msg}")
+        if "connection" in error_msg.lower():
+            return "Ollama가 실행되지 않았습니다. 'ollama serve' 명령으로 실행해주세요."
+        return f"죄송합니다. 답변 생성 중 오류가 발생했습니다: {error_msg}"
+
+    @staticmethod
+    def _build_generation_stats(
+        started_at: float,
+        first_token_at: Optional[float],
+        finished_at: float,
+        chunk_count: int,
+        eval_count: Optional[int] = None,
+        eval_duration: Optional[int] = None,
+        error: Optional[str] = None
+    ) -> Dict:
+        """
+        생성 통계 계산
+
+        Ollama가 마지막 응답에 eval_count/eval_duration(ns)을 주면 그 값을 쓰고,
+        없으면 스트림 청크 수와 실측 시간으로 추정합니다.
+        error는 생성 중 오류 메시지입니다 (답변이 중간에 끊겼을 수 있음, 정상이면 None).
+        """
+        time_to_first_token = first_token_at - started_at if first_token_at else None
+        tokens = eval_count if eval_count else chunk_count
+
+        if eval_count and eval_duration:
+            tokens_per_sec = eval_count / (eval_duration / 1e9)
+        elif first_token_at and finished_at > first_token_at:
+            tokens_per_sec = chunk_count / (finished_at - first_token_at)
+        else:
+            tokens_per_sec = None
+
+        return {
+            "time_to_first_token": time_to_first_token,
+            "total_time": finished_at - started_at,
+            "tokens": tokens,
+            "tokens_per_sec": tokens_per_sec,
+            "error": error
+        }
+
+    @staticmethod
+    def format_generation_stats(stats: Optional[Dict]) -> str:
+        """생성 통계를 한 줄 문자열로 표시"""
+        if not stats:
+            return "생성 통계 없음"
+        parts = []
+        if stats.get("time_to_first_token") is not None:
+            parts.append(f"첫 토큰 {stats['time_to_first_token']:.2f}초")
+        parts.append(f"전체 {stats['total_time']:.2f}초")
+        if stats.get("tokens_per_sec") is not None:
+            parts.append(f"{stats['tokens_per_sec']:.1f} tokens/s")
+        if stats.get("error"):
+            parts.append("생성 오류")
+        return ", ".join(parts)
+
+    def generate_stream(
         self,
         question: str,
         context: str,
         game_state: Optional[GameState] = None,
         temperature: float = 0.7,
-        max_tokens: int = 1000
-    ) -> str:
+        max_tokens: int = 1000,
+        stats: Optional[Dict] = None
+    ) -> Iterator[str]:
         """
-        Ollama로 답변 생성
+        Ollama로 답변을 스트리밍 생성 (토큰이 나오는 대로 반환)
+
+        스트림이 끝나면 self.last_generation_stats에
+        첫 토큰 지연(time_to_first_token)과 tokens_per_sec가 기록됩니다.
+        Ollama 호출이 실패하면 오류 안내 문구를 마지막 조각으로 내보내고 통계의 error에 기록합니다.
 
         Args:
             question: 사용자 질문
@@ -109,76 +185,241 @@ class TFTGenerator:
             game_state: 게임 상태 (선택)
             temperature: 생성 온도
             max_tokens: 최대 토큰 수
+            stats: 지정하면 생성 통계를 이 dict에도 기록 (여러 스레드가 동시에 생성할 때)
 
-        Returns:
-            생성된 답변
+        Yields:
+            생성된 텍스트 조각
         """
         # 프롬프트 구성
         prompt = self._build_prompt(question, context, game_state)
 
         print("\n=== Ollama 로컬 LLM 호출 중 ===")
 
+        started_at = time.perf_counter()
+        first_token_at = None
+        chunk_count = 0
+        eval_count = None
+        eval_duration = None
+        error = None
+
         try:
-            # Ollama API 호출
-            response = ollama.chat(
+            # Ollama API 스트리밍 호출
+            stream = ollama.chat(
                 model=self.model_name,
-                messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._build_messages(prompt),
                 options={
                     "temperature": temperature,
                     "num_predict": max_tokens,
-                }
+                },
+                stream=True
             )
 
-            print("=== 답변 생성 완료 ===\n")
+            for part in stream:
+                content = part['message']['content']
+                if content:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    chunk_count += 1
+                    yield content
 
-            return response['message']['content']
+                if part.get('done'):
+                    eval_count = part.get('eval_count')
+                    eval_duration = part.get('eval_duration')
 
         except Exception as e:
-            error_msg = str(e)
-            print(f"Ollama 호출 실패: {error_msg}")
-            if "connection" in error_msg.lower():
-                return "Ollama가 실행되지 않았습니다. 'ollama serve' 명령으로 실행해주세요."
-            else:
-                return f"죄송합니다. 답변 생성 중 오류가 발생했습니다: {error_msg}"
+            error = str(e)
+            yield self._error_message(e)
+
+        finally:
+            generation_stats = self._build_generation_stats(
+                started_at,
+                first_token_at,
+                time.perf_counter(),
+                chunk_count,
+                eval_count,
+                eval_duration,
+                error
+            )
+            self.last_generation_stats = generation_stats
+            if stats is not None:
+                stats.update(generation_stats)
 
-    def generate_with_sources(
+    async def agenerate_stream(
         self,
         question: str,
         context: str,
-        search_results: List[Dict],
-        game_state: Optional[GameState] = None
-    ) -> Dict:
+        game_state: Optional[GameState] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        stats: Optional[Dict] = None
+    ) -> AsyncIterator[str]:
         """
-        답변과 함께 출처 정보도 반환
+        generate_stream의 비동기 버전 (ollama.AsyncClient)
 
-        Returns:
-            {
-                "answer": "생성된 답변",
-                "sources": [{"video_source": "...", "timestamp": "..."}, ...]
-            }
+        이벤트 루프를 막지 않으므로 루프 하나에서 여러 답변을 동시에 생성할 수 있습니다.
+        태스크가 취소되거나 (타임아웃) 소비하는 쪽이 스트림을 닫으면
+        Ollama 응답 스트림도 닫아서 생성을 중단합니다.
+
+        Args:
+            generate_stream과 같음
+
+        Yields:
+            생성된 텍스트 조각
         """
-        # 답변 생성
-        answer = self.generate(question, context, game_state)
+        prompt = self._build_prompt(question, context, game_state)
+
+        if self._async_client is None:
+            self._async_client = ollama.AsyncClient()
+
+        started_at = time.perf_counter()
+        first_token_at = None
+        chunk_count = 0
+        eval_count = None
+        eval_duration = None
+        error = None
+        stream = None
+
+        try:
+            stream = await self._async_client.chat(
+                model=self.model_name,
+                messages=self._build_messages(prompt),
+                options={
+                    "temperature": temperature,
+                    "num_predict": max_tokens,
+                },
+                stream=True
+            )
+
+            async for part in stream:
+                content = part['message']['content']
+                if content:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    chunk_count += 1
+                    yield content
+
+                if part.get('done'):
+                    eval_count = part.get('eval_count')
+                    eval_duration = part.get('eval_duration')
+
+        except Exception as e:
+            # 취소(CancelledError)는 Exception이 아니라서 그대로 전파됨
+            error = str(e)
+            yield self._error_message(e)
+
+        finally:
+            if stream is not None:
+                # HTTP 연결을 닫아야 Ollama가 생성을 멈춤
+                await stream.aclose()
+            generation_stats = self._build_generation_stats(
+                started_at,
+                first_token_at,
+                time.perf_counter(),
+                chunk_count,
+                eval_count,
+                eval_duration,
+                error
+            )
+            self.last_generation_stats = generation_stats
+            if stats is not None:
+                stats.update(generation_stats)
 
-        # 출처 추출
+    def generate(
+        self,
+        question: str,
+        context: str,
+        game_state: Optional[GameState] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> str:
+        """
+        Ollama로 답변 생성
+
+        Args:
+            question: 사용자 질문
+            context: 검색된 전략 컨텍스트
+            game_state: 게임 상태 (선택)
+            temperature: 생성 온도
+            max_tokens: 최대 토큰 수
+
+        Returns:
+            생성된 답변
+        """
+        answer = "".join(self.generate_stream(
+            question,
+            context,
+            game_state,
+            temperature=temperature,
+            max_tokens=max_tokens
+        ))
+
+        print("=== 답변 생성 완료 ===\n")
+
+        return answer
+
+    @staticmethod
+    def _source_url(metadata: Dict) -> Optional[str]:
+        """타임스탬프 위치로 바로 가는 유튜브 링크 (영상 ID가 없으면 None)"""
+        video_id = metadata.get('video_id')
+        if not video_id:
+            return None
+        start_seconds = metadata.get('start_seconds')
+        if start_seconds in (None, ''):
+            return f"https://youtu.be/{video_id}"
+        return f"https://youtu.be/{video_id}?t={int(start_seconds)}"
+
+    @staticmethod
+    def _extract_sources(search_results: List[Dict]) -> List[Dict]:
+        """검색 결과에서 출처 정보 추출 (중복 제거)"""
         sources = []
         for result in search_results:
             metadata = result['metadata']
             source = {
                 "video_source": metadata.get('video_source', '알 수 없음'),
-                "timestamp": metadata.get('timestamp', '알 수 없음'),
+                "timestamp": metadata.get('timestamp') or '알 수 없음',
                 "game_stage": metadata.get('game_stage', '알 수 없음'),
-                "strategy_type": metadata.get('strategy_type', '알 수 없음')
+                "strategy_type": metadata.get('strategy_type', '알 수 없음'),
+                "url": TFTGenerator._source_url(metadata)
             }
             if source not in sources:  # 중복 제거
                 sources.append(source)
+        return sources
+
+    def generate_with_sources(
+        self,
+        question: str,
+        context: str,
+        search_results: List[Dict],
+        game_state: Optional[GameState] = None,
+        on_token: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """
+        답변과 함께 출처 정보도 반환
+
+        Args:
+            on_token: 지정하면 스트리밍으로 생성하면서 토큰마다 호출할 콜백
+
+        Returns:
+            {
+                "answer": "생성된 답변",
+                "sources": [{"video_source": "...", "timestamp": "..."}, ...],
+                "generation_stats": {"time_to_first_token": ..., "tokens_per_sec": ...}
+            }
+        """
+        # 답변 생성
+        if on_token is None:
+            answer = self.generate(question, context, game_state)
+        else:
+            answer_parts = []
+            for token in self.generate_stream(question, context, game_state):
+                answer_parts.append(token)
+                on_token(token)
+            answer = "".join(answer_parts)
 
         return {
             "answer": answer,
-            "sources": sources
+            "sources": self._extract_sources(search_results),
+            "generation_stats": self.last_generation_stats
         }
 
 
@@ -219,15 +460,17 @@ if __name__ == "__main__":
             question="지금 리롤해야 할까요 아니면 골드 모아야 할까요?"
         )
 
-        # 답변 생성
-        response = generator.generate(
+        # 답변 생성 (스트리밍)
+        print("\n=== 생성된 답변 ===")
+        for token in generator.generate_stream(
             question=game_state.question,
             context=test_context,
             game_state=game_state
-        )
+        ):
+            print(token, end="", flush=True)
+        print()
 
-        print("\n=== 생성된 답변 ===")
-        print(response)
+        print(f"\n({generator.format_generation_stats(generator.last_generation_stats)})")
 
     except ValueError as e:
         print(f"오류: {e}")
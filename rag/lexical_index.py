@@ -0,0 +1,259 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import math
+import threading
+import unicodedata
+
+import numpy as np
+
+
+class LexicalIndex:
+    """
+    한국어 글자 n-gram BM25 역색인
+
+    - 토큰: 공백/문장부호를 뺀 글자열의 n-gram ("무한의 대검" -> 무한, 한의, 의대, 대검)
+      띄어쓰기가 달라도 ("무한의대검") 같은 토큰이 나옴
+    - 저장: 문서별 (토큰 ID, 빈도) 배열을 이어붙인 CSR 형식 (npz 한 파일)
+    - 검색: 토큰별 posting 배열 (문서 번호, 빈도)을 NumPy로 한 번에 점수 계산
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ngram: int = 2,
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        """
+        Args:
+            path: 저장 파일 경로 (.npz, None이면 메모리에만 유지)
+            ngram: 글자 n-gram 크기
+            k1, b: BM25 파라미터
+        """
+        self.path = Path(path) if path else None
+        self.ngram = ngram
+        self.k1 = k1
+        self.b = b
+
+        self._vocab: Dict[str, int] = {}
+        self._doc_ids: List[str] = []
+        self._doc_index: Dict[str, int] = {}
+        # 문서 번호 -> (토큰 ID 배열, 빈도 배열), 삭제된 문서는 None
+        self._doc_terms: List[Optional[Tuple[np.ndarray, np.ndarray]]] = []
+        self._live_count = 0
+
+        # 검색용 posting (변경 후 첫 검색 때 다시 만듦)
+        self._postings: Optional[Dict[str, np.ndarray]] = None
+        self._dirty = False
+        self._lock = threading.RLock()
+
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return self._live_count
+
+    def tokenize(self, text: str) -> List[str]:
+        """글자 n-gram 토큰 (공백/문장부호 제거, 소문자)"""
+        text = unicodedata.normalize('NFC', text).lower()
+        chars = ''.join(char for char in text if char.isalnum() or char == '-')
+        if len(chars) < self.ngram:
+            return [chars] if chars else []
+        return [chars[i:i + self.ngram] for i in range(len(chars) - self.ngram + 1)]
+
+    def _encode(self, text: str, grow: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """텍스트 -> (토큰 ID 배열, 빈도 배열), grow=False면 모르는 토큰은 버림"""
+        counts: Dict[int, int] = {}
+        for token in self.tokenize(text):
+            term_id = self._vocab.get(token)
+            if term_id is None:
+                if not grow:
+                    continue
+                term_id = len(self._vocab)
+                self._vocab[token] = term_id
+            counts[term_id] = counts.get(term_id, 0) + 1
+
+        terms = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        tfs = np.fromiter(counts.values(), dtype=np.uint16, count=len(counts))
+        return terms, tfs
+
+    def add(self, ids: List[str], texts: List[str]):
+        """문서 추가 (같은 ID가 있으면 교체)"""
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                encoded = self._encode(text, grow=True)
+                index = self._doc_index.get(doc_id)
+                if index is None:
+                    self._doc_index[doc_id] = len(self._doc_ids)
+                    self._doc_ids.append(doc_id)
+                    self._doc_terms.append(encoded)
+                    self._live_count += 1
+                else:
+                    if self._doc_terms[index] is None:
+                        self._live_count += 1
+                    self._doc_terms[index] = encoded
+            self._dirty = True
+
+    def remove(self, ids: Iterable[str]):
+        """문서 삭제"""
+        with self._lock:
+            for doc_id in ids:
+                index = self._doc_index.pop(doc_id, None)
+                if index is not None and self._doc_terms[index] is not None:
+                    self._doc_terms[index] = None
+                    self._live_count -= 1
+                    self._dirty = True
+
+    def clear(self):
+        """색인 비우기"""
+        with self._lock:
+            self._vocab.clear()
+            self._doc_ids.clear()
+            self._doc_index.clear()
+            self._doc_terms.clear()
+            self._live_count = 0
+            self._postings = None
+            self._dirty = True
+
+    def _compact(self):
+        """삭제된 문서를 빼고 문서 번호를 다시 매김"""
+        if self._live_count == len(self._doc_ids):
+            return
+        keep = [i for i, terms in enumerate(self._doc_terms) if terms is not None]
+        self._doc_ids = [self._doc_ids[i] for i in keep]
+        self._doc_terms = [self._doc_terms[i] for i in keep]
+        self._doc_index = {doc_id: i for i, doc_id in enumerate(self._doc_ids)}
+
+    def _build_postings(self):
+        """문서별 배열 -> 토큰별 posting (CSR: indptr, docs, tfs)"""
+        self._compact()
+        num_docs = len(self._doc_terms)
+        lengths = np.array([len(terms) for terms, _ in self._doc_terms], dtype=np.int64)
+
+        if num_docs:
+            terms = np.concatenate([terms for terms, _ in self._doc_terms])
+            tfs = np.concatenate([tfs for _, tfs in self._doc_terms])
+            docs = np.repeat(np.arange(num_docs, dtype=np.int32), lengths)
+        else:
+            terms = np.zeros(0, dtype=np.int32)
+            tfs = np.zeros(0, dtype=np.uint16)
+            docs = np.zeros(0, dtype=np.int32)
+
+        order = np.argsort(terms, kind='stable')
+        indptr = np.zeros(len(self._vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self._vocab)), out=indptr[1:])
+
+        doc_lengths = np.bincount(docs, weights=tfs, minlength=num_docs).astype(np.float32)
+
+        self._postings = {
+            'indptr': indptr,
+            'docs': docs[order],
+            'tfs': tfs[order].astype(np.float32),
+            'doc_lengths': doc_lengths,
+            'avg_length': float(doc_lengths.mean()) if num_docs else 0.0
+        }
+        self._dirty = False
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """
+        BM25 검색
+
+        Returns:
+            [(문서 ID, 점수), ...] (점수 내림차순, 점수 0인 문서 제외)
+        """
+        with self._lock:
+            if self._dirty or self._postings is None:
+                self._build_postings()
+            postings = self._postings
+            doc_ids = self._doc_ids
+
+            num_docs = len(doc_ids)
+            if num_docs == 0 or top_k <= 0:
+                return []
+
+            terms, query_tfs = self._encode(query, grow=False)
+
+        indptr, docs, tfs = postings['indptr'], postings['docs'], postings['tfs']
+        norm = self.k1 * (1 - self.b + self.b * postings['doc_lengths'] / max(postings['avg_length'], 1e-9))
+
+        scores = np.zeros(num_docs, dtype=np.float32)
+        for term_id, query_tf in zip(terms, query_tfs):
+            start, end = indptr[term_id], indptr[term_id + 1]
+            if start == end:
+                continue
+            df = end - start
+            idf = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+            posting_docs = docs[start:end]
+            posting_tfs = tfs[start:end]
+            # 한 토큰의 posting 안에서 문서 번호는 겹치지 않음
+            scores[posting_docs] += (
+                float(query_tf) * idf * posting_tfs * (self.k1 + 1)
+                / (posting_tfs + norm[posting_docs])
+            )
+
+        top_k = min(top_k, num_docs)
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(doc_ids[i], float(scores[i])) for i in candidates if scores[i] > 0]
+
+    def save(self):
+        """npz 파일로 저장 (삭제된 문서는 정리)"""
+        if self.path is None:
+            return
+
+        with self._lock:
+            self._compact()
+            terms = [terms for terms, _ in self._doc_terms]
+            tfs = [tfs for _, tfs in self._doc_terms]
+            doc_ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+            np.cumsum([len(t) for t in terms], out=doc_ptr[1:])
+
+            vocab = sorted(self._vocab, key=self._vocab.get)
+            arrays = {
+                'params': np.array([self.ngram, self.k1, self.b], dtype=np.float64),
+                'vocab': np.array(vocab, dtype=f'<U{max(self.ngram, 1)}'),
+                'doc_ids': np.array(self._doc_ids, dtype=str) if self._doc_ids else np.zeros(0, dtype='<U1'),
+                'doc_ptr': doc_ptr,
+                'doc_terms': np.concatenate(terms) if terms else np.zeros(0, dtype=np.int32),
+                'doc_tfs': np.concatenate(tfs) if tfs else np.zeros(0, dtype=np.uint16)
+            }
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        tmp_path.replace(self.path)
+
+    def load(self):
+        """npz 파일에서 불러오기 (n-gram 크기가 다르면 비운 상태로 시작)"""
+        with np.load(self.path, allow_pickle=False) as data:
+            ngram = int(data['params'][0])
+            if ngram != self.ngram:
+                print(f"[!] 색인 n-gram 크기가 달라서 ({ngram} != {self.ngram}) 다시 만들어야 합니다.")
+                return
+
+            with self._lock:
+                self._vocab = {str(token): i for i, token in enumerate(data['vocab'])}
+                self._doc_ids = [str(doc_id) for doc_id in data['doc_ids']]
+                self._doc_index = {doc_id: i for i, doc_id in enumerate(self._doc_ids)}
+
+                doc_ptr = data['doc_ptr']
+                doc_terms = data['doc_terms']
+                doc_tfs = data['doc_tfs']
+                self._doc_terms = [
+                    (doc_terms[doc_ptr[i]:doc_ptr[i + 1]], doc_tfs[doc_ptr[i]:doc_ptr[i + 1]])
+                    for i in range(len(self._doc_ids))
+                ]
+                self._live_count = len(self._doc_ids)
+                self._dirty = True
+
+    def stats(self) -> Dict:
+        """색인 통계"""
+        with self._lock:
+            postings = sum(len(entry[0]) for entry in self._doc_terms if entry is not None)
+            return {
+                'documents': self._live_count,
+                'vocabulary': len(self._vocab),
+                'postings': postings,
+                'path': str(self.path) if self.path else None
+            }
@@ -0,0 +1,702 @@
+"""
+프로세스 안에서 동작하는 NumPy 벡터 인덱스 (ChromaDB 대체 백엔드)
+
+수만 개 청크 규모에서는 HNSW 없이 전체 행렬 곱 한 번으로 정확한 검색이 충분히 빠릅니다.
+TFTVectorStore가 쓰는 ChromaDB Collection 메서드(count/upsert/update/delete/get/query)를
+같은 형식으로 구현하므로 TFTVectorStore의 나머지 코드는 그대로 씁니다.
+
+저장 파일 (persist_directory 안):
+    {컬렉션}.vectors.f32 / .f16  정규화된 임베딩 행렬 (mmap, 행 = 청크)
+    {컬렉션}.records.npz         ID, 문서, 메타데이터 컬럼
+    {컬렉션}.int8.npz / .float16.npz  양자화 사본 (quantization을 쓸 때만)
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import mmap
+import threading
+
+import numpy as np
+
+from rag.where import RANGE_OPERATORS, evaluate_where, is_number
+
+
+# 저장 dtype 이름 -> (NumPy dtype, 파일 확장자)
+VECTOR_DTYPES = {
+    'float32': (np.float32, 'f32'),
+    'float16': (np.float16, 'f16'),
+}
+
+# 메모리에 올려두는 양자화 사본 dtype (1차 검색용)
+QUANTIZATIONS = {
+    'int8': np.int8,
+    'float16': np.float16,
+}
+
+# float32가 아닌 행렬은 이만큼씩 float32로 바꿔서 곱함 (CPU 캐시에 들어가는 크기)
+SCORE_BLOCK_ROWS = 512
+
+
+class MetadataColumn:
+    """
+    메타데이터 키 하나의 컬럼 배열
+
+    - 문자열/불리언: vocab 번호 (codes)
+    - 정수/실수: numbers (float64)
+    - kinds: 행마다 값 종류 (MISSING/CODE/INT/FLOAT)
+    """
+
+    MISSING, CODE, INT, FLOAT = 0, 1, 2, 3
+
+    def __init__(self, capacity: int):
+        self.kinds = np.zeros(capacity, dtype=np.uint8)
+        self.numbers = np.zeros(capacity, dtype=np.float64)
+        self.codes = np.full(capacity, -1, dtype=np.int32)
+        self.vocab: List = []
+        self.vocab_index: Dict = {}
+
+    def resize(self, capacity: int):
+        size = len(self.kinds)
+        self.kinds = np.concatenate([self.kinds, np.zeros(capacity - size, dtype=np.uint8)])
+        self.numbers = np.concatenate([self.numbers, np.zeros(capacity - size, dtype=np.float64)])
+        self.codes = np.concatenate([self.codes, np.full(capacity - size, -1, dtype=np.int32)])
+
+    def set(self, row: int, value):
+        if value is None:
+            self.clear(row)
+        elif isinstance(value, (str, bool)):
+            code = self.vocab_index.get(value)
+            if code is None:
+                code = len(self.vocab)
+                self.vocab.append(value)
+                self.vocab_index[value] = code
+            self.kinds[row] = self.CODE
+            self.codes[row] = code
+        elif isinstance(value, (int, float)):
+            self.kinds[row] = self.INT if isinstance(value, int) else self.FLOAT
+            self.codes[row] = -1
+            self.numbers[row] = value
+        else:
+            raise ValueError(f"지원하지 않는 메타데이터 값: {value!r}")
+
+    def clear(self, row: int):
+        self.kinds[row] = self.MISSING
+        self.codes[row] = -1
+
+    def get(self, row: int):
+        kind = self.kinds[row]
+        if kind == self.CODE:
+            return self.vocab[self.codes[row]]
+        if kind == self.INT:
+            return int(self.numbers[row])
+        if kind == self.FLOAT:
+            return float(self.numbers[row])
+        return None
+
+    def _equals(self, value, count: int) -> np.ndarray:
+        if is_number(value):
+            return (self.kinds[:count] >= self.INT) & (self.numbers[:count] == value)
+        return self.codes[:count] == self.vocab_index.get(value, -2)
+
+    def mask(self, op: str, operand, count: int) -> np.ndarray:
+        """조건 하나 (예: "$gte", 30)를 만족하는 행 (규칙은 rag.where, 검사는 evaluate_where에서)"""
+        present = self.kinds[:count] != self.MISSING
+        if op == '$eq':
+            return self._equals(operand, count)
+        if op == '$ne':
+            return present & ~self._equals(operand, count)
+        if op in ('$in', '$nin'):
+            matched = np.zeros(count, dtype=bool)
+            for value in operand:
+                matched |= self._equals(value, count)
+            return matched if op == '$in' else present & ~matched
+        compare = RANGE_OPERATORS[op]
+        return (self.kinds[:count] >= self.INT) & compare(self.numbers[:count], operand)
+
+
+class NumpyCollection:
+    """
+    ChromaDB Collection과 같은 형식의 메서드를 가진 NumPy 인덱스
+
+    - 검색: 쿼리 배치와 전체 행렬의 내적 한 번 + 필터 마스크 + argpartition (정확한 검색)
+    - 필터: where 문법($and/$or/$eq/$ne/$in/$nin/$gt/$gte/$lt/$lte)을 컬럼 배열의 불리언 마스크로 계산
+    - 거리: 코사인 거리 (1 - 코사인 유사도, ChromaDB "hnsw:space": "cosine"과 같음)
+
+    변경 사항은 메모리와 memmap에 바로 반영되고, persist()를 호출해야 파일에 기록됩니다.
+
+    quantization을 쓰면 메모리에는 작은 사본(int8은 차원별 scale, 또는 float16)만 두고
+    1차 검색을 그 사본으로 한 뒤, 상위 후보(n_results x rescore_factor개)만
+    memmap의 원본 벡터로 다시 계산합니다. 원본 행렬은 후보 행만 디스크에서 읽습니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        persist_directory: str,
+        dtype: str = 'float32',
+        quantization: Optional[str] = None,
+        rescore_factor: int = 4
+    ):
+        """
+        Args:
+            name: 컬렉션 이름 (파일 이름 앞부분)
+            persist_directory: 저장 경로
+            dtype: 임베딩 저장 dtype ("float32" 또는 "float16")
+            quantization: 1차 검색용 양자화 사본 (None, "int8", "float16")
+            rescore_factor: 원본 벡터로 다시 계산할 후보 배수 (n_results x rescore_factor)
+        """
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"지원하지 않는 dtype: {dtype} (가능: {list(VECTOR_DTYPES)})")
+        if quantization is not None and quantization not in QUANTIZATIONS:
+            raise ValueError(f"지원하지 않는 양자화: {quantization} (가능: {list(QUANTIZATIONS)})")
+
+        self.name = name
+        self.persist_directory = Path(persist_directory)
+        self.dtype = dtype
+        self.quantization = quantization
+        self.rescore_factor = max(rescore_factor, 1)
+        self.records_path = self.persist_directory / f"{name}.records.npz"
+
+        self._dim: Optional[int] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._vectors: Optional[np.ndarray] = None  # self._mmap 위의 (capacity, dim) 배열
+        self._capacity = 0
+        self._count = 0  # 사용한 행 수 (삭제된 행 포함)
+
+        self._ids: List[Optional[str]] = []
+        self._row_index: Dict[str, int] = {}
+        self._documents: List[Optional[str]] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._columns: Dict[str, MetadataColumn] = {}
+
+        # 양자화 사본 (capacity행, 메모리) + int8 차원별 scale
+        self._quantized: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._requantize = False  # scale 범위를 넘은 값이 잘렸으면 persist 때 다시 양자화
+
+        self._lock = threading.RLock()
+        self._dirty = False
+        # 데이터가 바뀔 때마다 증가 (양자화 사본이 어느 시점 데이터로 만들어졌는지 확인용)
+        self._version = 0
+
+        if self.records_path.exists():
+            self._load()
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.persist_directory / f"{self.name}.vectors.{VECTOR_DTYPES[self.dtype][1]}"
+
+    @property
+    def quantized_path(self) -> Optional[Path]:
+        if self.quantization is None:
+            return None
+        return self.persist_directory / f"{self.name}.{self.quantization}.npz"
+
+    # ===== 저장 공간 =====
+
+    def _open_vectors(self, capacity: int):
+        """memmap 파일을 capacity행 크기로 열기 (파일이 작으면 늘림)"""
+        np_dtype = VECTOR_DTYPES[self.dtype][0]
+        size = capacity * self._dim * np.dtype(np_dtype).itemsize
+
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._vectors = None
+            self._mmap = None
+
+        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        mode = 'r+b' if self.vectors_path.exists() else 'w+b'
+        with open(self.vectors_path, mode) as f:
+            f.seek(0, 2)
+            if f.tell() < size:
+                f.truncate(size)
+            self._mmap = mmap.mmap(f.fileno(), size)
+
+        if self.quantization is not None and hasattr(mmap, 'MADV_RANDOM'):
+            # 원본은 후보 행 몇 개만 읽으므로 주변 페이지까지 미리 읽지 않음 (메모리 절약)
+            self._mmap.madvise(mmap.MADV_RANDOM)
+        self._vectors = np.ndarray((capacity, self._dim), dtype=np_dtype, buffer=self._mmap)
+        self._capacity = capacity
+
+    def _reserve(self, rows: int):
+        """행 rows개를 더 쓸 수 있도록 배열 늘리기 (2배씩)"""
+        needed = self._count + rows
+        if needed <= self._capacity:
+            return
+
+        capacity = max(self._capacity * 2, needed, 1024)
+        self._open_vectors(capacity)
+        self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), dtype=bool)])
+        for column in self._columns.values():
+            column.resize(capacity)
+        if self.quantization is not None:
+            quantized = np.zeros((capacity, self._dim), dtype=QUANTIZATIONS[self.quantization])
+            if self._quantized is not None:
+                quantized[:len(self._quantized)] = self._quantized
+            self._quantized = quantized
+
+    def _column(self, key: str) -> MetadataColumn:
+        column = self._columns.get(key)
+        if column is None:
+            column = MetadataColumn(self._capacity)
+            self._columns[key] = column
+        return column
+
+    @staticmethod
+    def _normalize(embeddings) -> np.ndarray:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    # ===== 양자화 =====
+
+    def _quantize_rows(self, rows, vectors: np.ndarray):
+        """정규화된 벡터를 양자화 사본에 기록"""
+        if self.quantization == 'float16':
+            self._quantized[rows] = vectors.astype(np.float16)
+            return
+
+        if self._scales is None:
+            self._scales = np.maximum(np.abs(vectors).max(axis=0), 1e-6).astype(np.float32) / 127
+        codes = np.rint(vectors / self._scales)
+        if np.abs(codes).max(initial=0) > 127:
+            self._requantize = True
+        self._quantized[rows] = np.clip(codes, -127, 127).astype(np.int8)
+
+    def _rebuild_quantized(self):
+        """원본 행렬 전체로 scale을 다시 구하고 양자화 사본 다시 만들기"""
+        count = self._count
+        if self.quantization == 'int8':
+            self._scales = None
+            if count:
+                max_abs = np.zeros(self._dim, dtype=np.float32)
+                for start in range(0, count, SCORE_BLOCK_ROWS):
+                    block = np.asarray(self._vectors[start:min(start + SCORE_BLOCK_ROWS, count)], dtype=np.float32)
+                    np.maximum(max_abs, np.abs(block).max(axis=0), out=max_abs)
+                self._scales = np.maximum(max_abs, 1e-6) / 127
+
+        for start in range(0, count, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, count)
+            self._quantize_rows(slice(start, end), np.asarray(self._vectors[start:end], dtype=np.float32))
+        self._requantize = False
+        self._dirty = True
+
+    # ===== Collection 메서드 =====
+
+    def count(self) -> int:
+        return len(self._row_index)
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings,
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict]] = None
+    ):
+        """추가 (같은 ID가 있으면 임베딩/문서/메타데이터를 모두 교체)"""
+        vectors = self._normalize(embeddings)
+        if len(vectors) != len(ids):
+            raise ValueError("ID 수와 임베딩 수가 다릅니다.")
+
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"임베딩 차원이 다릅니다: {vectors.shape[1]} != {self._dim}")
+
+            new_ids = [chunk_id for chunk_id in dict.fromkeys(ids) if chunk_id not in self._row_index]
+            self._reserve(len(new_ids))
+
+            rows = []
+            for i, chunk_id in enumerate(ids):
+                row = self._row_index.get(chunk_id)
+                if row is None:
+                    row = self._count
+                    self._count += 1
+                    self._row_index[chunk_id] = row
+                    self._ids.append(chunk_id)
+                    self._documents.append(None)
+                    self._alive[row] = True
+                rows.append(row)
+
+                self._documents[row] = documents[i] if documents is not None else None
+                metadata = metadatas[i] if metadatas is not None else None
+                for key, column in self._columns.items():
+                    if not metadata or key not in metadata:
+                        column.clear(row)
+                for key, value in (metadata or {}).items():
+                    self._column(key).set(row, value)
+
+            self._vectors[rows] = vectors
+            if self._quantized is not None:
+                self._quantize_rows(rows, vectors)
+            self._version += 1
+            self._dirty = True
+
+    def update(
+        self,
+        ids: List[str],
+        embeddings=None,
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict]] = None
+    ):
+        """기존 청크 갱신 (메타데이터는 기존 필드에 합침, 없는 ID는 무시)"""
+        vectors = self._normalize(embeddings) if embeddings is not None else None
+
+        with self._lock:
+            for i, chunk_id in enumerate(ids):
+                row = self._row_index.get(chunk_id)
+                if row is None:
+                    continue
+                if vectors is not None:
+                    self._vectors[row] = vectors[i]
+                    if self._quantized is not None:
+                        self._quantize_rows([row], vectors[i:i + 1])
+                if documents is not None:
+                    self._documents[row] = documents[i]
+                if metadatas is not None:
+                    for key, value in metadatas[i].items():
+                        self._column(key).set(row, value)
+            self._version += 1
+            self._dirty = True
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        """ID 또는 where 조건으로 삭제 (행은 persist() 때 정리)"""
+        with self._lock:
+            if where is not None:
+                rows = np.flatnonzero(self._mask(where))
+                ids = [self._ids[row] for row in rows if ids is None or self._ids[row] in ids]
+            for chunk_id in ids or []:
+                row = self._row_index.pop(chunk_id, None)
+                if row is not None:
+                    self._alive[row] = False
+                    self._documents[row] = None
+            self._version += 1
+            self._dirty = True
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict:
+        """ID/where 조건으로 조회 (저장 순서)"""
+        include = include if include is not None else ["metadatas", "documents"]
+
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_index[chunk_id] for chunk_id in ids if chunk_id in self._row_index]
+                if where is not None:
+                    mask = self._mask(where)
+                    rows = [row for row in rows if mask[row]]
+            else:
+                rows = np.flatnonzero(self._mask(where)).tolist()
+
+            start = offset or 0
+            rows = rows[start:start + limit] if limit is not None else rows[start:]
+            return self._rows_result(rows, include)
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: Optional[Dict] = None,
+        include: Optional[List[str]] = None
+    ) -> Dict:
+        """코사인 유사도 상위 n_results개 (정확한 검색, 모든 쿼리에 같은 필터)"""
+        queries = self._normalize(query_embeddings)
+        return self.query_many(queries, [where] * len(queries), n_results, include)
+
+    def query_many(
+        self,
+        query_embeddings,
+        wheres: List[Optional[Dict]],
+        n_results: int = 10,
+        include: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        쿼리마다 다른 필터로 검색 (ChromaDB에는 없는 메서드)
+
+        전체 행렬과 모든 쿼리의 내적을 한 번에 계산하고,
+        쿼리별로 필터 마스크를 통과한 행 중에서 argpartition으로 상위 n_results개를 고릅니다.
+        같은 필터는 마스크를 한 번만 계산합니다.
+
+        양자화 사본이 있으면 사본으로 후보 n_results x rescore_factor개를 고르고
+        그 후보만 원본 벡터로 다시 계산해서 순위를 정합니다.
+        """
+        include = include if include is not None else ["metadatas", "documents", "distances"]
+        queries = self._normalize(query_embeddings)
+        if len(wheres) != len(queries):
+            raise ValueError("쿼리 수와 필터 수가 다릅니다.")
+        results = {key: [] for key in ['ids', *include]}
+
+        with self._lock:
+            count = self._count
+            masks: Dict[str, np.ndarray] = {}
+            for where in wheres:
+                key = json.dumps(where, sort_keys=True, ensure_ascii=False)
+                if key not in masks:
+                    masks[key] = np.flatnonzero(self._mask(where))
+
+            scores = None
+            if count and self._quantized is not None:
+                # int8: (codes * scale) . q = codes . (q * scale)
+                scaled = queries * self._scales if self._scales is not None else queries
+                scores = self._scores(self._quantized[:count], scaled)
+            elif count:
+                scores = self._scores(self._vectors[:count], queries)
+
+            for q, where in enumerate(wheres):
+                rows = masks[json.dumps(where, sort_keys=True, ensure_ascii=False)]
+                if len(rows) > 0 and n_results > 0:
+                    if self._quantized is not None:
+                        rows = self._top_rows(rows, scores[rows, q], n_results * self.rescore_factor)
+                        rows.sort()  # memmap을 파일 순서대로 읽도록
+                        candidate_scores = self._scores(self._vectors[rows], queries[q:q + 1])[:, 0]
+                    else:
+                        candidate_scores = scores[rows, q]
+                    top_k = min(n_results, len(rows))
+                    top = np.argpartition(-candidate_scores, top_k - 1)[:top_k]
+                    top = top[np.argsort(-candidate_scores[top], kind='stable')]
+                    query_rows = rows[top].tolist()
+                    query_scores = candidate_scores[top]
+                else:
+                    query_rows, query_scores = [], np.zeros(0, dtype=np.float32)
+
+                row_result = self._rows_result(query_rows, [key for key in include if key != 'distances'])
+                for key, values in row_result.items():
+                    results[key].append(values)
+                if 'distances' in include:
+                    results['distances'].append((1.0 - query_scores).tolist())
+
+        return results
+
+    # ===== 내부 =====
+
+    @staticmethod
+    def _top_rows(rows: np.ndarray, scores: np.ndarray, top_k: int) -> np.ndarray:
+        """점수 상위 top_k개 행 (순서 없음)"""
+        if top_k >= len(rows):
+            return rows.copy()
+        return rows[np.argpartition(-scores, top_k - 1)[:top_k]]
+
+    @staticmethod
+    def _scores(vectors: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """(행 수, 쿼리 수) 내적 (float32가 아닌 행렬은 블록 단위로 float32 변환)"""
+        if vectors.dtype == np.float32:
+            return np.asarray(vectors @ queries.T)
+        # 캐시에 들어가는 작은 블록을 같은 버퍼에 변환해서 곱함
+        scores = np.empty((len(vectors), len(queries)), dtype=np.float32)
+        buffer = np.empty((min(SCORE_BLOCK_ROWS, len(vectors)), vectors.shape[1]), dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+            block = vectors[start:start + SCORE_BLOCK_ROWS]
+            converted = buffer[:len(block)]
+            converted[...] = block
+            np.matmul(converted, queries.T, out=scores[start:start + len(block)])
+        return scores
+
+    def _mask(self, where: Optional[Dict]) -> np.ndarray:
+        """where 조건을 만족하는 살아있는 행 (길이: 사용한 행 수)"""
+        mask = self._alive[:self._count].copy()
+        if where:
+            mask &= self._evaluate(where)
+        return mask
+
+    def _evaluate(self, where: Dict) -> np.ndarray:
+        count = self._count
+
+        def match_field(key, op, operand):
+            column = self._columns.get(key)
+            if column is None:
+                # 필드가 없으면 $ne/$nin도 만족하지 않음
+                return np.zeros(count, dtype=bool)
+            return column.mask(op, operand, count)
+
+        return evaluate_where(where, match_field, np.ones(count, dtype=bool), np.zeros(count, dtype=bool))
+
+    def _rows_result(self, rows: List[int], include: List[str]) -> Dict:
+        result = {'ids': [self._ids[row] for row in rows]}
+        if 'documents' in include:
+            result['documents'] = [self._documents[row] for row in rows]
+        if 'metadatas' in include:
+            result['metadatas'] = [self._row_metadata(row) for row in rows]
+        if 'embeddings' in include:
+            result['embeddings'] = np.asarray(self._vectors[rows], dtype=np.float32) if rows else []
+        return result
+
+    def _row_metadata(self, row: int) -> Dict:
+        metadata = {}
+        for key, column in self._columns.items():
+            if column.kinds[row] != MetadataColumn.MISSING:
+                metadata[key] = column.get(row)
+        return metadata
+
+    def _compact(self):
+        """삭제된 행을 빼고 앞으로 당기기"""
+        keep = np.flatnonzero(self._alive[:self._count])
+        if len(keep) == self._count:
+            return
+
+        size = len(keep)
+        if size:
+            self._vectors[:size] = self._vectors[keep]
+            if self._quantized is not None:
+                self._quantized[:size] = self._quantized[keep]
+        for column in self._columns.values():
+            column.kinds[:size] = column.kinds[keep]
+            column.numbers[:size] = column.numbers[keep]
+            column.codes[:size] = column.codes[keep]
+            column.kinds[size:self._count] = MetadataColumn.MISSING
+        self._ids = [self._ids[row] for row in keep]
+        self._documents = [self._documents[row] for row in keep]
+        self._row_index = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._alive[:size] = True
+        self._alive[size:self._count] = False
+        self._count = size
+
+    # ===== 파일 저장/로드 =====
+
+    def persist(self):
+        """memmap flush + ID/문서/메타데이터 (+ 양자화 사본) 저장 (삭제된 행 정리)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._compact()
+            if self._mmap is not None:
+                self._mmap.flush()
+            if self._quantized is not None:
+                if self._requantize:
+                    self._rebuild_quantized()
+                self._save_quantized()
+
+            keys = list(self._columns)
+            count = self._count
+            arrays = {
+                'header': np.array(json.dumps({
+                    'dim': self._dim,
+                    'dtype': self.dtype,
+                    'count': count,
+                    'keys': keys,
+                    'version': self._version
+                })),
+                'ids': np.array(self._ids, dtype=str) if count else np.zeros(0, dtype='<U1'),
+                'documents': np.array([doc or '' for doc in self._documents], dtype=str) if count else np.zeros(0, dtype='<U1')
+            }
+            for i, key in enumerate(keys):
+                column = self._columns[key]
+                arrays[f'kinds_{i}'] = column.kinds[:count]
+                arrays[f'numbers_{i}'] = column.numbers[:count]
+                arrays[f'codes_{i}'] = column.codes[:count]
+                arrays[f'vocab_{i}'] = np.array(json.dumps(column.vocab, ensure_ascii=False))
+            self._dirty = False
+
+        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.records_path.with_name(self.records_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        tmp_path.replace(self.records_path)
+
+    def _load(self):
+        with np.load(self.records_path, allow_pickle=False) as data:
+            header = json.loads(str(data['header']))
+            if header['dtype'] != self.dtype:
+                print(f"[!] 저장된 인덱스 dtype({header['dtype']})을 그대로 사용합니다 (설정: {self.dtype}).")
+                self.dtype = header['dtype']
+
+            count = header['count']
+            self._dim = header['dim']
+            self._ids = [str(chunk_id) for chunk_id in data['ids']]
+            self._documents = [str(doc) for doc in data['documents']]
+            self._row_index = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            self._count = count
+
+            if self._dim is None:
+                return
+
+            # 파일 크기만큼 열기 (upsert 중 늘어난 여유 행 포함)
+            itemsize = np.dtype(VECTOR_DTYPES[self.dtype][0]).itemsize
+            file_rows = self.vectors_path.stat().st_size // (self._dim * itemsize) if self.vectors_path.exists() else 0
+            self._open_vectors(max(file_rows, count, 1024))
+            self._alive = np.zeros(self._capacity, dtype=bool)
+            self._alive[:count] = True
+
+            for i, key in enumerate(header['keys']):
+                column = MetadataColumn(self._capacity)
+                column.kinds[:count] = data[f'kinds_{i}']
+                column.numbers[:count] = data[f'numbers_{i}']
+                column.codes[:count] = data[f'codes_{i}']
+                column.vocab = json.loads(str(data[f'vocab_{i}']))
+                column.vocab_index = {value: code for code, value in enumerate(column.vocab)}
+                self._columns[key] = column
+
+            self._version = header.get('version', 0)
+            if self.quantization is not None:
+                self._load_quantized()
+
+    def _save_quantized(self):
+        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.quantized_path.with_name(self.quantized_path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                codes=self._quantized[:self._count],
+                scales=self._scales if self._scales is not None else np.zeros(0, dtype=np.float32),
+                version=np.array(self._version)
+            )
+        tmp_path.replace(self.quantized_path)
+
+    def _load_quantized(self):
+        """저장된 양자화 사본 읽기 (없거나 다른 시점 데이터로 만들어졌으면 원본 행렬로 다시 만듦)"""
+        self._quantized = np.zeros((self._capacity, self._dim), dtype=QUANTIZATIONS[self.quantization])
+        if self.quantized_path.exists():
+            with np.load(self.quantized_path, allow_pickle=False) as stored:
+                codes = stored['codes']
+                if (
+                    int(stored['version']) == self._version
+                    and codes.shape == (self._count, self._dim)
+                    and codes.dtype == self._quantized.dtype
+                ):
+                    self._quantized[:self._count] = codes
+                    self._scales = stored['scales'] if len(stored['scales']) else None
+                    return
+
+        print(f"양자화 사본({self.quantization}) 생성 중: {self._count}개 벡터")
+        self._rebuild_quantized()
+
+    def delete_files(self):
+        """인덱스 파일 삭제 (컬렉션 삭제용)"""
+        with self._lock:
+            self._vectors = None
+            self._mmap = None
+            self.vectors_path.unlink(missing_ok=True)
+            self.records_path.unlink(missing_ok=True)
+            if self.quantized_path is not None:
+                self.quantized_path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict:
+        """인덱스 통계 (행렬/양자화 사본/컬럼 메모리 크기 포함)"""
+        with self._lock:
+            vector_bytes = self._count * (self._dim or 0) * np.dtype(VECTOR_DTYPES[self.dtype][0]).itemsize
+            quantized_bytes = 0
+            if self._quantized is not None:
+                quantized_bytes = self._count * self._dim * self._quantized.itemsize
+            column_bytes = sum(
+                column.kinds.nbytes + column.numbers.nbytes + column.codes.nbytes
+                for column in self._columns.values()
+            )
+            return {
+                'backend': 'numpy',
+                'dtype': self.dtype,
+                'dim': self._dim,
+                'rows': self.count(),
+                'vector_bytes': vector_bytes,
+                'quantization': self.quantization,
+                'quantized_bytes': quantized_bytes,
+                'metadata_column_bytes': column_bytes,
+                'path': str(self.vectors_path)
+            }
@@ -0,0 +1,151 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from data.chunk_features import difficulty_rank, patch_number, stage_ordinal
+from data.metadata_schema import GameState
+
+
+class FeatureReranker:
+    """
+    숫자 특징 기반 재정렬 (NumPy)
+
+    후보마다 특징 벡터를 만들고 가중치와 내적해서 점수를 계산합니다.
+    특징은 수집 시 미리 계산된 메타데이터(patch_num, difficulty_rank, stage_ordinal)를
+    그대로 쓰고, 없으면 (마이그레이션 전 청크) 원래 필드에서 계산합니다.
+
+    특징:
+        patch: patch_num (13.24 -> 1324, 최신 패치 우선)
+        stage_match: 현재 라운드와 stage_ordinal이 같으면 1 (라운드 번호가 없으면 game_stage 문자열 비교)
+        stage_distance: 현재 라운드와의 stage_ordinal 차이 (가중치를 음수로 주면 가까운 라운드 우선)
+        difficulty: 난이도 점수 (입문 100 / 초보 80 / 중급 50 / 고급 20)
+        relevance: 검색 점수 (RRF 점수 x 300, 없으면 -distance x 10)
+    """
+
+    FEATURES = ['patch', 'stage_match', 'stage_distance', 'difficulty', 'relevance']
+
+    # 기존 재정렬 점수와 같은 결과가 나오는 기본 가중치
+    DEFAULT_WEIGHTS = {
+        'patch': 1.0,
+        'stage_match': 1000.0,
+        'stage_distance': 0.0,
+        'difficulty': 1.0,
+        'relevance': 1.0
+    }
+
+    # difficulty_rank (0~3) -> 난이도 점수
+    DIFFICULTY_SCORES = np.array([100.0, 80.0, 50.0, 20.0], dtype=np.float32)
+
+    # RRF 점수(1위 두 번 = 2/61)를 거리 점수(-distance * 10)와 비슷한 범위로 맞추는 배율
+    RRF_SCORE_SCALE = 300
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            weights: 특징별 가중치 (빠진 특징은 DEFAULT_WEIGHTS 값)
+        """
+        merged = dict(self.DEFAULT_WEIGHTS)
+        if weights:
+            unknown = set(weights) - set(self.FEATURES)
+            if unknown:
+                raise ValueError(f"알 수 없는 재정렬 특징: {sorted(unknown)}")
+            merged.update(weights)
+        self.weights = merged
+        self._weight_vector = np.array([merged[name] for name in self.FEATURES], dtype=np.float32)
+
+    @staticmethod
+    def _numeric(metadata: Dict, key: str, fallback) -> float:
+        """미리 계산된 숫자 필드, 없으면 fallback()으로 계산 (둘 다 없으면 NaN)"""
+        value = metadata.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        value = fallback()
+        return float(value) if value is not None else np.nan
+
+    def build_features(self, results: List[Dict], game_state: Optional[GameState] = None) -> np.ndarray:
+        """
+        후보 결과 -> (후보 수, 특징 수) 행렬
+
+        메타데이터에서 숫자를 모으는 부분만 Python이고 나머지는 배열 연산입니다.
+        """
+        count = len(results)
+        patch = np.empty(count, dtype=np.float32)
+        ordinal = np.empty(count, dtype=np.float32)
+        stages = []
+        rank = np.empty(count, dtype=np.float32)
+        rrf = np.empty(count, dtype=np.float32)
+        distance = np.empty(count, dtype=np.float32)
+
+        for i, result in enumerate(results):
+            metadata = result['metadata']
+            patch[i] = self._numeric(metadata, 'patch_num', lambda: patch_number(metadata.get('patch', '0.0')))
+            ordinal[i] = self._numeric(metadata, 'stage_ordinal', lambda: stage_ordinal(metadata.get('game_stage')))
+            stages.append(metadata.get('game_stage'))
+            rank[i] = self._numeric(
+                metadata, 'difficulty_rank',
+                lambda: difficulty_rank(metadata.get('difficulty', '초보'))
+            )
+            rrf[i] = result['rrf_score'] if result.get('rrf_score') is not None else np.nan
+            distance[i] = result['distance'] if result.get('distance') is not None else np.nan
+
+        features = np.zeros((count, len(self.FEATURES)), dtype=np.float32)
+
+        # 패치 (형식이 잘못된 패치는 0점)
+        features[:, 0] = np.nan_to_num(patch, nan=0.0)
+
+        # 현재 라운드와의 관계
+        # (어느 한쪽이라도 라운드 번호가 없으면 game_stage 문자열이 같은지로 판단)
+        if game_state:
+            current = stage_ordinal(game_state.round)
+            same_stage = np.array([stage == game_state.round for stage in stages], dtype=bool)
+            if current is None:
+                features[:, 1] = same_stage
+            else:
+                known = ~np.isnan(ordinal)
+                features[:, 1] = np.where(known, ordinal == current, same_stage)
+                features[:, 2] = np.where(known, np.abs(ordinal - current), 0.0)
+
+        # 난이도 (모르는 난이도는 0점)
+        known_rank = ~np.isnan(rank)
+        indices = np.clip(np.nan_to_num(rank, nan=0.0).astype(np.int64), 0, len(self.DIFFICULTY_SCORES) - 1)
+        features[:, 3] = np.where(known_rank, self.DIFFICULTY_SCORES[indices], 0.0)
+
+        # 검색 점수 (RRF 우선, 없으면 거리)
+        features[:, 4] = np.where(
+            ~np.isnan(rrf),
+            np.nan_to_num(rrf) * self.RRF_SCORE_SCALE,
+            -np.nan_to_num(distance) * 10
+        )
+
+        return features
+
+    def score(self, results: List[Dict], game_state: Optional[GameState] = None) -> np.ndarray:
+        """후보별 점수"""
+        if not results:
+            return np.zeros(0, dtype=np.float32)
+        return self.build_features(results, game_state) @ self._weight_vector
+
+    def rerank(
+        self,
+        results: List[Dict],
+        game_state: Optional[GameState] = None,
+        top_k: int = 3
+    ) -> List[Dict]:
+        """
+        점수 상위 top_k개 (argpartition으로 전체 정렬 없이)
+
+        Returns:
+            점수 내림차순 결과 (같은 점수면 원래 순서 유지)
+        """
+        if not results or top_k <= 0:
+            return []
+
+        scores = self.score(results, game_state)
+        top_k = min(top_k, len(results))
+        if top_k < len(results):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(results))
+        # 원래 순서를 두 번째 키로 써서 안정 정렬
+        order = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [results[i] for i in order]
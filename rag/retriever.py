@@ -1,37 +1,57 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from rag.vector_store import TFTVectorStore
 from data.metadata_schema import GameState
+from data.chunk_features import stage_range
+from rag.reranker import FeatureReranker
+import json
 import re
 
+import numpy as np
+
 
 class TFTRetriever:
     """
     롤체 전략 검색기
-    - Hybrid Search (벡터 + 메타데이터 필터)
+    - Hybrid Search (벡터 + BM25 역색인 + 메타데이터 필터, RRF로 결합)
     - 쿼리 분석 및 필터 자동 생성
     - 재정렬 (Reranking)
     """
     
+    # 필터 완화 단계 (결과마다 relaxation_level로 기록, 숫자가 클수록 느슨함)
+    RELAXATION_LEVELS = ['exact', 'stage', 'neighbour_stages', 'unfiltered']
+    
     def __init__(
         self,
         vector_store: TFTVectorStore,
         top_k: int = 5,
-        rerank_top_k: int = 3
+        rerank_top_k: int = 3,
+        lexical_top_k: int = 5,
+        rrf_k: int = 60,
+        stage_range_rounds: int = 2,
+        rerank_weights: Optional[Dict[str, float]] = None
     ):
         """
         Args:
             vector_store: TFTVectorStore 인스턴스
-            top_k: 초기 검색 결과 개수
+            top_k: 벡터 검색 결과 개수
             rerank_top_k: 재정렬 후 최종 선택 개수
+            lexical_top_k: BM25 검색 결과 개수 (0이면 벡터 검색만)
+            rrf_k: Reciprocal Rank Fusion 상수
+            stage_range_rounds: 인접 단계로 볼 앞뒤 라운드 수
+            rerank_weights: 재정렬 특징별 가중치 (None이면 FeatureReranker.DEFAULT_WEIGHTS)
         """
         self.vector_store = vector_store
         self.top_k = top_k
         self.rerank_top_k = rerank_top_k
+        self.lexical_top_k = lexical_top_k
+        self.rrf_k = rrf_k
+        self.stage_range_rounds = stage_range_rounds
+        self.reranker = FeatureReranker(rerank_weights)
     
     def _extract_game_stage(self, query: str) -> Optional[str]:
         """쿼리에서 게임 단계 추출"""
-        # 2-1 형식
-        round_pattern = r'\b([2-5])-([1-7])\b'
+        # 2-1 형식 ("3-2에서"처럼 조사가 붙어도 인식, "12-14"는 제외)
+        round_pattern = r'(?<!\d)([2-5])-([1-7])(?!\d)'
         match = re.search(round_pattern, query)
         if match:
             return match.group(0)
@@ -99,6 +119,115 @@ class TFTRetriever:
         
         return filters if filters else None
     
+    def _stage_range_filter(self, stage: str) -> Optional[Dict]:
+        """현재 라운드 ±stage_range_rounds 범위 필터 (stage_ordinal $gte/$lte)"""
+        ordinal_range = stage_range(stage, self.stage_range_rounds)
+        if ordinal_range is None:
+            return None
+        low, high = ordinal_range
+        return {'stage_ordinal': {'$gte': low, '$lte': high}}
+    
+    def _build_filter_ladder(self, filters: Optional[Dict]) -> List[Tuple[int, Optional[Dict]]]:
+        """
+        필터 완화 단계 목록
+        
+        정확한 단계+유형 -> 단계만 -> 인접 단계 (stage_ordinal 범위) -> 필터 없음
+        (같은 필터가 되는 단계는 건너뜀)
+        
+        Returns:
+            [(relaxation_level, 필터), ...]
+        """
+        ladder = []
+        seen = set()
+        
+        def push(level_name: str, level_filters: Optional[Dict]):
+            key = json.dumps(level_filters, sort_keys=True, ensure_ascii=False)
+            if key not in seen:
+                seen.add(key)
+                ladder.append((self.RELAXATION_LEVELS.index(level_name), level_filters))
+        
+        if filters:
+            push('exact', filters)
+            stage = filters.get('game_stage')
+            if stage:
+                push('stage', {'game_stage': stage})
+                range_filter = self._stage_range_filter(stage)
+                if range_filter:
+                    push('neighbour_stages', range_filter)
+        push('unfiltered', None)
+        
+        return ladder
+    
+    def _search_with_relaxation(self, query: str, filters: Optional[Dict]) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        필터 완화 단계를 한 번에 검색하고 엄격한 단계부터 top_k개 채우기
+        
+        쿼리 임베딩은 한 번만 계산하고, 단계별 검색은 search_by_embeddings로 동시에 실행합니다.
+        
+        Returns:
+            (결과 리스트 (relaxation_level 포함), 마지막으로 사용한 단계의 필터)
+        """
+        return self._search_many_with_relaxation([query], [filters])[0]
+    
+    def _search_many_with_relaxation(
+        self,
+        queries: List[str],
+        filters_list: List[Optional[Dict]]
+    ) -> List[Tuple[List[Dict], Optional[Dict]]]:
+        """
+        여러 쿼리의 필터 완화 단계를 한 번에 검색
+        
+        쿼리 임베딩은 embed_queries 한 번, 검색은 (쿼리 x 단계) 전체를
+        search_by_embeddings 한 번으로 실행합니다 (같은 필터끼리 묶여서 조회).
+        
+        Returns:
+            쿼리별 (결과 리스트, 마지막으로 사용한 단계의 필터)
+        """
+        ladders = [self._build_filter_ladder(filters) for filters in filters_list]
+        embeddings = np.asarray(self.vector_store.embed_queries(queries))
+        query_indices = [i for i, ladder in enumerate(ladders) for _ in ladder]
+        all_results = self.vector_store.search_by_embeddings(
+            embeddings[query_indices],
+            [level_filters for ladder in ladders for _, level_filters in ladder],
+            n_results=self.top_k
+        )
+        
+        searches = []
+        offset = 0
+        for ladder in ladders:
+            level_results = all_results[offset:offset + len(ladder)]
+            offset += len(ladder)
+            searches.append(self._fill_from_ladder(ladder, level_results))
+        return searches
+    
+    def _fill_from_ladder(
+        self,
+        ladder: List[Tuple[int, Optional[Dict]]],
+        level_results: List[List[Dict]]
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """엄격한 단계부터 중복 없이 top_k개 채우기"""
+        results = []
+        seen_ids = set()
+        used_filters = ladder[0][1]
+        for (level, level_filters), candidates in zip(ladder, level_results):
+            if len(results) >= self.top_k:
+                break
+            for result in candidates:
+                if result['id'] in seen_ids:
+                    continue
+                seen_ids.add(result['id'])
+                result['relaxation_level'] = level
+                results.append(result)
+                used_filters = level_filters
+                if len(results) >= self.top_k:
+                    break
+        
+        levels = [self.RELAXATION_LEVELS[level] for level, _ in ladder]
+        counts = [len(candidates) for candidates in level_results]
+        print(f"필터 완화 단계: {', '.join(f'{name}={count}' for name, count in zip(levels, counts))}")
+        
+        return results, used_filters
+    
     def _rerank_results(
         self,
         results: List[Dict],
@@ -107,45 +236,38 @@ class TFTRetriever:
         """
         검색 결과 재정렬
         
-        우선순위:
+        우선순위 (FeatureReranker 가중치로 조절):
         1. 현재 패치 (최신 > 이전)
         2. 게임 단계 일치
         3. 난이도 (초보자 우선)
-        4. 거리 점수
+        4. 검색 점수 (RRF 또는 거리)
         """
-        def score_result(result: Dict) -> float:
-            score = 0.0
-            metadata = result['metadata']
-            
-            # 1. 패치 점수 (최신 패치 가중치)
-            # 예: 13.24 > 13.23
-            try:
-                patch_parts = metadata.get('patch', '0.0').split('.')
-                patch_score = float(patch_parts[0]) * 100 + float(patch_parts[1])
-                score += patch_score
-            except:
-                pass
-            
-            # 2. 게임 단계 일치 (높은 가중치)
-            if game_state and metadata.get('game_stage') == game_state.round:
-                score += 1000
-            
-            # 3. 난이도 (초보자 우선)
-            difficulty_scores = {'입문': 100, '초보': 80, '중급': 50, '고급': 20}
-            score += difficulty_scores.get(metadata.get('difficulty', '초보'), 0)
-            
-            # 4. 거리 점수 (낮을수록 좋음)
-            if result.get('distance') is not None:
-                score -= result['distance'] * 10
-            
-            return score
+        return self.reranker.rerank(results, game_state, self.rerank_top_k)
+    
+    @staticmethod
+    def reciprocal_rank_fusion(result_lists: List[List[Dict]], k: int = 60) -> List[Dict]:
+        """
+        여러 검색 결과를 Reciprocal Rank Fusion으로 합치기
         
-        # 점수로 정렬
-        scored_results = [(score_result(r), r) for r in results]
-        scored_results.sort(key=lambda x: x[0], reverse=True)
+        점수 = sum(1 / (k + 순위)), 같은 청크는 하나로 합치고
+        먼저 나온 결과의 필드(distance 등)에 다른 결과의 필드를 보충합니다.
+        
+        Returns:
+            rrf_score 내림차순 결과 리스트
+        """
+        fused: Dict[str, Dict] = {}
+        for results in result_lists:
+            for rank, result in enumerate(results, 1):
+                entry = fused.get(result['id'])
+                if entry is None:
+                    entry = fused[result['id']] = dict(result, rrf_score=0.0)
+                else:
+                    for key, value in result.items():
+                        if entry.get(key) is None:
+                            entry[key] = value
+                entry['rrf_score'] += 1.0 / (k + rank)
         
-        # 상위 K개 반환
-        return [r for _, r in scored_results[:self.rerank_top_k]]
+        return sorted(fused.values(), key=lambda result: result['rrf_score'], reverse=True)
     
     def retrieve(
         self,
@@ -161,30 +283,73 @@ class TFTRetriever:
             
         Returns:
             재정렬된 검색 결과
+            (결과마다 relaxation_level: 0=단계+유형 일치, 1=단계만, 2=인접 단계, 3=필터 없음)
         """
+        return self.retrieve_many([query], [game_state])[0]
+    
+    def retrieve_many(
+        self,
+        queries: List[str],
+        game_states: Optional[List[Optional[GameState]]] = None
+    ) -> List[List[Dict]]:
+        """
+        여러 쿼리를 한 번에 검색 (동시에 들어온 질문 묶음 처리용)
+        
+        쿼리 임베딩, 벡터 검색, BM25 후보 조회는 전체를 한 번에, 재정렬은 쿼리별로 실행합니다.
+        
+        Args:
+            queries: 사용자 질문 리스트
+            game_states: 쿼리별 게임 상태 (None이거나 원소가 None이면 게임 상태 없음)
+            
+        Returns:
+            쿼리별 재정렬된 검색 결과 (retrieve와 같은 형식)
+        """
+        if not queries:
+            return []
+        game_states = game_states or [None] * len(queries)
+        
         # 1. 필터 생성
-        filters = self._build_filters(query, game_state)
+        filters_list = [
+            self._build_filters(query, game_state)
+            for query, game_state in zip(queries, game_states)
+        ]
         
         print(f"\n=== 검색 시작 ===")
-        print(f"쿼리: {query}")
-        print(f"필터: {filters}")
-        
-        # 2. Vector Search
-        results = self.vector_store.search(
-            query=query,
-            n_results=self.top_k,
-            filters=filters
-        )
+        for query, filters in zip(queries, filters_list):
+            print(f"쿼리: {query}")
+            print(f"필터: {filters}")
         
-        print(f"초기 검색 결과: {len(results)}개")
+        # 2. Vector Search (필터 완화 단계 포함, 모든 쿼리를 한 번에)
+        searches = self._search_many_with_relaxation(queries, filters_list)
         
-        # 3. Reranking
-        reranked = self._rerank_results(results, game_state)
+        # 3. BM25 (벡터 검색이 실제로 도달한 완화 단계의 필터 사용, 저장소 조회는 한 번)
+        lexical_results_list = [None] * len(queries)
+        if self.lexical_top_k > 0 and self.vector_store.lexical_index is not None:
+            lexical_results_list = self.vector_store.lexical_search_many(
+                queries,
+                n_results=self.lexical_top_k,
+                filters_list=[used_filters for _, used_filters in searches]
+            )
+        
+        reranked_list = []
+        for game_state, (results, _), lexical_results in zip(game_states, searches, lexical_results_list):
+            if lexical_results is not None:
+                used_level = max((result['relaxation_level'] for result in results), default=0)
+                for result in lexical_results:
+                    result['relaxation_level'] = used_level
+                print(f"벡터 검색: {len(results)}개, BM25: {len(lexical_results)}개")
+                results = self.reciprocal_rank_fusion([results, lexical_results], k=self.rrf_k)
+            
+            print(f"초기 검색 결과: {len(results)}개")
+            
+            # 4. Reranking
+            reranked = self._rerank_results(results, game_state)
+            print(f"재정렬 후: {len(reranked)}개")
+            reranked_list.append(reranked)
         
-        print(f"재정렬 후: {len(reranked)}개")
         print("=== 검색 완료 ===\n")
         
-        return reranked
+        return reranked_list
     
     def format_context(self, results: List[Dict]) -> str:
         """
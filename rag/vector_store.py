@@ -1,98 +1,653 @@
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Iterable
 from pathlib import Path
+import itertools
 import json
+import time
+
+import numpy as np
+
+from rag.embedding import EMBEDDING_BACKENDS, embedder_cache_name, get_embedder
+from rag.embedding_pool import EmbeddingWorkerPool
+from rag.embedding_cache import EmbeddingDiskCache, QueryEmbeddingCache
+from rag.lexical_index import LexicalIndex
+from rag.numpy_index import NumpyCollection
+from rag.where import matches_where
+from data.chunk_features import derive_features
+import config
 
 
 class TFTVectorStore:
-    """롤체 전략을 위한 Vector Store (ChromaDB)"""
+    """
+    롤체 전략을 위한 Vector Store
+
+    저장 백엔드:
+        "chroma": ChromaDB (SQLite + HNSW)
+        "numpy": 프로세스 안 NumPy 인덱스 (memmap 행렬 + 컬럼 메타데이터, 정확한 검색)
+    """
+    
+    BACKENDS = ['chroma', 'numpy']
     
     def __init__(
         self,
         collection_name: str = "tft_strategies",
         persist_directory: str = "./vector_db",
-        embedding_model: str = "sentence-transformers/xlm-r-100langs-bert-base-nli-stsb-mean-tokens"
+        embedding_model: str = "sentence-transformers/xlm-r-100langs-bert-base-nli-stsb-mean-tokens",
+        device: Optional[str] = None,
+        use_embedding_cache: bool = True,
+        embedding_cache_dir: Optional[str] = None,
+        query_cache_size: int = 1024,
+        query_cache_ttl: Optional[float] = None,
+        use_lexical_index: bool = True,
+        backend: str = "chroma",
+        index_dtype: str = "float32",
+        quantization: Optional[str] = None,
+        rescore_factor: int = 4,
+        embedding_backend: str = "sentence-transformers",
+        embedding_model_path: Optional[str] = None,
+        embedding_threads: Optional[int] = None,
+        embedding_workers: int = 0
     ):
         """
         Args:
             collection_name: 컬렉션 이름
             persist_directory: DB 저장 경로
             embedding_model: 임베딩 모델 (한국어 지원)
+            device: 임베딩 device (기본값: config.EMBEDDING_DEVICE)
+            use_embedding_cache: 디스크 임베딩 캐시 사용 여부
+            embedding_cache_dir: 임베딩 캐시 경로 (기본값: DB 경로 옆 embedding_cache)
+            query_cache_size: 쿼리 임베딩 LRU 캐시 크기 (0이면 사용 안 함)
+            query_cache_ttl: 쿼리 임베딩 캐시 유효 시간 (초, None이면 만료 없음)
+            use_lexical_index: BM25 역색인 사용 여부 (DB 경로에 {컬렉션}.lexical.npz로 저장)
+            backend: 저장 백엔드 ("chroma" 또는 "numpy")
+            index_dtype: numpy 백엔드의 임베딩 저장 dtype ("float32" 또는 "float16")
+            quantization: numpy 백엔드 1차 검색용 양자화 사본 (None, "int8", "float16")
+            rescore_factor: 원본 벡터로 다시 계산할 후보 배수 (n_results x rescore_factor)
+            embedding_backend: 임베딩 백엔드 ("sentence-transformers", "torch-int8", "onnx")
+            embedding_model_path: onnx 백엔드의 로컬 .onnx 파일
+            embedding_threads: CPU 임베딩 스레드 수 (None이면 라이브러리 기본값, 워커 풀에서는 워커당)
+            embedding_workers: 수집 임베딩 워커 프로세스 수 (2 이상이면 EmbeddingWorkerPool, 질문은 항상 이 프로세스)
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"지원하지 않는 백엔드: {backend} (가능: {self.BACKENDS})")
+        if quantization is not None and backend != "numpy":
+            raise ValueError("양자화 사본은 numpy 백엔드에서만 쓸 수 있습니다.")
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"지원하지 않는 임베딩 백엔드: {embedding_backend} (가능: {EMBEDDING_BACKENDS})")
+        
         self.collection_name = collection_name
         self.persist_directory = Path(persist_directory)
         self.persist_directory.mkdir(parents=True, exist_ok=True)
+        self.backend = backend
+        
+        if backend == "numpy":
+            # ChromaDB 없이 memmap 행렬로 검색
+            self.client = None
+            self.collection = NumpyCollection(
+                name=collection_name,
+                persist_directory=str(self.persist_directory),
+                dtype=index_dtype,
+                quantization=quantization,
+                rescore_factor=rescore_factor
+            )
+            print(f"NumPy 인덱스 '{collection_name}' 로드됨 ({self.collection.count()}개 청크)")
+        else:
+            import chromadb
+            
+            # ChromaDB 클라이언트 초기화
+            self.client = chromadb.PersistentClient(
+                path=str(self.persist_directory)
+            )
+            
+            # 컬렉션 가져오기 또는 생성
+            try:
+                self.collection = self.client.get_collection(name=collection_name)
+                print(f"기존 컬렉션 '{collection_name}' 로드됨")
+            except:
+                self.collection = self.client.create_collection(
+                    name=collection_name,
+                    metadata={"hnsw:space": "cosine"}
+                )
+                print(f"새 컬렉션 '{collection_name}' 생성됨")
         
-        # ChromaDB 클라이언트 초기화
-        self.client = chromadb.PersistentClient(
-            path=str(self.persist_directory)
+        # 컬렉션이 바뀔 때마다 증가 (답변 캐시 무효화용)
+        self.revision = 0
+        
+        # 임베딩 모델은 처음 사용할 때 로드 (프로세스 전역 공유)
+        self.embedding_model_name = embedding_model
+        self.device = device or getattr(config, 'EMBEDDING_DEVICE', 'cpu')
+        self.embedding_backend = embedding_backend
+        self.embedding_model_path = embedding_model_path
+        self.embedding_threads = embedding_threads
+        self.embedding_workers = embedding_workers
+        self._embedding_pool = None
+        
+        # 디스크 임베딩 캐시 (같은 텍스트는 다시 인코딩하지 않음, 백엔드마다 따로)
+        self.embedding_cache = None
+        if use_embedding_cache:
+            cache_dir = embedding_cache_dir or self.persist_directory.parent / "embedding_cache"
+            self.embedding_cache = EmbeddingDiskCache(
+                cache_dir=str(cache_dir),
+                model_name=embedder_cache_name(embedding_backend, embedding_model, embedding_model_path),
+                max_entries=getattr(config, 'EMBEDDING_CACHE_MAX_ENTRIES', 200_000)
+            )
+        
+        # 쿼리 임베딩 캐시 (반복 질문은 인코더를 거치지 않음)
+        self.query_cache = QueryEmbeddingCache(
+            max_size=query_cache_size,
+            ttl=query_cache_ttl
         )
         
-        # 컬렉션 가져오기 또는 생성
-        try:
-            self.collection = self.client.get_collection(name=collection_name)
-            print(f"기존 컬렉션 '{collection_name}' 로드됨")
-        except:
-            self.collection = self.client.create_collection(
-                name=collection_name,
-                metadata={"hnsw:space": "cosine"}
+        # 챔피언/아이템 이름 같은 정확한 단어 검색용 BM25 역색인
+        self.lexical_index = None
+        if use_lexical_index:
+            self.lexical_index = LexicalIndex(
+                path=str(self.persist_directory / f"{collection_name}.lexical.npz")
             )
-            print(f"새 컬렉션 '{collection_name}' 생성됨")
-        
-        # 임베딩 모델 로드
-        print(f"임베딩 모델 로드 중: {embedding_model}")
-        import config as cfg
-        device = getattr(cfg, 'EMBEDDING_DEVICE', 'cpu')
-        self.embedding_model = SentenceTransformer(embedding_model, device=device)
-        print(f"임베딩 모델 로드 완료 (device: {device})")
-    
-    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """텍스트를 임베딩 벡터로 변환"""
-        embeddings = self.embedding_model.encode(
-            texts,
-            show_progress_bar=True,
-            convert_to_numpy=True
+            if len(self.lexical_index) != self.collection.count():
+                self.rebuild_lexical_index()
+    
+    def rebuild_lexical_index(self, batch_size: int = 1000):
+        """컬렉션에 저장된 문서로 역색인 다시 만들기 (색인 파일이 없거나 어긋났을 때)"""
+        if self.lexical_index is None:
+            return
+        
+        total = self.collection.count()
+        print(f"역색인 생성 중: {total}개 청크")
+        self.lexical_index.clear()
+        for offset in range(0, total, batch_size):
+            batch = self.collection.get(include=["documents"], limit=batch_size, offset=offset)
+            self.lexical_index.add(batch['ids'], batch['documents'])
+        self.lexical_index.save()
+    
+    def flush(self):
+        """임베딩 캐시, 역색인, (numpy 백엔드) 인덱스를 디스크에 저장"""
+        if self.backend == "numpy":
+            self.collection.persist()
+        if self.embedding_cache is not None:
+            self.embedding_cache.flush()
+        if self.lexical_index is not None:
+            self.lexical_index.save()
+    
+    @property
+    def embedder(self):
+        """공유 임베딩 백엔드 (첫 접근 시 로드)"""
+        return get_embedder(
+            self.embedding_model_name,
+            self.device,
+            backend=self.embedding_backend,
+            model_path=self.embedding_model_path,
+            num_threads=self.embedding_threads
         )
-        return embeddings.tolist()
     
-    def add_chunks(self, chunks: List[Dict]):
+    @property
+    def ingest_embedder(self):
+        """청크 임베딩용 (embedding_workers가 2 이상이면 워커 풀, 첫 사용 시 시작)"""
+        if self.embedding_workers < 2 or self.device != "cpu":
+            return self.embedder
+        if self._embedding_pool is None:
+            self._embedding_pool = EmbeddingWorkerPool(
+                self.embedding_model_name,
+                workers=self.embedding_workers,
+                backend=self.embedding_backend,
+                model_path=self.embedding_model_path,
+                threads_per_worker=self.embedding_threads
+            )
+        return self._embedding_pool
+    
+    def shutdown_embedding_pool(self):
+        """임베딩 워커 종료 (대량 수집이 끝난 뒤 메모리 반환)"""
+        if self._embedding_pool is not None:
+            self._embedding_pool.shutdown()
+            self._embedding_pool = None
+    
+    def _embed_texts(
+        self,
+        texts: List[str],
+        show_progress_bar: bool = True,
+        flush_cache: bool = True
+    ) -> np.ndarray:
+        """텍스트를 임베딩 벡터로 변환 (디스크 캐시 우선)"""
+        if self.embedding_cache is None:
+            return self.ingest_embedder.encode(texts, show_progress_bar=show_progress_bar)
+        
+        keys = [self.embedding_cache.make_key(text) for text in texts]
+        cached = self.embedding_cache.get_many(keys)
+        missing = [i for i in range(len(texts)) if i not in cached]
+        
+        if missing:
+            if cached:
+                print(f"임베딩 캐시 적중: {len(cached)}개, 새로 인코딩: {len(missing)}개")
+            encoded = self.ingest_embedder.encode(
+                [texts[i] for i in missing],
+                show_progress_bar=show_progress_bar
+            )
+            self.embedding_cache.put_many([keys[i] for i in missing], encoded, flush=flush_cache)
+            for i, vector in zip(missing, encoded):
+                cached[i] = vector
+        
+        return np.stack([cached[i] for i in range(len(texts))]).astype(np.float32, copy=False)
+    
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """
+        저장할 청크 텍스트를 배치로 임베딩 (디스크 캐시 우선, 진행 표시줄 없음)
+        
+        캐시 파일은 매번 쓰지 않으므로 배치를 모두 저장한 뒤 flush()를 호출하세요.
+        
+        Returns:
+            (텍스트 수, 차원) float32 배열
+        """
+        return self._embed_texts(texts, show_progress_bar=False, flush_cache=False)
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """쿼리 임베딩 (LRU 캐시 우선, 진행 표시줄 없음)"""
+        return self.embed_queries([query])[0]
+    
+    def get_query_cache_stats(self) -> Dict:
+        """쿼리 임베딩 캐시 통계 (hit rate 등)"""
+        return self.query_cache.stats()
+    
+    @staticmethod
+    def _prepare_metadata(metadata: Dict) -> Dict:
+        """메타데이터를 ChromaDB 저장 형식으로 변환 (리스트는 JSON 문자열, None은 빈 문자열)"""
+        prepared = {}
+        for key, value in metadata.items():
+            if isinstance(value, list):
+                prepared[key] = json.dumps(value, ensure_ascii=False)
+            elif value is None:
+                prepared[key] = ""
+            else:
+                prepared[key] = value
+        return prepared
+    
+    def _max_write_batch_size(self) -> Optional[int]:
+        """ChromaDB가 한 번에 받을 수 있는 최대 레코드 수"""
+        get_max_batch_size = getattr(self.client, 'get_max_batch_size', None)
+        if get_max_batch_size is not None:
+            try:
+                return get_max_batch_size()
+            except Exception:
+                pass
+        return getattr(self.client, 'max_batch_size', None)
+    
+    def write_embedded_chunks(self, chunks: List[Dict], embeddings: np.ndarray):
         """
-        청크를 Vector Store에 추가
+        임베딩이 이미 계산된 청크를 저장 (upsert: 재처리해도 중복 오류 없음)
         
         Args:
             chunks: [{"id": "...", "text": "...", "metadata": {...}}, ...]
+            embeddings: (청크 수, 차원) 배열 (NumPy 그대로 전달)
         """
-        if not chunks:
-            print("추가할 청크가 없습니다.")
-            return
-        
-        ids = [chunk['id'] for chunk in chunks]
-        texts = [chunk['text'] for chunk in chunks]
-        metadatas = [chunk['metadata'] for chunk in chunks]
-        
-        # 메타데이터를 문자열로 변환 (ChromaDB 요구사항)
-        for metadata in metadatas:
-            for key, value in list(metadata.items()):
-                if isinstance(value, list):
-                    metadata[key] = json.dumps(value, ensure_ascii=False)
-                elif value is None:
-                    metadata[key] = ""
-        
-        # 임베딩 생성
-        print(f"{len(texts)}개 청크 임베딩 생성 중...")
-        embeddings = self._embed_texts(texts)
-        
-        # Vector Store에 추가
-        print("Vector Store에 추가 중...")
-        self.collection.add(
-            ids=ids,
+        self.collection.upsert(
+            ids=[chunk['id'] for chunk in chunks],
             embeddings=embeddings,
-            documents=texts,
-            metadatas=metadatas
+            documents=[chunk['text'] for chunk in chunks],
+            # 메타데이터를 문자열로 변환 (ChromaDB 요구사항)
+            metadatas=[self._prepare_metadata(chunk['metadata']) for chunk in chunks]
         )
-        print(f"{len(chunks)}개 청크 추가 완료")
+        if self.lexical_index is not None:
+            self.lexical_index.add([chunk['id'] for chunk in chunks], [chunk['text'] for chunk in chunks])
+        self.revision += 1
+    
+    def add_chunks(self, chunks: Iterable[Dict], batch_size: Optional[int] = None) -> Dict:
+        """
+        청크를 Vector Store에 추가 (같은 ID가 있으면 덮어씀)
+        
+        청크를 batch_size개씩 임베딩하고 바로 저장하므로
+        전체 코퍼스 크기와 상관없이 메모리 사용량이 일정합니다.
+        
+        Args:
+            chunks: [{"id": "...", "text": "...", "metadata": {...}}, ...] (iterator 가능)
+            batch_size: 한 번에 임베딩/저장할 청크 수 (기본값: config.INGEST_BATCH_SIZE)
+            
+        Returns:
+            {"chunks", "batches", "embed_seconds", "write_seconds", "chunks_per_second"}
+        """
+        batch_size = batch_size or getattr(config, 'INGEST_BATCH_SIZE', 256)
+        max_batch_size = self._max_write_batch_size()
+        if max_batch_size:
+            batch_size = min(batch_size, max_batch_size)
+        
+        total = 0
+        batches = 0
+        embed_seconds = 0.0
+        write_seconds = 0.0
+        started_at = time.perf_counter()
+        
+        chunk_iter = iter(chunks)
+        while True:
+            batch = list(itertools.islice(chunk_iter, batch_size))
+            if not batch:
+                break
+            
+            texts = [chunk['text'] for chunk in batch]
+            
+            # 임베딩 생성
+            batch_started_at = time.perf_counter()
+            embeddings = self.embed_documents(texts)
+            embed_seconds += time.perf_counter() - batch_started_at
+            
+            # Vector Store에 추가
+            batch_started_at = time.perf_counter()
+            self.write_embedded_chunks(batch, embeddings)
+            write_seconds += time.perf_counter() - batch_started_at
+            
+            total += len(batch)
+            batches += 1
+            elapsed = time.perf_counter() - started_at
+            print(f"  {total}개 청크 저장 ({total / elapsed:.1f} chunks/s)")
+        
+        self.flush()
+        
+        if total == 0:
+            print("추가할 청크가 없습니다.")
+        else:
+            print(f"{total}개 청크 추가 완료 (배치 {batches}개)")
+        
+        elapsed = time.perf_counter() - started_at
+        return {
+            'chunks': total,
+            'batches': batches,
+            'embed_seconds': embed_seconds,
+            'write_seconds': write_seconds,
+            'chunks_per_second': total / elapsed if total and elapsed > 0 else 0.0
+        }
+    
+    def diff_video_chunks(self, video_id: Optional[str], chunks: List[Dict]) -> Dict:
+        """
+        영상 하나의 새 청크를 저장된 청크와 비교
+        
+        청크 ID가 내용 해시이므로 내용이 바뀐 청크는 새 청크로 취급됩니다.
+        저장된 청크는 메타데이터의 video_id(유튜브 영상 ID)로 찾습니다.
+        video_source는 영상끼리 겹칠 수 있으므로 (기본값 'unknown' 등) 키로 쓰지 않고,
+        video_id를 모르면 ID가 같은 청크만 비교하고 아무것도 삭제하지 않습니다.
+        
+        Returns:
+            {
+                "add": [임베딩이 필요한 새 청크],
+                "update_ids": [...], "update_metadatas": [...],  # 메타데이터만 바뀐 청크
+                "delete_ids": [...],  # 사라진 청크
+                "unchanged": 개수
+            }
+        """
+        existing_metadata = {}
+        deletable = False
+        if video_id and video_id != 'unknown':
+            existing = self.collection.get(
+                where={"video_id": video_id},
+                include=["metadatas"]
+            )
+            existing_metadata = dict(zip(existing['ids'], existing['metadatas']))
+            deletable = True
+        
+        # video_id 없이 저장된 청크(이전 버전)도 ID로 찾아서 다시 임베딩하지 않음
+        missing_ids = [chunk['id'] for chunk in chunks if chunk['id'] not in existing_metadata]
+        if missing_ids:
+            stored = self.collection.get(ids=missing_ids, include=["metadatas"])
+            matched = dict(zip(stored['ids'], stored['metadatas']))
+        else:
+            matched = {}
+        
+        diff = {'add': [], 'update_ids': [], 'update_metadatas': [], 'delete_ids': [], 'unchanged': 0}
+        new_ids = set()
+        for chunk in chunks:
+            new_ids.add(chunk['id'])
+            stored = existing_metadata.get(chunk['id'], matched.get(chunk['id']))
+            if stored is None:
+                diff['add'].append(chunk)
+                continue
+            
+            metadata = self._prepare_metadata(chunk['metadata'])
+            if metadata != stored:
+                diff['update_ids'].append(chunk['id'])
+                diff['update_metadatas'].append(metadata)
+            else:
+                diff['unchanged'] += 1
+        
+        if deletable:
+            diff['delete_ids'] = [chunk_id for chunk_id in existing_metadata if chunk_id not in new_ids]
+        return diff
+    
+    def apply_metadata_changes(
+        self,
+        update_ids: List[str],
+        update_metadatas: List[Dict],
+        delete_ids: List[str]
+    ):
+        """임베딩 없이 메타데이터 갱신과 삭제만 반영"""
+        if update_ids:
+            self.collection.update(ids=update_ids, metadatas=update_metadatas)
+        if delete_ids:
+            self.collection.delete(ids=delete_ids)
+            if self.lexical_index is not None:
+                self.lexical_index.remove(delete_ids)
+        if update_ids or delete_ids:
+            self.revision += 1
+    
+    def sync_chunks(self, chunks_by_video: Dict[str, List[Dict]]) -> Dict:
+        """
+        영상별로 저장된 청크와 비교해서 바뀐 부분만 반영
+        
+        - 새 청크: 임베딩 후 추가 (모든 영상의 새 청크를 한번에 임베딩)
+        - 메타데이터만 바뀐 청크: 임베딩 없이 메타데이터만 갱신
+        - 사라진 청크: 삭제
+        
+        Args:
+            chunks_by_video: {video_id: [청크, ...]} (video_id는 유튜브 영상 ID, 모르면 None)
+            
+        Returns:
+            {"added", "updated", "deleted", "unchanged", "embed_seconds", "write_seconds"}
+        """
+        to_add = []
+        to_update_ids, to_update_metadatas = [], []
+        to_delete = []
+        unchanged = 0
+        
+        for video_id, chunks in chunks_by_video.items():
+            diff = self.diff_video_chunks(video_id, chunks)
+            to_add.extend(diff['add'])
+            to_update_ids.extend(diff['update_ids'])
+            to_update_metadatas.extend(diff['update_metadatas'])
+            to_delete.extend(diff['delete_ids'])
+            unchanged += diff['unchanged']
+        
+        print(f"동기화: 추가 {len(to_add)}개, 갱신 {len(to_update_ids)}개, "
+              f"삭제 {len(to_delete)}개, 유지 {unchanged}개")
+        
+        stats = {'embed_seconds': 0.0, 'write_seconds': 0.0}
+        if to_add:
+            stats = self.add_chunks(to_add)
+        
+        started_at = time.perf_counter()
+        self.apply_metadata_changes(to_update_ids, to_update_metadatas, to_delete)
+        if to_update_ids or to_delete:
+            self.flush()
+        
+        return {
+            'added': len(to_add),
+            'updated': len(to_update_ids),
+            'deleted': len(to_delete),
+            'unchanged': unchanged,
+            'embed_seconds': stats['embed_seconds'],
+            'write_seconds': stats['write_seconds'] + time.perf_counter() - started_at
+        }
+    
+    def sync_video_chunks(self, video_id: Optional[str], chunks: List[Dict]) -> Dict:
+        """영상 하나의 청크를 동기화 (sync_chunks 참고)"""
+        return self.sync_chunks({video_id: chunks})
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        여러 쿼리를 한 번의 배치로 임베딩 (LRU 캐시 우선)
+        
+        Returns:
+            (쿼리 수, 차원) 배열
+        """
+        embeddings: Dict[int, np.ndarray] = {}
+        missing: Dict[str, List[int]] = {}
+        for i, query in enumerate(queries):
+            embedding = self.query_cache.get(query)
+            if embedding is None:
+                missing.setdefault(query, []).append(i)
+            else:
+                embeddings[i] = embedding
+        
+        if missing:
+            unique_queries = list(missing.keys())
+            encoded = self.embedder.encode(unique_queries)
+            for query, embedding in zip(unique_queries, encoded):
+                self.query_cache.put(query, embedding)
+                for i in missing[query]:
+                    embeddings[i] = embedding
+        
+        return np.stack([embeddings[i] for i in range(len(queries))])
+    
+    @staticmethod
+    def _build_where(filters: Optional[Dict]) -> Optional[Dict]:
+        """
+        필터 dict를 ChromaDB where 문법으로 변환 (조건이 여러 개면 $and)
+        
+        한 필드에 연산자가 여러 개면 조건을 나눔:
+            {"stage_ordinal": {"$gte": 30, "$lte": 34}}
+            -> {"$and": [{"stage_ordinal": {"$gte": 30}}, {"stage_ordinal": {"$lte": 34}}]}
+        """
+        if not filters:
+            return None
+        if any(key.startswith('$') for key in filters):
+            return dict(filters)
+        
+        conditions = []
+        for key, value in filters.items():
+            if isinstance(value, dict) and len(value) > 1:
+                conditions.extend({key: {op: operand}} for op, operand in value.items())
+            else:
+                conditions.append({key: value})
+        
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+    
+    @staticmethod
+    def _parse_metadata(metadata: Dict) -> Dict:
+        """저장된 메타데이터 복원 (JSON 문자열을 리스트로 변환)"""
+        metadata = metadata.copy()
+        for key, value in metadata.items():
+            if isinstance(value, str) and value.startswith('['):
+                try:
+                    metadata[key] = json.loads(value)
+                except ValueError:
+                    pass
+        return metadata
+    
+    @staticmethod
+    def _format_results(results: Dict, row: int) -> List[Dict]:
+        """ChromaDB query 결과의 row번째 쿼리를 결과 리스트로 변환"""
+        formatted_results = []
+        for i in range(len(results['ids'][row])):
+            formatted_results.append({
+                'id': results['ids'][row][i],
+                'text': results['documents'][row][i],
+                'metadata': TFTVectorStore._parse_metadata(results['metadatas'][row][i]),
+                'distance': results['distances'][row][i] if results.get('distances') else None
+            })
+        
+        return formatted_results
+    
+    def search_by_embeddings(
+        self,
+        embeddings: np.ndarray,
+        filters_list: List[Optional[Dict]],
+        n_results: int = 5
+    ) -> List[List[Dict]]:
+        """
+        미리 계산된 쿼리 임베딩으로 검색
+        
+        같은 필터를 쓰는 쿼리는 하나의 collection.query 호출로 묶고,
+        필터가 여러 종류면 필터별 호출을 동시에 실행합니다.
+        (numpy 백엔드는 필터와 상관없이 query_many 한 번)
+        
+        Args:
+            embeddings: (쿼리 수, 차원) 임베딩 배열
+            filters_list: 쿼리별 메타데이터 필터 (None 가능)
+            n_results: 쿼리별 반환할 결과 개수
+            
+        Returns:
+            쿼리별 검색 결과 리스트 (입력 순서 유지)
+        """
+        if len(embeddings) != len(filters_list):
+            raise ValueError("쿼리 수와 필터 수가 다릅니다.")
+        
+        # 필터별로 쿼리 묶기
+        groups: Dict[str, List[int]] = {}
+        for i, filters in enumerate(filters_list):
+            group_key = json.dumps(filters or None, sort_keys=True, ensure_ascii=False)
+            groups.setdefault(group_key, []).append(i)
+        
+        embeddings = np.asarray(embeddings)
+        
+        if self.backend == "numpy":
+            # 필터가 달라도 행렬 곱 한 번으로 모든 쿼리를 검색
+            results = self.collection.query_many(
+                embeddings,
+                [self._build_where(filters) for filters in filters_list],
+                n_results=n_results
+            )
+            return [self._format_results(results, row) for row in range(len(filters_list))]
+        
+        def query_group(indices: List[int]) -> Dict:
+            search_kwargs = {
+                "query_embeddings": embeddings[indices],
+                "n_results": n_results
+            }
+            
+            # 필터 적용 (ChromaDB where 문법)
+            where_clause = self._build_where(filters_list[indices[0]])
+            if where_clause:
+                search_kwargs["where"] = where_clause
+            
+            return self.collection.query(**search_kwargs)
+        
+        index_groups = list(groups.values())
+        if len(index_groups) == 1:
+            group_results = [query_group(index_groups[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=len(index_groups)) as executor:
+                group_results = list(executor.map(query_group, index_groups))
+        
+        all_results: List[List[Dict]] = [[] for _ in filters_list]
+        for indices, results in zip(index_groups, group_results):
+            for row, i in enumerate(indices):
+                all_results[i] = self._format_results(results, row)
+        
+        return all_results
+    
+    def search_many(
+        self,
+        queries: List[str],
+        filters_list: Optional[List[Optional[Dict]]] = None,
+        n_results: int = 5
+    ) -> List[List[Dict]]:
+        """
+        여러 쿼리를 한번에 검색
+        
+        모든 쿼리를 한 번의 배치로 임베딩하고, 같은 필터를 쓰는 쿼리는
+        하나의 collection.query로 묶어서 실행합니다.
+        
+        Args:
+            queries: 검색 쿼리 리스트
+            filters_list: 쿼리별 메타데이터 필터 (None이면 모두 필터 없음)
+            n_results: 쿼리별 반환할 결과 개수
+            
+        Returns:
+            쿼리별 검색 결과 리스트 (입력 순서 유지)
+        """
+        if not queries:
+            return []
+        if filters_list is None:
+            filters_list = [None] * len(queries)
+        
+        embeddings = self.embed_queries(queries)
+        return self.search_by_embeddings(embeddings, filters_list, n_results)
     
     def search(
         self,
@@ -111,59 +666,142 @@ class TFTVectorStore:
         Returns:
             검색 결과 리스트
         """
-        # 쿼리 임베딩
-        query_embedding = self._embed_texts([query])[0]
+        return self.search_many([query], [filters], n_results)[0]
+    
+    def lexical_search(
+        self,
+        query: str,
+        n_results: int = 5,
+        filters: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        BM25 역색인으로 검색 (임베딩 없이)
+        
+        필터가 있으면 후보를 넉넉히 뽑은 뒤 메타데이터 필터를 적용합니다.
         
-        # 검색 파라미터
-        search_kwargs = {
-            "query_embeddings": [query_embedding],
-            "n_results": n_results
+        Returns:
+            검색 결과 리스트 (search와 같은 형식, distance 대신 lexical_score)
+        """
+        return self.lexical_search_many([query], n_results, [filters])[0]
+    
+    def lexical_search_many(
+        self,
+        queries: List[str],
+        n_results: int = 5,
+        filters_list: Optional[List[Optional[Dict]]] = None
+    ) -> List[List[Dict]]:
+        """
+        여러 쿼리를 BM25로 검색 (저장소 조회는 한 번)
+        
+        쿼리마다 역색인에서 후보를 뽑고, 모든 후보 ID를 collection.get 한 번으로 읽은 뒤
+        쿼리별 필터는 메타데이터에 직접 적용합니다 (쿼리마다 필터가 달라서 where로 묶을 수 없음).
+        
+        Returns:
+            쿼리별 검색 결과 리스트 (lexical_search와 같은 형식)
+        """
+        filters_list = filters_list or [None] * len(queries)
+        if self.lexical_index is None:
+            return [[] for _ in queries]
+        
+        hits_list = [
+            self.lexical_index.search(query, top_k=n_results * 4 if filters else n_results)
+            for query, filters in zip(queries, filters_list)
+        ]
+        ids = list(dict.fromkeys(doc_id for hits in hits_list for doc_id, _ in hits))
+        if not ids:
+            return [[] for _ in queries]
+        
+        stored = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        rows = {
+            doc_id: (document, metadata or {})
+            for doc_id, document, metadata in zip(stored['ids'], stored['documents'], stored['metadatas'])
         }
         
-        # 필터 적용 (ChromaDB where 문법)
-        if filters:
-            where_clause = {}
-            for key, value in filters.items():
-                where_clause[key] = value
-            search_kwargs["where"] = where_clause
+        results_list = []
+        for hits, filters in zip(hits_list, filters_list):
+            where_clause = self._build_where(filters)
+            results = []
+            for doc_id, score in hits:
+                if doc_id not in rows:
+                    continue
+                document, metadata = rows[doc_id]
+                if where_clause and not matches_where(metadata, where_clause):
+                    continue
+                results.append({
+                    'id': doc_id,
+                    'text': document,
+                    'metadata': self._parse_metadata(metadata),
+                    'distance': None,
+                    'lexical_score': score
+                })
+                if len(results) == n_results:
+                    break
+            results_list.append(results)
+        return results_list
+    
+    def backfill_features(self, batch_size: int = 1000) -> int:
+        """
+        저장된 청크에 숫자 필드(stage_ordinal 등) 채우기 (마이그레이션)
         
-        # 검색 실행
-        results = self.collection.query(**search_kwargs)
+        이전 버전으로 수집한 컬렉션에도 범위 필터와 숫자 재정렬을 쓸 수 있도록
+        메타데이터에서 다시 계산해서 값이 다른 청크만 갱신합니다 (임베딩은 그대로).
         
-        # 결과 포맷팅
-        formatted_results = []
-        for i in range(len(results['ids'][0])):
-            metadata = results['metadatas'][0][i].copy()
-            
-            # JSON 문자열을 리스트로 변환
-            for key, value in metadata.items():
-                if isinstance(value, str) and value.startswith('['):
-                    try:
-                        metadata[key] = json.loads(value)
-                    except:
-                        pass
+        Returns:
+            갱신한 청크 수
+        """
+        total = self.collection.count()
+        updated = 0
+        
+        for offset in range(0, total, batch_size):
+            batch = self.collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            update_ids, update_metadatas = [], []
+            for chunk_id, metadata in zip(batch['ids'], batch['metadatas']):
+                metadata = metadata or {}
+                features = derive_features(self._parse_metadata(metadata))
+                if any(metadata.get(key) != value for key, value in features.items()):
+                    update_ids.append(chunk_id)
+                    update_metadatas.append(features)
             
-            formatted_results.append({
-                'id': results['ids'][0][i],
-                'text': results['documents'][0][i],
-                'metadata': metadata,
-                'distance': results['distances'][0][i] if 'distances' in results else None
-            })
+            if update_ids:
+                # update는 기존 메타데이터에 필드를 합침
+                self.collection.update(ids=update_ids, metadatas=update_metadatas)
+                updated += len(update_ids)
         
-        return formatted_results
+        if updated:
+            self.revision += 1
+            self.flush()
+        print(f"마이그레이션 완료: {total}개 중 {updated}개 청크 갱신")
+        return updated
     
     def get_collection_stats(self) -> Dict:
         """컬렉션 통계 정보"""
         count = self.collection.count()
-        return {
+        stats = {
             'collection_name': self.collection_name,
             'total_chunks': count,
-            'persist_directory': str(self.persist_directory)
+            'persist_directory': str(self.persist_directory),
+            'backend': self.backend,
+            'embedding_backend': self.embedding_backend
         }
+        if self.backend == "numpy":
+            stats['numpy_index'] = self.collection.stats()
+        if self.embedding_cache is not None:
+            stats['embedding_cache'] = self.embedding_cache.stats()
+        stats['query_cache'] = self.query_cache.stats()
+        if self.lexical_index is not None:
+            stats['lexical_index'] = self.lexical_index.stats()
+        return stats
     
     def delete_collection(self):
         """컬렉션 삭제 (주의!)"""
-        self.client.delete_collection(name=self.collection_name)
+        if self.backend == "numpy":
+            self.collection.delete_files()
+        else:
+            self.client.delete_collection(name=self.collection_name)
+        if self.lexical_index is not None:
+            self.lexical_index.clear()
+            if self.lexical_index.path is not None:
+                self.lexical_index.path.unlink(missing_ok=True)
         print(f"컬렉션 '{self.collection_name}' 삭제됨")
 
 
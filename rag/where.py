@@ -0,0 +1,112 @@
+"""
+메타데이터 where 필터 규칙 (ChromaDB 필터와 같은 문법)
+
+    {"season": "15"}                                    -> {"season": {"$eq": "15"}}
+    {"$and": [{"stage_ordinal": {"$gte": 30}}, ...]}    $and/$or 중첩 가능
+
+- 연산자: $eq/$ne/$in/$nin (문자열/불리언/숫자), $gt/$gte/$lt/$lte (숫자만)
+- 값 종류가 다르면 (문자열 "1"과 숫자 1, 불리언 True와 숫자 1) 같지 않음
+- 필드가 없는 레코드는 $ne/$nin을 포함한 어떤 조건도 만족하지 않음
+
+레코드 하나(matches_where, 어휘 검색 필터)와 컬럼 배열 전체(NumpyCollection 마스크)가
+같은 규칙을 쓰도록 조건 트리 순회와 연산자 검사를 여기에 모아둡니다.
+"""
+
+from typing import Callable, Dict
+import operator
+
+
+# 범위 연산자 -> 비교 함수 (스칼라와 NumPy 배열 모두 사용)
+RANGE_OPERATORS = {
+    '$gt': operator.gt,
+    '$gte': operator.ge,
+    '$lt': operator.lt,
+    '$lte': operator.le,
+}
+
+OPERATORS = ('$eq', '$ne', '$in', '$nin') + tuple(RANGE_OPERATORS)
+
+
+def is_number(value) -> bool:
+    """숫자 필드 값인지 (불리언은 숫자로 보지 않음)"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def field_operators(condition) -> Dict:
+    """필드 조건을 {연산자: 값} 형식으로 (값만 있으면 $eq)"""
+    return condition if isinstance(condition, dict) else {'$eq': condition}
+
+
+def check_operator(op: str, operand):
+    """연산자와 비교 값 검사 (지원하지 않으면 ValueError)"""
+    if op not in OPERATORS:
+        raise ValueError(f"지원하지 않는 필터 연산자: {op}")
+    if op in RANGE_OPERATORS and not is_number(operand):
+        raise ValueError(f"{op}는 숫자만 비교할 수 있습니다: {operand!r}")
+    if op in ('$in', '$nin'):
+        if not isinstance(operand, (list, tuple, set)):
+            raise ValueError(f"{op}에는 값 리스트가 필요합니다: {operand!r}")
+        values = operand
+    else:
+        values = [operand]
+    for value in values:
+        if not isinstance(value, (str, bool, int, float)):
+            raise ValueError(f"비교할 수 없는 필터 값: {value!r}")
+
+
+def evaluate_where(where: Dict, match_field: Callable, match_all, match_none):
+    """
+    where 조건 트리 평가
+
+    Args:
+        where: where 조건
+        match_field: (필드, 연산자, 값) -> 조건을 만족하는지 (bool 또는 불리언 배열)
+        match_all / match_none: 조건이 없을 때 / 아무것도 만족하지 않을 때의 결과
+
+    Returns:
+        match_field 결과를 &(모두)와 |(하나라도)로 합친 값
+    """
+    result = match_all
+    for key, condition in where.items():
+        if key == '$and':
+            for clause in condition:
+                result = result & evaluate_where(clause, match_field, match_all, match_none)
+        elif key == '$or':
+            matched = match_none
+            for clause in condition:
+                matched = matched | evaluate_where(clause, match_field, match_all, match_none)
+            result = result & matched
+        elif key.startswith('$'):
+            raise ValueError(f"지원하지 않는 필터 연산자: {key}")
+        else:
+            for op, operand in field_operators(condition).items():
+                check_operator(op, operand)
+                result = result & match_field(key, op, operand)
+    return result
+
+
+def _equals(value, operand) -> bool:
+    if is_number(value) or is_number(operand):
+        return is_number(value) and is_number(operand) and value == operand
+    return type(value) is type(operand) and value == operand
+
+
+def compare(value, op: str, operand) -> bool:
+    """저장된 값 하나가 조건 하나 (예: "$gte", 30)를 만족하는지"""
+    if op == '$eq':
+        return _equals(value, operand)
+    if op == '$ne':
+        return not _equals(value, operand)
+    if op == '$in':
+        return any(_equals(value, item) for item in operand)
+    if op == '$nin':
+        return not any(_equals(value, item) for item in operand)
+    return is_number(value) and RANGE_OPERATORS[op](value, operand)
+
+
+def matches_where(metadata: Dict, where: Dict) -> bool:
+    """레코드 하나의 메타데이터가 where 조건을 만족하는지"""
+    def match_field(key, op, operand):
+        return key in metadata and compare(metadata[key], op, operand)
+
+    return bool(evaluate_where(where, match_field, True, False))
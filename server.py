@@ -0,0 +1,298 @@
+"""
+롤체 RAG HTTP 서비스 (asyncio, 추가 패키지 없음)
+
+모델과 벡터 DB를 한 번만 로드해 두고 여러 요청을 처리합니다.
+
+    POST /query   {"question": "...", "game_state": {...}, "stream": true}
+        stream=true (기본값): NDJSON 스트림 (Transfer-Encoding: chunked)
+            {"type": "retrieval", "sources": [...], "retrieved_chunks": [...]}
+            {"type": "token", "text": "..."}   # 생성되는 대로
+            {"type": "done", "answer": "...", "sources": [...], "generation_stats": {...}, "cached": false}
+        stream=false: 마지막 응답 JSON 하나
+    GET /health
+    GET /stats    시스템 통계 + 묶음 검색 통계
+
+질문 처리는 AsyncTFTRAGSystem이 맡습니다 (이벤트 루프 하나에서 동시 처리):
+- 동시에 들어온 질문은 QueryBatcher가 몇 ms 동안 모아서
+  쿼리 임베딩 한 번 + 벡터 검색 한 번 (TFTRetriever.retrieve_many)으로 처리
+- 생성은 ollama.AsyncClient 스트리밍, 요청별 타임아웃이 지나거나 연결이 끊기면 생성 중단
+  (스트림에는 {"type": "error", "error": "timeout"}, stream=false면 504)
+- 스트림 도중 다른 오류가 나면 {"type": "error", "error": "..."}를 보내고 스트림을 정상 종료
+
+실행:
+    python main.py --mode serve --port 8000
+    curl -N -X POST localhost:8000/query -d '{"question": "3-2에서 리롤해야 하나요?"}'
+"""
+
+from typing import Dict, Optional, Tuple
+import asyncio
+import json
+
+import numpy as np
+from pydantic import ValidationError
+
+from async_system import AsyncTFTRAGSystem
+from data.metadata_schema import GameState
+
+
+# 요청 본문 최대 크기 (질문 + 게임 상태)
+MAX_BODY_BYTES = 64 * 1024
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    504: "Gateway Timeout",
+}
+
+
+class HttpError(Exception):
+    """클라이언트에 상태 코드와 메시지로 돌려줄 오류"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_default(value):
+    """NumPy 값과 pydantic 모델을 JSON으로"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def dump_json(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+def parse_query_request(body: bytes) -> Tuple[str, Optional[GameState], bool]:
+    """
+    /query 요청 본문 검사
+
+    Returns:
+        (질문, 게임 상태 또는 None, 스트리밍 여부)
+    """
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError as e:
+        raise HttpError(400, f"JSON 형식이 아닙니다: {e}")
+    if not isinstance(payload, dict):
+        raise HttpError(400, "요청 본문은 JSON 객체여야 합니다.")
+
+    question = payload.get("question")
+    if not isinstance(question, str) or not question.strip():
+        raise HttpError(400, "question이 필요합니다.")
+
+    game_state = None
+    if payload.get("game_state") is not None:
+        state = payload["game_state"]
+        if not isinstance(state, dict):
+            raise HttpError(400, "game_state는 JSON 객체여야 합니다.")
+        try:
+            game_state = GameState(**{"question": question, **state})
+        except ValidationError as e:
+            raise HttpError(400, f"game_state 오류: {e.errors()}")
+
+    return question, game_state, bool(payload.get("stream", True))
+
+
+class TFTQueryServer:
+    """TFTRAGSystem을 감싼 HTTP 서버 (질문 처리는 AsyncTFTRAGSystem)"""
+
+    def __init__(
+        self,
+        system,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 32,
+        request_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            system: TFTRAGSystem 인스턴스 (초기화 완료 상태)
+            host: 바인드 주소
+            port: 포트
+            batch_window_ms: 질문을 묶기 위해 기다리는 시간 (ms)
+            max_batch_size: 한 번에 검색할 최대 질문 수
+            request_timeout: 요청별 제한 시간 (초, None이면 없음)
+        """
+        self.system = system
+        self.host = host
+        self.port = port
+        self.rag = AsyncTFTRAGSystem(
+            system,
+            batch_window_ms=batch_window_ms,
+            max_batch_size=max_batch_size,
+            timeout=request_timeout
+        )
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        await self.rag.warm_up()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"=== 서버 시작: http://{self.host}:{self.port} ===")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        self.rag.close()
+
+    # ---- HTTP ----
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            raise ConnectionError("빈 요청")
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "잘못된 요청 줄입니다.")
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HttpError(400, "Content-Length가 숫자가 아닙니다.")
+        if length < 0:
+            raise HttpError(400, "Content-Length는 0 이상이어야 합니다.")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, f"요청 본문이 너무 큽니다 (최대 {MAX_BODY_BYTES}바이트).")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    @staticmethod
+    async def _send_headers(writer: asyncio.StreamWriter, status: int, content_type: str, length: Optional[int] = None):
+        lines = [
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            "Connection: close",
+            f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked",
+        ]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload):
+        body = dump_json(payload)
+        await self._send_headers(writer, status, "application/json; charset=utf-8", len(body))
+        writer.write(body)
+        await writer.drain()
+
+    @staticmethod
+    async def _send_event(writer: asyncio.StreamWriter, event: Dict):
+        """NDJSON 한 줄을 chunked 조각 하나로 전송"""
+        data = dump_json(event) + b"\n"
+        writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            method, path, _, body = await self._read_request(reader)
+            if path == "/health":
+                await self._send_json(writer, 200, {"status": "ok", "active_requests": self.rag.active_requests})
+            elif path == "/stats":
+                await self._send_json(writer, 200, self.stats())
+            elif path == "/query":
+                if method != "POST":
+                    raise HttpError(405, "POST만 지원합니다.")
+                await self._handle_query(writer, body)
+            else:
+                raise HttpError(404, f"알 수 없는 경로: {path}")
+        except HttpError as e:
+            await self._send_json(writer, e.status, {"error": e.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            print(f"요청 처리 오류: {e}")
+            try:
+                await self._send_json(writer, 500, {"error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    # ---- /query ----
+
+    async def _handle_query(self, writer: asyncio.StreamWriter, body: bytes):
+        question, game_state, stream = parse_query_request(body)
+
+        if not stream:
+            try:
+                response = await self.rag.query(question, game_state)
+            except asyncio.TimeoutError:
+                raise HttpError(504, "답변 생성 시간이 초과되었습니다.")
+            response.pop("retrieved_chunks", None)
+            await self._send_json(writer, 200, response)
+            return
+
+        events = self.rag.query_stream(question, game_state)
+        try:
+            await self._send_headers(writer, 200, "application/x-ndjson; charset=utf-8")
+            # 헤더를 보낸 뒤에는 상태 코드를 바꿀 수 없으므로 오류도 이벤트로 보냄
+            try:
+                async for event in events:
+                    await self._send_event(writer, event)
+            except asyncio.TimeoutError:
+                await self._send_event(writer, {"type": "error", "error": "timeout"})
+            except ConnectionError:
+                raise
+            except Exception as e:
+                print(f"요청 처리 오류: {e}")
+                await self._send_event(writer, {"type": "error", "error": str(e)})
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            # 전송 실패로 빠져나와도 생성을 바로 멈추도록 닫음
+            await events.aclose()
+
+    def stats(self) -> Dict:
+        return {
+            "collection": self.system.vector_store.get_collection_stats(),
+            **self.rag.stats()
+        }
+
+
+def serve(
+    system,
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    batch_window_ms: float = 5.0,
+    max_batch_size: int = 32,
+    request_timeout: Optional[float] = None
+):
+    """서버 실행 (Ctrl+C로 종료)"""
+    server = TFTQueryServer(
+        system,
+        host=host,
+        port=port,
+        batch_window_ms=batch_window_ms,
+        max_batch_size=max_batch_size,
+        request_timeout=request_timeout
+    )
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n서버 종료")
+    finally:
+        server.close()